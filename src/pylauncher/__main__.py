@@ -0,0 +1,26 @@
+################################################################
+####
+#### This file is part of the `pylauncher' package
+#### for parametric job launching
+####
+#### Copyright Victor Eijkhout 2010-2025
+#### eijkhout@tacc.utexas.edu
+####
+#### https://github.com/TACC/pylauncher
+####
+#### __main__.py : command line tools
+####
+################################################################
+
+import sys
+
+from pylauncher.pylauncher_core import task_output_main
+
+##
+## Usage: python -m pylauncher output WORKDIR [ TASKS ]
+## -- print the aggregated output of tasks, see ``task_output_main``
+##
+if len(sys.argv)>1 and sys.argv[1]=="output":
+    sys.exit( task_output_main(sys.argv[2:]) )
+print( "Usage: python -m pylauncher output WORKDIR [ TASKS ]",file=sys.stderr )
+sys.exit(1)
@@ -142,6 +142,23 @@ class testCommandlineGeneratorStuff():
             os.system("/bin/rm -f %s" % fn)
             assert(True)
 
+    def testStreamingFileCommandLineGenerator(self):
+        """testStreamingFileCommandLineGenerator: read a file in chunks,
+        with blocks, and make sure the count is only known at the end"""
+        fn = RandomFile()
+        fh = open(fn,"w")
+        for t in ["a PYL_ID","# comment","b PYL_ID","","c PYL_ID","d PYL_ID","e PYL_ID"]:
+            fh.write(t+"\n")
+        fh.close()
+        generator = StreamingFileCommandlineGenerator(fn,schedule="block2",streamchunk=1)
+        assert(generator.total() is None)
+        commands = []
+        while not generator.stopping():
+            commands.append( generator.next()["command"] )
+        assert(commands==["a 0 && b 1","c 2 && d 3","e 4"])
+        assert(generator.total()==3 and generator.exhausted())
+        os.system("/bin/rm -f %s" % fn)
+
 class testDynamicGeneratorStuff():
     def testDynamicGeneratorCount(self):
         g = DynamicCommandlineGenerator()
@@ -457,6 +474,53 @@ class testTasks():
         print("stamps:",sorted(stamps),flush=True)
         assert(len(stamps)==self.ntasks)
 
+def testStampCleanup():
+    """testStampCleanup: the stamp directory is made once, and stamps are removed in the background"""
+    wd = RandomDir()
+    completions = [ WrapCompletion(taskid=i,workdir=wd) for i in range(10) ]
+    for c in completions:
+        c.attach("true")
+    stampdir = os.path.dirname(completions[0].stampname())
+    assert( os.path.isdir(stampdir) and os.path.abspath(stampdir) in stamp_directories )
+    # the exit status files are removed also if the status was never read
+    for c in completions:
+        open(c.stampname(),"w").close(); open(c.failname(),"w").write("1\n")
+        c.stamped = True
+        if c.taskid%2==0: assert( c.exit_status()==1 )
+    for c in completions:
+        c.cleanup()
+    stamp_cleaner().flush()
+    files = [ f for d,subdirs,files in os.walk(wd) for f in files ]
+    assert( files==[] )
+    assert( stamp_cleaner().removed>=20 )
+    shutil.rmtree(wd); forget_stamp_directory(wd)
+
+def testWorkdirLayout():
+    """testWorkdirLayout: small files go in shards, or in the workdir itself with the flat layout"""
+    sharded = WorkdirLayout()
+    assert( sharded.filename("wd","out",1234)=="wd/out/000/001/out1234" )
+    assert( sharded.filename("wd","expire",12345678)=="wd/expire/012/345/expire12345678" )
+    assert( WorkdirLayout("flat").filename("wd","out",1234)=="wd/out1234" )
+    try:
+        WorkdirLayout("deep"); assert(False)
+    except LauncherException: pass
+    for layout in WorkdirLayout.layouts:
+        wd = NoRandomDir()
+        x = ChildProcessExecutor(workdir=wd,layout=layout)
+        c = ScandirCompletion(taskid=1500,workdir=wd)
+        assert( workdir_layout(wd).layout==layout )
+        x.execute(c.attach("echo foo"),None,id=1)
+        time.sleep(1)
+        x.poll()
+        out = wd+"/out0" if layout=="flat" else wd+"/out/000/000/out0"
+        stamp = wd+"/expire1500" if layout=="flat" else wd+"/expire/000/001/expire1500"
+        assert( open(out).read()=="foo\n" )
+        refresh_stamp_watchers()
+        assert( os.path.isfile(stamp) and c.test(time.time()) )
+        c.cleanup(); stamp_cleaner().flush()
+        assert( not os.path.isfile(stamp) )
+        x.cleanup()
+
 def testNode():
     assert(True)
     return
@@ -498,7 +562,215 @@ def testHostPoolN():
     # cleanup
     if os.path.isdir(tmpdir):
         shutil.rmtree(tmpdir)
-    
+
+def testFreeSlotTree():
+    tree = FreeSlotTree(10)
+    assert(tree.find(10)==0 and tree.find(11) is None)
+    # occupy 2..3 and 6; free runs are 0-1, 4-5, 7-9
+    tree.occupy(2,2); tree.occupy(6,1)
+    assert(tree.longest()==3)
+    assert(tree.find(1)==0 and tree.find(2)==0 and tree.find(3)==7)
+    assert(tree.find(4) is None)
+    assert(tree.free_runs()==[(0,2),(4,2),(7,3)])
+    tree.release(2,2)
+    assert(tree.find(6)==0 and tree.find(7) is None)
+    assert(tree.free_runs()==[(0,6),(7,3)])
+    assert(tree.find(2,start=1)==1 and tree.find(3,start=4)==7 and tree.free_from(4)==2)
+    # walls at 4 and 8: runs of free slots do not cross them
+    tree = FreeSlotTree(10,walls=[4,8])
+    assert(tree.longest()==4 and tree.find(5) is None and tree.find(2,start=3)==4)
+    tree.occupy(0,1); tree.occupy(5,1)
+    assert(tree.find(3)==1 and tree.find(3,start=2) is None and tree.free_from(6)==2)
+    tree.release(0,1)
+    assert(tree.find(4)==0 and tree.longest()==4)
+
+def testFreeGaps():
+    gaps = FreeGaps( [(0,2),(4,3),(10,6)] )
+    assert(gaps.histogram()=={2:1,3:1,6:1})
+    # first fit takes the lowest offset, best fit the smallest gap
+    assert(gaps.take(3,"ffd")==4)
+    assert(gaps.take(2,"bestfit")==0)
+    assert(gaps.take(2,"bestfit")==10)
+    assert(gaps.histogram()=={4:1})
+    assert(gaps.take(5) is None)
+
+def testNodePlacement():
+    """testNodePlacement: tasks stay on one host and in one numa domain"""
+    hostlist = [ {'host':h,'hostnum':i,'task_loc':c,'phys_core':f"{c}-{c}"}
+                 for i,h in enumerate(["a","b","c","d"]) for c in range(8) ]
+    pool = HostPool(hostlist=hostlist,workdir=NoRandomDir(),placement="node",numasize=4)
+    offsets = []
+    for taskid,size in enumerate( [3,3,2,6,9,5,1] ):
+        locator = pool.request_nodes(size)
+        offsets.append( None if locator is None else locator.offset )
+        if locator is not None:
+            pool.occupyNodes(locator,taskid)
+    assert( offsets==[0,4,8,16,None,24,3] )
+    assert( pool.onehost==6 and pool.numaaligned==6 and pool.straddling==0 )
+    pool.commandexecutor.cleanup()
+
+def testRuntimeHistory():
+    """testRuntimeHistory: predictions by command and template, and longest task first"""
+    import heapq
+    historyfile = RandomFile()
+    history = RuntimeHistory(historyfile)
+    wd = NoRandomDir()
+    for i,t in enumerate( [ 1.,3. ] ):
+        task = WrappedTask( Commandline(f"./prog {i}"),taskid=i,workdir=wd )
+        task.runningtime = t
+        history.record(task)
+    history.save()
+    history = RuntimeHistory(historyfile)
+    os.remove(historyfile)
+    # exact commands, then the template "./prog #"
+    queue = TaskQueue(history=history)
+    for i in [ 0,1,2 ]:
+        queue.enqueue( WrappedTask( Commandline(f"./prog {i}"),taskid=i,workdir=wd ) )
+    predicted = [ t.predicted for t in queue.sorted_queue() ]
+    assert( predicted==[1.,3.,2.] )
+    order = [ heapq.heappop(queue.buckets[""][(0,-1)])[1] for i in range(3) ]
+    assert( order==[1,2,0] )
+    # three tasks of 2 and one of 4 on 4 cores: 2+2 in parallel, then 4
+    assert( ListScheduleMakespan( [ (2.,2),(2.,2),(4.,4) ],4 )==6. )
+
+def testRuntimeHistoryJob():
+    """testRuntimeHistoryJob: with a history the lookahead is bounded, and the makespan is reported"""
+    historyfile = RandomFile(); wd = NoRandomDir()
+    commands = [ Commandline(f"sleep .{i}") for i in range(4) ]
+    job = LauncherJob( hostpool=LocalHostPool(nhosts=2,workdir=wd),
+                       taskgenerator=TaskGenerator( CommandlineGenerator(list=commands),
+                                                    taskclass=WrappedTask,workdir=wd ),
+                       runtimehistory=historyfile,eventdriven=True,delay=.1 )
+    assert( job.queue_lookahead()==2*LauncherJob.history_lookahead )
+    job.run()
+    assert( ", actual: " in job.prediction_report() )
+    os.remove(historyfile); shutil.rmtree(wd)
+
+def testAsyncLocalFileTaskJob():
+    """testAsyncLocalFileTaskJob: test concurrent launches on a local pool"""
+    fn = RandomFile(); wd = NoRandomDir()
+    ncommand = 6; maxsleep = 2
+    MakeRandomSleepFile( fn,ncommand,tmin=maxsleep,tmax=maxsleep )
+    # the core count of the node goes into the ibrun prefix of every task
+    cores = os.environ.get("SLURM_CPUS_ON_NODE",None)
+    os.environ["SLURM_CPUS_ON_NODE"] = str(ncommand)
+    try:
+        job = AsyncLauncherJob(
+            taskgenerator=WrappedTaskGenerator( FileCommandlineGenerator(fn,cores=1),workdir=wd ),
+            hostpool=LocalHostPool(nhosts=ncommand,workdir=wd),
+            delay=.2, maxlaunches=2, debug="job" )
+        starttime = time.time()
+        job.run()
+        elapsed = time.time()-starttime
+    finally:
+        if cores is None:
+            del os.environ["SLURM_CPUS_ON_NODE"]
+        else: os.environ["SLURM_CPUS_ON_NODE"] = cores
+    print("elapsed: %5.3e" % elapsed,"max in flight:",job.maxinflight,flush=True)
+    assert(job.completed==ncommand)
+    assert(job.maxinflight<=2)
+    # all tasks run at the same time
+    assert(elapsed<2*maxsleep)
+    os.remove(fn); shutil.rmtree(wd)
+
+def testCommandlineOptions():
+    assert( commandline_options("./prog 1")==({},"./prog 1") )
+    options,line = commandline_options("{priority=5, queue=alice} 4,./prog")
+    assert( options=={"priority":"5","queue":"alice"} and line=="4,./prog" )
+    options,line = commandline_options("{name=post,after=sim1+sim2} ./post")
+    assert( Commandline(line,**options)["after"]==("sim1","sim2") )
+    options,line = commandline_options("{retries=3} ./prog")
+    assert( Commandline(line,**options)["retries"]==3 )
+    # anything that is not exactly an options prefix is an ordinary command
+    for line in [ "{ echo a; echo b; } > x","{color=red} ./prog","{priority=5}./prog" ]:
+        assert( commandline_options(line)==({},line) )
+
+def testFairShareQueues():
+    """testFairShareQueues: sub-queues share the pool by weight, priority goes first"""
+    wd = NoRandomDir()
+    pool = HostPool(nhosts=6,workdir=wd)
+    queue = TaskQueue(queueweights={"alice":2})
+    taskid = 0
+    for name in [ "alice","bob" ]:
+        for i in range(10):
+            queue.enqueue( WrappedTask( Commandline("true",queue=name,priority=(i==9)),
+                                        taskid=taskid,workdir=wd ) )
+            taskid += 1
+    queue.startQueued(pool,launch=lambda t,locator,tick:None)
+    started = [ t.taskid for t in queue.running ]
+    assert( len(started)==6 )
+    assert( len( [ t for t in queue.running if t.queue=="alice" ] )==4 )
+    # the priority tasks of both queues are among the first
+    assert( 9 in started[:2] and 19 in started[:2] )
+    pool.commandexecutor.cleanup()
+
+def testTaskRetry():
+    """testTaskRetry: failed tasks are run again, and the exit codes are reported"""
+    policy = RetryPolicy(retries=2,backoff=1,exitcodes=[3])
+    task = WrappedTask( Commandline("true"),taskid=0 )
+    assert( policy.delay(task,3)==1 and policy.delay(task,4) is None )
+    task.attempt = 2; assert( policy.delay(task,3)==2 )
+    task.attempt = 3; assert( policy.delay(task,3) is None )
+    for spawn in [ False,True ]:
+        wd = NoRandomDir(); counter = RandomFile()
+        commands = [ Commandline("true"),Commandline("exit 3"),
+                     Commandline( f"echo x >> {counter}; [ $( wc -l < {counter} ) -ge 3 ]",retries=2 ),
+                     Commandline("exit 4",retries=1) ]
+        job = LauncherJob( hostpool=LocalHostPool(nhosts=2,workdir=wd,spawn=spawn),
+                           taskgenerator=TaskGenerator( CommandlineGenerator(list=commands),
+                                                        taskclass=WrappedTask,workdir=wd ),
+                           queuestate=wd+"/queuestate",eventdriven=True,delay=.1,
+                           retry={"backoff":.1} )
+        job.run()
+        statuses = dict( [ (t.taskid,t.exitstatus) for t in job.queue.completed ] )
+        assert( statuses=={ 0:0,1:3,2:0,3:4 } )
+        assert( job.failures=={ 1:[3],2:[1,1],3:[4,4] } and job.retried==3 )
+        assert( job.failure_report().startswith("tasks failed: 2 1 3") )
+        os.remove(counter); shutil.rmtree(wd)
+
+def testTaskDependencies():
+    """testTaskDependencies: tasks are handed out when the tasks they come after have completed"""
+    commands = [ Commandline("sim 1",name="sim"),Commandline("sim 2",name="sim"),
+                 Commandline("post",name="post",after="sim"),Commandline("other"),
+                 Commandline("plot",after=["post"]),Commandline("late",after="sim") ]
+    generator = TaskGenerator( CommandlineGenerator(list=commands),taskclass=WrappedTask )
+    ready = []
+    while not ( generator.stalling() or generator.stopping() ):
+        ready.append( generator.next() )
+    assert( [ t.command for t in ready ]==["sim 1","sim 2","other"] )
+    assert( sorted(generator.waiting.keys())==[2,4,5] )
+    state = TaskQueue(waiting=generator.waiting).savestate()
+    assert( "4: {after=post} plot" in state )
+    # the post task waits for both sim tasks
+    generator.retire( ready[:1] )
+    assert( generator.stalling() )
+    generator.retire( ready[1:] )
+    post = generator.next(); late = generator.next()
+    assert( post.command=="post" and late.command=="late" )
+    # an aborted task cancels the tasks that come after it
+    generator.retire( [post],aborted=True )
+    assert( [ t.command for t in generator.cancelled ]==["plot"] )
+    assert( generator.stopping() and generator.exhausted() )
+    try:
+        generator = TaskGenerator( CommandlineGenerator(list=[Commandline("plot",after="post")]),
+                                   taskclass=WrappedTask )
+        generator.stalling()
+        assert(False)
+    except LauncherException: pass
+
+def testFailedDependency():
+    """testFailedDependency: a task that fails for good cancels the tasks that come after it"""
+    wd = NoRandomDir()
+    commands = [ Commandline("true",name="sim"),Commandline("exit 5",name="post",after="sim"),
+                 Commandline("echo plot",after="post"),Commandline("echo other") ]
+    generator = TaskGenerator( CommandlineGenerator(list=commands),taskclass=WrappedTask,workdir=wd )
+    job = LauncherJob( hostpool=LocalHostPool(nhosts=2,workdir=wd),taskgenerator=generator,
+                       eventdriven=True,delay=.1 )
+    job.run()
+    assert( sorted( [ t.taskid for t in job.queue.completed ] )==[0,1,3] )
+    assert( [ t.command for t in generator.cancelled ]==["echo plot"] )
+    shutil.rmtree(wd)
+
 def testStartTaskOnPool():
     import random
     # get rid of old workdirs
@@ -590,6 +862,110 @@ def testTaskQueue():
     if os.path.isdir(tmpdir):
         shutil.rmtree(tmpdir)
 
+def testTaskQueueBatchCompleted():
+    """testTaskQueueBatchCompleted: tasks that finish together are retired in one scan"""
+    wd = NoRandomDir()
+    pool = LocalHostPool(nhosts=5,workdir=wd)
+    queue = TaskQueue()
+    nsleep = 2; ntasks = 4
+    tasks = [ WrappedTask(Commandline(f"sleep {nsleep}"),taskid=t_id,workdir=wd)
+              for t_id in range(ntasks) ]
+    for t in tasks:
+        queue.enqueue(t)
+    queue.startQueued(pool)
+    assert(len(queue.running)==ntasks)
+    time.sleep(nsleep+1)
+    completed = queue.find_all_recently_completed()
+    assert(len(completed)==ntasks)
+    queue.retire(completed,queue.completed)
+    pool.releaseNodesByTasks( [ t.taskid for t in completed ] )
+    assert(len(queue.running)==0 and len(queue.completed)==ntasks)
+    assert(pool.request_nodes(5) is not None)
+    shutil.rmtree(wd)
+
+def testQueueJournalResume():
+    """testQueueJournalResume: restart from a snapshot plus the journal written after it"""
+    fn = RandomFile()
+    journal = QueueJournal(fn,compactinterval=0)
+    queue = TaskQueue(journal=journal)
+    tasks = [ WrappedTask(Commandline(f"echo {i}"),taskid=i) for i in range(5) ]
+    for t in tasks[:4]:
+        queue.enqueue(t)
+    journal.compact(queue)
+    # state changes after the snapshot are only in the journal
+    journal.record("started",tasks[0]); journal.record("completed",tasks[0])
+    journal.record("started",tasks[1]); journal.record("aborted",tasks[2])
+    queue.enqueue(tasks[4])
+    journal.journal.flush()
+    generator = StateFileCommandlineGenerator(fn)
+    commands = []
+    while not generator.stopping():
+        commands.append( generator.next()["command"] )
+    assert(commands==["echo 1","echo 3","echo 4"])
+    journal.close(queue)
+    assert(not os.path.exists(fn+".journal"))
+    os.system("/bin/rm -f %s" % fn)
+
+def testQueueJournalStaleSnapshot():
+    """testQueueJournalStaleSnapshot: the snapshot of an earlier run is not combined with a new journal"""
+    fn = RandomFile()
+    queuestate_update(fn,"queued\nrunning\ncompleted\n0: old 0\n1: old 1\n")
+    journal = QueueJournal(fn,compactinterval=60)
+    queue = TaskQueue(journal=journal)
+    tasks = [ WrappedTask(Commandline(f"new {i}"),taskid=i) for i in range(3) ]
+    for t in tasks:
+        queue.enqueue(t)
+    journal.record("started",tasks[0])
+    journal.journal.flush()
+    states = sorted( read_queuestate(fn) )
+    assert( states==[ (0,"running","new 0"),(1,"queued","new 1"),(2,"queued","new 2") ] )
+    journal.close(queue)
+    os.system("/bin/rm -f %s" % fn)
+
+def testQueueJournalNoSnapshot():
+    """testQueueJournalNoSnapshot: without a snapshot the journal by itself is the state"""
+    fn = RandomFile()
+    journal = QueueJournal(fn,compactinterval=60)
+    queue = TaskQueue(journal=journal)
+    tasks = [ WrappedTask(Commandline(f"echo {i}"),taskid=i) for i in range(3) ]
+    for t in tasks:
+        queue.enqueue(t)
+    journal.record("started",tasks[0]); journal.record("completed",tasks[0])
+    journal.journal.flush()
+    # as if we crashed before the first snapshot was written
+    os.remove(fn)
+    states = sorted( read_queuestate(fn) )
+    assert( states==[ (0,"completed","echo 0"),(1,"queued","echo 1"),(2,"queued","echo 2") ] )
+    journal.close(queue)
+    os.system("/bin/rm -f %s" % fn)
+
+def testQueueJournalOptIn():
+    """testQueueJournalOptIn: a job only keeps a journal if asked; a due compaction does not wait for new events"""
+    for journal in [ False,True ]:
+        wd = NoRandomDir(); fn = wd+"/queuestate"
+        job = LauncherJob( hostpool=LocalHostPool(nhosts=1,workdir=wd),
+                           taskgenerator=TaskGenerator( CommandlineGenerator(list=[Commandline("true")]),
+                                                        taskclass=WrappedTask,workdir=wd ),
+                           queuestate=fn,journal=journal,eventdriven=True,delay=.1 )
+        assert( os.path.exists(fn+".journal")==journal )
+        job.run()
+        assert( not os.path.exists(fn+".journal") )
+        assert( read_queuestate(fn)==[ (0,"completed","true") ] )
+        shutil.rmtree(wd)
+    fn = RandomFile()
+    journal = QueueJournal(fn,compactinterval=0)
+    queue = TaskQueue(journal=journal)
+    queue.enqueue( WrappedTask(Commandline("echo 0"),taskid=0) )
+    os.remove(fn)
+    journal.update(queue)
+    assert( read_queuestate(fn)==[ (0,"queued","echo 0") ] )
+    # without new records the snapshot is not written again
+    os.remove(fn)
+    journal.update(queue)
+    assert( not os.path.exists(fn) )
+    journal.close(queue)
+    os.system("/bin/rm -f %s" % fn)
+
 def testTaskQueueWithLauncherdir():
     """testTaskQueueWithLauncherdir: same, but test correct use of launcherdir"""
     # get rid of old workdirs
@@ -791,9 +1167,9 @@ def testLocalExecutor():
     x.execute("touch %s" % touched)
     print(os.listdir(x.workdir),flush=True)
     assert(os.path.isdir(wd))
-    assert(os.path.isfile(wd+"/exec0"))
+    assert(not os.path.isfile(x.layout.filename(wd,"exec",0)))
     time.sleep(1)
-    assert(os.path.isfile(wd+"/out0"))
+    assert(os.path.isfile(x.layout.filename(wd,"out",0)))
     assert(os.path.isfile(touched))
     # test proper delays
     touched = RandomFile()
@@ -806,6 +1182,129 @@ def testLocalExecutor():
     os.system("/bin/rm -f %s" % touched)
     assert( not os.path.isdir(wd))
 
+def testChildProcessExecutor():
+    """testChildProcessExecutor: check that exits and exit codes are reported"""
+    wd = NoRandomDir()
+    x = ChildProcessExecutor(workdir=wd)
+    x.execute("echo foo",None,id=1)
+    x.execute("exit 3",None,id=2)
+    x.execute("sleep 2",None,id=3)
+    # a child that is not a task is left for its owner to reap
+    other = os.posix_spawn("/bin/true",["true"],os.environ)
+    time.sleep(1)
+    x.poll()
+    assert( os.waitpid(other,0)==(other,0) )
+    assert(x.has_exited(1) and x.exit_status(1)==0)
+    assert(x.has_exited(2) and x.exit_status(2)==3)
+    assert(not x.has_exited(3))
+    assert(open(x.layout.filename(wd,"out",0)).read()=="foo\n")
+    # a child that is reaped by someone else has an unknown exit status
+    x.execute("exit 5",None,id=5)
+    os.waitpid( [ pid for pid,(taskid,start) in x.children.items() if taskid==5 ][0],0 )
+    time.sleep(2)
+    x.poll()
+    assert(x.has_exited(3))
+    assert(x.has_exited(5) and x.exit_status(5) is None)
+    # retired tasks are forgotten, the final report keeps the totals
+    for taskid in [1,2,3,5]:
+        x.forget_exit(taskid)
+    report = x.final_report()
+    assert( len(x.exits)==0 and report.startswith("child processes reaped: 3") )
+    assert( "nonzero exit status: 1 2\n" in report and "exit status unknown: 1 5\n" in report )
+    x.cleanup()
+    assert( not os.path.isdir(wd))
+    # the numactl binding is a prefix of the shell, the ibrun prefix of the task is not used
+    wd = NoRandomDir()
+    x = ChildProcessExecutor(workdir=wd,numactl="gpu")
+    locator = LocalHostPool(nhosts=2).request_nodes(1)
+    x.execute("echo $CUDA_VISIBLE_DEVICES",locator,id=1,prefix="ibrun -n 1 ")
+    time.sleep(1)
+    x.poll()
+    assert( x.exit_status(1)==0 )
+    assert( open(x.layout.filename(wd,"out",0)).read()=="0\n" )
+    x.cleanup()
+
+def testEnvironmentSource():
+    """testEnvironmentSource: the environment file is written once, changes are exported per task"""
+    wd = NoRandomDir()
+    x = ChildProcessExecutor(workdir=wd)
+    old = RandomFile()+"_old"; os.environ[old] = "1"
+    source = x.environment_source()
+    assert( source.startswith(". ") and source.endswith("environment0.sh\n") )
+    var = RandomFile()+"_var"; os.environ[var] = "1"; del os.environ[old]
+    # without a refresh the environment is not looked at
+    assert( x.environment_source()==source )
+    x.refresh_environment()
+    assert( x.environment_source()==source+f'export {var}="1"\nunset {old}\n' )
+    del os.environ[var]
+    x.refresh_environment()
+    assert( x.environment_source()==source+f"unset {old}\n" )
+    for i in range(x.maxoverrides+1):
+        os.environ[f"{var}{i}"] = "1"
+    x.refresh_environment()
+    assert( x.environment_source().endswith("environment1.sh\n") )
+    for i in range(x.maxoverrides+1):
+        del os.environ[f"{var}{i}"]
+    x.cleanup()
+
+def testWorkerAgent():
+    """testWorkerAgent: the agent spawns the shell with its output redirected, and reports exits"""
+    import subprocess,sys
+    wd = NoRandomDir()
+    x = ChildProcessExecutor(workdir=wd)
+    agent_process = subprocess.Popen( [ sys.executable,"-u","-c",AGENT_SOURCE ],
+                                      stdin=subprocess.PIPE,stdout=subprocess.PIPE )
+    def send(msg):
+        agent_process.stdin.write(msg); agent_process.stdin.flush()
+    agent = WorkerAgent("localhost",send,agent_process.stdout,x)
+    arguments,out = x.shell_arguments("echo foo; echo bar >&2",prefix="GREETING=hi ")
+    assert( arguments[:2]==["env","GREETING=hi"] )
+    agent.submit(1,arguments,out=out)
+    agent.submit(2,x.shell_arguments("exit 3")[0])
+    time.sleep(1)
+    assert( x.exit_status(1)==0 and x.exit_status(2)==3 and len(agent.running)==0 )
+    assert( open(out).read()=="foo\nbar\n" )
+    agent.stop(); agent_process.wait()
+    x.cleanup()
+
+def testExecutorExecfiles():
+    """testExecutorExecfiles: exec files are only written when asked for"""
+    for execfiles in [ False,True ]:
+        wd = NoRandomDir()
+        x = ChildProcessExecutor(workdir=wd,execfiles=execfiles)
+        x.execute("echo 'it''s' \"$((1+2))\"",None,id=1)
+        assert( x.wrap("echo foo").startswith("/bin/bash -c 'echo foo' >") or execfiles )
+        time.sleep(1)
+        x.poll()
+        assert(x.has_exited(1) and x.exit_status(1)==0)
+        assert(open(x.layout.filename(wd,"out",0)).read()=="its 3\n")
+        assert(os.path.isfile(x.layout.filename(wd,"exec",0))==execfiles)
+        x.cleanup()
+
+def testTaskOutput():
+    """testTaskOutput: aggregated output can be read per task"""
+    wd = NoRandomDir()
+    try:
+        LocalExecutor(workdir=wd,aggregate_output=True); assert(False)
+    except LauncherException: pass
+    x = ChildProcessExecutor(workdir=wd,aggregate_output=True)
+    for i in [ 5,1,3 ]:
+        x.execute(f"echo out {i}; echo err {i} >&2",None,id=i)
+    x.execute("true",None,id=7)
+    time.sleep(1)
+    x.poll()
+    x.flush_output()
+    assert( x.output_incomplete==[] and x.taskoutput.recorded==4 )
+    assert( not os.path.isfile(x.layout.filename(wd,"out",0)) )
+    reader = TaskOutputReader(wd)
+    assert( reader.tasks()==[1,3,5,7] )
+    assert( reader.output(3)==b"out 3\nerr 3\n" )
+    assert( reader.output(7)==b"" )
+    assert( reader.output(2) is None and reader.output(100) is None )
+    assert( [ t for t,o in reader.outputs(0,6) ]==[1,3,5] )
+    reader.close()
+    x.cleanup()
+
 def testLocalHostPool():
     tmpdir = os.getcwd()+"/"+Executor.default_workdir
     if os.path.isdir(tmpdir):
@@ -26,6 +26,31 @@ otoelog = """
 Change log
 5.5 UNRELEASED
 - schedule=blocknn
+- eventdriven=True option: batch processing, sleep only when idle
+- completed and aborted tasks are harvested in batches
+- stampwatch="inotify"/"scandir" option: watch the workdir for stamps
+- free node search through a segment tree instead of linear scan
+- node release through a taskid-to-locator map, incremental occupancy count
+- commandline generators pop from a deque
+- streaming=True option: read the commandline file lazily
+- Commandline and Task objects use __slots__, with rarely used members in a separate TaskOptions object
+- journal=True option: the queuestate is an append-only journal with periodic snapshot
+- debug messages can be deferred, so they cost nothing when tracing is off
+- agent=True option: one worker agent per host instead of an ssh command per task
+- ssh exec files source a cached environment file instead of exporting everything
+- ssh connections are made concurrently; unreachable hosts are left out of the pool
+- spawn=True option for LocalLauncher: spawn and reap tasks without a background shell
+- asynchronous=True option: AsyncLauncherJob launches tasks concurrently in an asyncio loop
+- packing option: queued tasks are bucketed by core count and placed first-fit or best-fit in the free gaps
+- placement="node" option: multi-core tasks are kept on one host, aligned to numasize if given
+- runtimehistory option: predict running times from earlier runs, start the longest tasks first
+- task priorities and fair share sub-queues, from a {priority=..,queue=..} commandline prefix or DynamicLauncherJob.append
+- task dependencies, from a {name=..,after=..} commandline prefix or DynamicLauncherJob.append
+- commands are passed to the shell as an argument; exec files only with execfiles=True
+- stamp directory is made once, stamps of completed tasks are removed in a background thread
+- out, exec, and stamp files go in sharded subdirectories of the workdir, unless layout="flat"
+- aggregate_output=True collects task output in one indexed log per host, read with TaskOutputReader
+- exit status of tasks is recorded; failed tasks are retried according to a RetryPolicy
 5.4
 - detect nested srun
 5.3.2
@@ -116,10 +141,18 @@ can be specified as kwarg to both Job and LauncherJob
 """
 
 import sys
+import asyncio
+import collections
+import concurrent.futures
 import copy
+import ctypes
+import ctypes.util
 from datetime import datetime
 import glob
 import functools
+import heapq
+import itertools
+import json
 import math
 import os
 try:
@@ -134,10 +167,14 @@ This run will now quit.
     sys.exit(0)
 import random
 import re
+import selectors
 import stat
+import shlex
 import shutil
 import stat
+import struct
 import subprocess
+import threading
 import time
 import typing
 from typing import Any, Optional, TypedDict
@@ -159,8 +196,14 @@ def MakeDebugtracefile(launcherdir):
     debugtracefile = open(launcherdir+"/debugtracefile","w",1)
 runtime = float(time.time())
 def DebugTraceMsg(msg,sw=False,prefix=""):
+    """Print a trace message if the switch is on.
+    The message can be a callable that returns a string: use this for
+    messages that are expensive to construct, since it is only called
+    when the message is actually printed."""
     global runtime,debugtracefile
     if not sw: return
+    if callable(msg):
+        msg = msg()
     if msg[0]=="\n":
         print
         msg = msg[1:]
@@ -172,9 +215,10 @@ def DebugTraceMsg(msg,sw=False,prefix=""):
         longprefix = len(longprefix)*" "
     if debugtracefile is not None:
         debugtracefile.write(msg+"\n")
-        os.fsync()
+        debugtracefile.flush()
+        os.fsync(debugtracefile.fileno())
 def CloseDebugtracefile():
-    close(debugtracefile)
+    debugtracefile.close()
 
 randomid = 10
 def RandomID() -> int:
@@ -271,23 +315,110 @@ def SingleSleepCommand(t,**kwargs):
     tmin = kwargs.pop("tmin",1)
     return SleepCommandGenerator(nmax=1,tmax=t,tmin=tmin).next()
 
+class TaskOptions():
+    """The options of a commandline that are rarely given, and the state of its task
+    that is rarely different from the default. Commandlines and Tasks
+    have an ``options`` member that is None as long as all of these have their default,
+    and that is shared between a Commandline and the Task that is made from it.
+    The members can be accessed on the Commandline or Task, see ``TaskOption``.
+    """
+    __slots__ = ("priority","queue","name","after","retries","attempt","exitstatus","predicted")
+    def __init__(self) -> None :
+        self.priority : int = 0
+        self.queue : str = ""
+        self.name : str = ""
+        self.after : tuple[str,...] = ()
+        self.retries : Optional[int] = None
+        self.attempt : int = 1
+        self.exitstatus : Optional[int] = None
+        self.predicted : Optional[float] = None
+
+default_task_options = TaskOptions()
+
+class TaskOption():
+    """An attribute of a Commandline or Task that is stored in its ``TaskOptions``;
+    setting it to a non-default value creates that options object."""
+    def __set_name__(self,owner,name : str) -> None :
+        self.name = name
+    def __get__(self,obj,owner=None):
+        if obj is None:
+            return self
+        options = obj.options
+        return getattr( default_task_options if options is None else options,self.name )
+    def __set__(self,obj,value) -> None :
+        if obj.options is None:
+            if value==getattr(default_task_options,self.name):
+                return
+            obj.options = TaskOptions()
+        setattr(obj.options,self.name,value)
+
 class Commandline():
-    """A Commandline is basically a dict containing at least the following members:
+    """A Commandline behaves like a dict containing the following members:
 
     * command : a unix commandline
     * cores : an integer core count
+    * priority : an integer priority, higher is started earlier (default 0)
+    * queue : the name of the sub-queue for fair share scheduling (default empty)
+    * name : a name that later commandlines can refer to in their ``after`` (default empty)
+    * after : a tuple of names of earlier commandlines that have to complete first;
+      this can also be given as a string with names separated by a plus sign
+    * retries : how often the command is run again if it fails, see ``RetryPolicy``
+      (default None: as set by the job)
+
+    These are stored as slots, since there can be millions of these objects;
+    all but the command and core count are kept in a ``TaskOptions`` object,
+    which is only created for commandlines that have any of them.
     """
+    __slots__ = ("command","cores","options")
+    priority = TaskOption(); queue = TaskOption(); name = TaskOption()
+    after = TaskOption(); retries = TaskOption()
     def __init__(self,command,**kwargs) -> None :
-        self.data : dict[str,int] = {'command':command,'cores':1}
-        self.data["cores"] = kwargs.pop("cores",1)
+        self.command : str = command
+        self.cores : int = kwargs.pop("cores",1)
+        self.options : Optional[TaskOptions] = None
+        self.priority = int( kwargs.pop("priority",0) )
+        self.queue = kwargs.pop("queue","")
+        self.name = kwargs.pop("name","")
+        after = kwargs.pop("after",())
+        if isinstance(after,str):
+            after = [ a.strip() for a in after.split("+") ]
+        self.after = tuple( [ a for a in after if a ] )
+        retries = kwargs.pop("retries",None)
+        self.retries = None if retries is None else int(retries)
     def __getitem__(self,ind):
-        return self.data[ind]
+        if ind=="command":
+            return self.command
+        elif ind=="cores":
+            return self.cores
+        elif ind in commandline_option_names:
+            return getattr(self,ind)
+        else: raise KeyError(ind)
     def __str__(self) -> str:
         command : str = self["command"]
         cores : int = self["cores"]
         r : str = f"command=<<{command}>>, cores={cores}"
         return r
 
+commandline_option_names = [ "priority","queue","name","after","retries" ]
+# an options prefix has to be exactly of this form; anything else,
+# such as a bash brace group ``{ echo a; echo b; } > x``, is an ordinary command
+commandline_option = "(?:%s)=[^,}]*" % "|".join(commandline_option_names)
+commandline_options_prefix = re.compile( r'^\{\s*%s(?:,\s*%s)*\}\s' % (commandline_option,commandline_option) )
+
+def commandline_options(line : str) -> tuple[dict[str,str],str] :
+    """Split a commandline with an options prefix, as in
+    ``{priority=5,queue=alice} ./my_program`` or ``{name=post,after=sim1+sim2} ./postprocess``,
+    into a dict of options and the command.
+    A line without such a prefix gives an empty dict, and the line unaltered."""
+    if not line.startswith("{") or not commandline_options_prefix.match(line):
+        return {},line
+    close = line.index("}")
+    options : dict[str,str] = {}
+    for option in line[1:close].split(","):
+        key,value = [ o.strip() for o in option.split("=",1) ]
+        options[key] = value
+    return options,line[close+1:].strip()
+
 class CommandlineGenerator():
     """An iteratable class that generates a stream of ``Commandline`` objects.
 
@@ -308,7 +439,8 @@ class CommandlineGenerator():
             kwargs.pop("cores")
             raise LauncherException( "Commandline generator should not have cores option" )
         except: pass
-        self.list : list[Commandline] = [ e for e in kwargs.pop("list",[]) ]
+        self.list : collections.deque[Commandline] = \
+            collections.deque( kwargs.pop("list",[]) )
         self.ncommands = len(self.list); self.njobs = 0; self.stopped = False
         nmax = kwargs.pop("nmax",None)
         if nmax is None:
@@ -319,6 +451,9 @@ class CommandlineGenerator():
         debugs = kwargs.get("debug","")
         self.debug = re.search("command",debugs)
         self._exhausted = True # basic generators are a priori finished
+        # names of commandlines that completed in an earlier run, see ``StateFileCommandlineGenerator``
+        self.completed_names : set[str] = set()
+        self.update_stopping()
     def finish(self):
         """Tell the generator to stop after the commands list is depleted"""
         DebugTraceMsg("declaring the commandline generator to be finished",
@@ -331,27 +466,33 @@ class CommandlineGenerator():
         DebugTraceMsg("gettingthe commandline generator to abort",
                       self.debug,prefix="Cmd ")
         self.stopped = True
+        self.update_stopping()
     def next(self) -> Commandline :
         """Produce the next Commandline object, or raise various errors"""
         if self.stopping() or self.stalling():
             raise LauncherException( "Should not call next when stopping or stalling" )
         if len(self.list)>0:
-            j = self.list[0]; self.list = self.list[1:]
-            DebugTraceMsg( f"Popping command off list <<{str(j)}>>",
+            j = self.list.popleft()
+            DebugTraceMsg( lambda : f"Popping command off list <<{str(j)}>>",
                            self.debug,prefix="Cmd ")
             self.njobs += 1
+            self.update_stopping()
             return j
         else:
             raise LauncherException( f"Impossible case <<{str(self)}>>" )
     def exhausted(self) -> bool :
         return self._exhausted and len(self.list)==0
-    def stopping(self) -> bool :
-        return self.stopped \
+    def update_stopping(self) -> None :
+        """Recompute the stopping condition; this needs to be called
+        whenever the list, the job count, or the stopped flag changes."""
+        self._stopping = self.stopped \
             or ( ( len(self.list)==0 and self.nmax!=0 ) or \
                  ( self.nmax>0 and self.njobs==self.nmax ) ) 
+    def stopping(self) -> bool :
+        return self._stopping
     def stalling(self) -> bool :
         # not any of the "next" cases
-        return not ( self.stopping() ) \
+        return not ( self._stopping ) \
             and not ( len(self.list)>0 )
     def __iter__(self): return self
     def __len__(self): return len(self.list)
@@ -370,6 +511,9 @@ class FileCommandlineGenerator(CommandlineGenerator):
 
     * cores=='file' means the file has << count,command >> lines
     * if the file has core counts, but you don't specify the 'file' value, they are ignored.
+    * a line can start with options, as in ``{priority=5,queue=alice}`` or ``{name=sim1}``
+      and ``{after=sim1+sim2}``, see ``commandline_options`` and ``TaskGenerator``;
+      for a block of lines, see the ``schedule`` parameter, the options of the first line are used.
 
     :param filename: (required) name of the file with commandlines
     :param cores: (keyword, default 1) core count to be used for all commands
@@ -378,48 +522,59 @@ class FileCommandlineGenerator(CommandlineGenerator):
     def __init__(self,filename,**kwargs) -> None :
         debugs = kwargs.get("debug","")
         self.debug = re.search("command",debugs) or re.search("cmd",debugs)
+        core_spec,cores = self.core_spec_from_kwargs(kwargs)
+        self.schedule = kwargs.get("schedule","default")
+        with open(filename) as file:
+            commandlist : list[Commandline] = \
+                list( self.parse_commandlines(file,core_spec,cores) )
+        CommandlineGenerator.__init__(self,list=commandlist,**kwargs)
+    def core_spec_from_kwargs(self,kwargs) -> tuple[str,Optional[int]] :
+        # pop the cores option, and turn it into a number unless it is "file"
         core_spec : str = kwargs.pop("cores","1")
+        cores : Optional[int] = None
         if core_spec=="node":
-            cores : int = kwargs.pop("corespernode")
+            cores = kwargs.pop("corespernode")
         elif not core_spec=="file":
             try:
                 cores = int( core_spec )
             except:
                 raise LauncherException( f"Strange core spec: <<{core_spec}>>" )
-        file = open(filename)
-        self.schedule = kwargs.get("schedule","default")
-        commandlist : list[Commandline] = []
+        return core_spec,cores
+    def parse_commandlines(self,lines,core_spec,cores) -> typing.Iterator[Commandline] :
+        """Turn an iterable of file lines into Commandline objects:
+        skip blank and comment lines, parse core counts, substitute macros,
+        and join blocks of lines as given by the schedule."""
         blocksize = self.blocksize_from_schedule()
         DebugTraceMsg( f"using blocksize {blocksize}",self.debug,prefix="Cmd ")
-        lines : list[str] = \
-            [ line for line in [ line.strip() for line in file.readlines() ]
-              # skip blank and comment lines
-              if not ( re.match('^ *#',line) or re.match('^ *$',line) ) ]
-        blockcount = 1
-        # count tasks in the commandline file
-        for linecount,line in enumerate(lines): 
+        block : list[str] = []
+        linecount = 0
+        for line in lines:
+            line = line.strip()
+            # skip blank and comment lines
+            if not line or line[0]=="#":
+                continue
+            # parse options
+            lineoptions,line = commandline_options( line )
+            if len(block)==0:
+                options = lineoptions
             # parse core count
             if core_spec=="file":
                 cores,line = self.coreline_split( line )
             # substitute macros
-            line = self.tid_substitute( line,linecount )
-            # construct total line
-            if blockcount==1:
-                total_line = line
-            else: total_line += " && " + line
-            if blockcount<blocksize and linecount<len(lines)-1:
-                # if the block is not full, and there are more lines,
-                # read the next line
-                blockcount += 1
-                continue
-            # if block is full, or `lines' is empty, ship out
-            DebugTraceMsg( f"append command <<{total_line}>> on {cores} cores", 
-                           self.debug,prefix="Cmd " )
-            commandlist.append( Commandline(total_line,cores=cores) )
-            # reset for the next block
-            blockcount = 1
-            total_line = ""
-        CommandlineGenerator.__init__(self,list=commandlist,**kwargs)
+            block.append( self.tid_substitute( line,linecount ) )
+            linecount += 1
+            # if block is full, ship out
+            if len(block)==blocksize:
+                yield self.block_commandline( block,cores,options )
+                block = []
+        # ship out the last partial block
+        if len(block)>0:
+            yield self.block_commandline( block,cores,options )
+    def block_commandline(self,block,cores,options={}) -> Commandline :
+        total_line = " && ".join(block)
+        DebugTraceMsg( lambda : f"append command <<{total_line}>> on {cores} cores", 
+                       self.debug,prefix="Cmd " )
+        return Commandline(total_line,cores=cores,**options)
     def blocksize_from_schedule(self):
         schedule = self.schedule
         if schedule=="default":
@@ -442,50 +597,94 @@ class FileCommandlineGenerator(CommandlineGenerator):
                 (f"Can not parse line as having a core prefix: <<{line}>>")
         return cores,line
     def tid_substitute( self,line,count ):
-        line = re.sub("PYL_ID",str(count),line)
-        line = re.sub("PYLTID",str(count),line)
+        line = line.replace("PYL_ID",str(count))
+        line = line.replace("PYLTID",str(count))
         return line
 
+class StreamingFileCommandlineGenerator(FileCommandlineGenerator):
+    """A generator for commandline files that reads the file lazily,
+    so that tasks can be started before a large file has been read.
+    Lines are parsed as in ``FileCommandlineGenerator``.
+
+    The number of commands is only known once the end of the file is reached:
+    until then ``total`` returns None and ``len`` raises an exception.
+
+    :param filename: (required) name of the file with commandlines
+    :param cores: (keyword, default 1) core count to be used for all commands
+    :param corespernode: only needed if cores="node"
+    :param streamchunk: (keyword, default 1000) number of commands parsed at a time
+    """
+    def __init__(self,filename,**kwargs) -> None :
+        debugs = kwargs.get("debug","")
+        self.debug = re.search("command",debugs) or re.search("cmd",debugs)
+        core_spec,cores = self.core_spec_from_kwargs(kwargs)
+        self.schedule = kwargs.get("schedule","default")
+        self.chunk = int( kwargs.pop("streamchunk",1000) )
+        self.file = open(filename)
+        self.source = self.parse_commandlines(self.file,core_spec,cores)
+        self.eof = False
+        CommandlineGenerator.__init__(self,nmax=0,**kwargs)
+    def fill(self) -> None :
+        """Parse the next chunk of commands from the file"""
+        if self.eof: return
+        self.list.extend( itertools.islice(self.source,self.chunk) )
+        DebugTraceMsg( lambda : f"read {len(self.list)} commands from file",
+                       self.debug,prefix="Cmd ")
+        if len(self.list)<self.chunk:
+            self.eof = True; self.file.close()
+            self.ncommands = self.njobs+len(self.list)
+    def update_stopping(self) -> None :
+        # only read more when the buffered commands are used up
+        if len(self.list)==0:
+            self.fill()
+        self._stopping = self.stopped or ( self.eof and len(self.list)==0 )
+    def exhausted(self) -> bool :
+        return self.eof and len(self.list)==0
+    def total(self) -> Optional[int] :
+        """Total number of commands in the file, or None if not yet known"""
+        return self.ncommands if self.eof else None
+    def __len__(self):
+        if not self.eof:
+            raise LauncherException( "Number of commands unknown before end of file" )
+        return len(self.list)
+    def __bool__(self) -> bool :
+        return not self.exhausted()
+
 class StateFileCommandlineGenerator(CommandlineGenerator):
-    """A generator for the lines in a queuestate restart file.
-    Otherwise this has all the code of the FileCommandlineGenerator.
-    Ugly.
+    """A generator for the lines in a queuestate restart file:
+    the queued and running tasks are redone, in their original order, completed tasks are skipped.
+    The file can be a queuestate snapshot, which is combined with the journal
+    next to it if there is one, or a journal by itself; see ``read_queuestate``.
+
+    The names of completed tasks are kept, so that redone tasks
+    that come ``after`` them do not wait for them.
     """
     def __init__(self,filename,**kwargs) -> None :
         cores = kwargs.pop("cores",1)
         dependencies = kwargs.pop("dependencies",False)
-        file = open(filename); commandlist = []
-        count = 0; skipping = False
-        for line in file.readlines():
-            line = line.strip()
-            if re.match('^ *#',line) or re.match('^ *$',line):
-                continue # skip blank and comment
+        commandlist = []
+        completed_names : set[str] = set()
+        for taskid,state,line in sorted( read_queuestate(filename) ):
+            options,line = commandline_options(line)
             # skip completed lines, include running and queued
-            if re.match("running",line):
-                skipping = False; continue
-            elif re.match("queued",line):
-                skipping = False; continue
-            elif re.match("completed",line):
-                skipping = True; continue
-            if skipping:
+            if state=="completed":
+                if "name" in options:
+                    completed_names.add( options["name"] )
                 continue
-            # make commandline from all lines that are not skipped
-            line = line.split(":",1)[1]
             split = line.split(",",1)
             if len(split)==1:
                 c = cores; l = split[0]
             else:
                 c,l = split
-                td = str(count)
             if cores=="file":
                 if not re.match("[0-9]+",c):
                     raise LauncherException \
                         ("First field <<%s>> is not a core count; line:\n<<%s>>" % (c,line) )
             else:
                 c = cores
-            commandlist.append( Commandline(l,cores=c) )
-            count += 1
+            commandlist.append( Commandline(l,cores=c,**options) )
         CommandlineGenerator.__init__(self,list=commandlist,**kwargs)
+        self.completed_names = completed_names
 
 class DynamicCommandlineGenerator(CommandlineGenerator):
     """A CommandlineGenerator with an extra method:
@@ -499,18 +698,31 @@ class DynamicCommandlineGenerator(CommandlineGenerator):
             nmax = kwargs.pop("nmax")
             raise LauncherException("Dynamic launcher can not have nmax specification")
         except: pass
+        # derived classes can have set the core count already
+        self.cores = kwargs.pop("cores",getattr(self,"cores",1))
         CommandlineGenerator.__init__(self,nmax=0,**kwargs)
         self._exhausted = False # this one needs to be finished explicitly
         self.n_append = 0
-    def append(self,commandline):
-        """Append a unix command to the internal structure of the generator"""
+    def append(self,commandline,**kwargs):
+        """Append a unix command to the internal structure of the generator
+
+        :param priority: (keyword, optional, default 0) priority of the command
+        :param queue: (keyword, optional) name of the sub-queue of the command
+        :param name: (keyword, optional) name of the command, for use in ``after``
+        :param after: (keyword, optional) list of names of earlier commands that have to complete first
+        :param retries: (keyword, optional) how often the command is run again if it fails, see ``RetryPolicy``
+        """
         if self._exhausted:
             raise LauncherException("Should not append commands after declaring finished")
-        commandobj = Commandline(commandline,cores=self.cores)
-        DebugTraceMsg("appending to command list <<%s>>" % str(commandobj),
+        commandobj = Commandline(commandline,cores=self.cores,
+                                 priority=kwargs.pop("priority",0),queue=kwargs.pop("queue",""),
+                                 name=kwargs.pop("name",""),after=kwargs.pop("after",()),
+                                 retries=kwargs.pop("retries",None))
+        DebugTraceMsg(lambda : "appending to command list <<%s>>" % str(commandobj),
                       self.debug,prefix="Cmd ")
         command_no = self.ncommands
         self.list.append( commandobj ); self.ncommands += 1
+        self.update_stopping()
         # do we ever use this return?
         return command_no
 
@@ -596,6 +808,49 @@ def MakeRandomSleepFile(fn,ncommand,**kwargs):
         (fn,ncommand,generator=SleepCommandGenerator(nmax=ncommand,tmax=tmax,tmin=tmin),
          **kwargs)
 
+class WorkdirLayout():
+    """Where the small files of tasks, such as ``out1234`` and ``expire1234``,
+    go in a work directory:
+
+    * ``sharded``: in a subdirectory per kind of file, and below that by ranges of the number,
+      as in ``workdir/out/000/001/out1234``, so that no directory has more than ``shardsize`` entries
+    * ``flat``: directly in the work directory, as in ``workdir/out1234``
+
+    The layout of a work directory is found with ``workdir_layout``, so that
+    executors, completions, and cleanup all use the same names.
+
+    :param layout: (optional, default ``sharded``) one of the above
+    """
+    layouts = [ "sharded","flat" ]
+    shardsize = 1000
+    def __init__(self,layout="sharded") -> None :
+        if layout not in WorkdirLayout.layouts:
+            raise LauncherException( f"Unknown workdir layout <<{layout}>>, "
+                                     f"should be one of {WorkdirLayout.layouts}" )
+        self.layout = layout
+    def directory(self,workdir,kind,number) -> str :
+        """The directory of file number ``number`` of some kind"""
+        if self.layout=="flat":
+            return workdir
+        shard = WorkdirLayout.shardsize
+        return f"{workdir}/{kind}/{number//(shard*shard):03d}/{number//shard%shard:03d}"
+    def filename(self,workdir,kind,number) -> str :
+        """The full name of file number ``number`` of some kind;
+        use ``make_stamp_directory`` to make sure its directory exists"""
+        return f"{self.directory(workdir,kind,number)}/{kind}{number}"
+
+workdir_layouts : dict[str,WorkdirLayout] = {}
+def workdir_layout(workdir,layout=None) -> WorkdirLayout :
+    """Return the layout of a work directory. This is set when ``layout`` is given,
+    typically by a launcher, executor, or task generator option;
+    otherwise it is the one set before, or ``sharded`` by default."""
+    key = os.path.abspath(workdir)
+    if layout is not None:
+        workdir_layouts[key] = WorkdirLayout(layout)
+    elif key not in workdir_layouts:
+        workdir_layouts[key] = WorkdirLayout()
+    return workdir_layouts[key]
+
 class Completion():
     """Define a completion object for a task. 
 
@@ -621,33 +876,53 @@ class Completion():
                       self.debug,prefix="Task")
         return ( self.taskmaxruntime>0
                  and curtime-self.starttime>self.taskmaxruntime )
+    def exit_status(self) -> Optional[int] :
+        """The exit status of a completed task, or None if that is not known;
+        the default is not known"""
+        return None
+    def cleanup(self):
+        """Remove whatever the completion left behind; default is nothing"""
+        return
+    def clear(self):
+        """Remove whatever the completion left behind right away,
+        so that the task can be run again; default is the same as ``cleanup``"""
+        self.cleanup()
 
 class WrapCompletion(Completion):
     """WrapCompletion is the most common type of completion. It appends
     to a command the creation of a zero size file with a unique name.
     The completion test then tests for the existence of that file.
+    If the command fails, its exit status is first written to a file,
+    see ``failname``; that is only read for completed tasks.
 
     :param taskid: (keyword, required) this has to be unique. Unfortunately we can not test for that.
+
+    The stamp files are placed according to the ``WorkdirLayout`` of the workdir.
     """
     def __init__(self,**kwargs) -> None :
         Completion.__init__(self,**kwargs)
+        self.layout = workdir_layout(self.workdir)
+        self.stamped = False
+        self.status : Optional[int] = None
     def stampname(self):
         """Internal function that gives the name of the stamp file,
         including directory path"""
-        return "%s/%s%s" % (self.workdir,"expire",str(self.taskid))
-    def successname(self):
-        """Internal function that gives the name of the success file,
-        including directory path"""
-        return "%s/%s%s" % (self.workdir,"success",str(self.taskid))
+        return self.layout.filename(self.workdir,"expire",self.taskid)
+    def failname(self):
+        """Internal function that gives the name of the file with the exit status
+        of a failed command; this is next to the stamp file, so that it is seen
+        by the same ``StampWatcher``"""
+        return f"{self.layout.directory(self.workdir,'expire',self.taskid)}/failed{self.taskid}"
     def attach(self,txt):
-        """Append a 'touch' command to the txt argument"""
-        os.system("mkdir -p %s" % self.workdir)
+        """Append a 'touch' command to the txt argument,
+        preceded by writing the exit status if that is nonzero"""
+        make_stamp_directory( self.layout.directory(self.workdir,"expire",self.taskid) )
         if re.match('^[ \t]*$',txt):
             # when is txt empty?
             command_with_stamp = f"touch {self.stampname()}"
         else:
             command_with_stamp = \
-                f"( {txt} ) && touch {self.successname()} ; touch {self.stampname()}"
+                f"( {txt} ) || echo $? > {self.failname()} ; touch {self.stampname()}"
         return command_with_stamp
     def test(self,curtime : float ) -> bool :
         """Test for the existence of the stamp file"""
@@ -658,11 +933,288 @@ class WrapCompletion(Completion):
             stampfile = self.stampname()
             stamptest = os.path.isfile(stampfile)
             if stamptest:
-                DebugTraceMsg(f"stamp file <<{stampfile}>> detected",
+                DebugTraceMsg(lambda : f"stamp file <<{stampfile}>> detected",
                               self.debug,prefix="Task")
+                self.stamped = True
             return stamptest
+    def failed(self) -> bool :
+        """Test whether the command of a stamped task left a file with its exit status"""
+        return os.path.isfile(self.failname())
+    def exit_status(self) -> Optional[int] :
+        """The exit status of a task whose stamp was seen: zero,
+        or the value written to the ``failname`` file"""
+        if not self.stamped:
+            return None
+        if self.status is None:
+            self.status = 0
+            if self.failed():
+                try:
+                    with open(self.failname()) as failfile:
+                        self.status = int( failfile.read() )
+                except (OSError,ValueError):
+                    self.status = None
+        return self.status
+    def cleanup(self):
+        """Remove the stamp file, and the exit status file if there is one, in the background;
+        the exit status may not have been read, so both are always removed"""
+        stamp_cleaner().remove( [ self.stampname(),self.failname() ] )
+    def clear(self):
+        """Remove the stamp and exit status files right away"""
+        for name in [ self.stampname(),self.failname() ]:
+            try:
+                os.remove(name)
+            except FileNotFoundError: pass
+
+##
+## The stamp directory is made once, rather than with a ``mkdir -p`` for every task,
+## and stamps are removed in batches in a background thread.
+##
+stamp_directories : set[str] = set()
+def make_stamp_directory(directory) -> None :
+    """Create a directory for stamp or output files, if this was not done before"""
+    key = os.path.abspath(directory)
+    if key not in stamp_directories:
+        os.makedirs(key,exist_ok=True)
+        stamp_directories.add(key)
+def forget_stamp_directory(directory) -> None :
+    """Forget that a directory was created, for instance because it was removed"""
+    stamp_directories.discard( os.path.abspath(directory) )
+
+class StampCleaner():
+    """Remove files in a background thread, so that the launcher does not wait
+    for the file system, and does not start a shell for every file.
+    Files are queued by ``remove``, and each time the thread wakes up
+    it removes everything queued so far in one batch.
+    """
+    def __init__(self,**kwargs) -> None :
+        self.debug = re.search("task",kwargs.get("debug",""))
+        self.pending : list[str] = []
+        self.queued = 0; self.removed = 0; self.batches = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run,daemon=True)
+        self.thread.start()
+    def remove(self,filenames : list[str]) -> None :
+        """Queue files for removal"""
+        with self.condition:
+            self.pending.extend(filenames); self.queued += len(filenames)
+            self.condition.notify_all()
+    def run(self) -> None :
+        while True:
+            with self.condition:
+                while len(self.pending)==0:
+                    self.condition.wait()
+                batch = self.pending; self.pending = []
+            for filename in batch:
+                try:
+                    os.unlink(filename)
+                except OSError:
+                    pass
+            DebugTraceMsg( lambda : f"removed batch of {len(batch)} stamp files",
+                           self.debug,prefix="Task")
+            with self.condition:
+                self.removed += len(batch); self.batches += 1
+                self.condition.notify_all()
+    def flush(self) -> None :
+        """Wait until all queued files have been removed"""
+        with self.condition:
+            while self.removed<self.queued:
+                self.condition.wait()
+
+the_stamp_cleaner : Optional[StampCleaner] = None
+def stamp_cleaner() -> StampCleaner :
+    """Return the stamp cleaner, starting its thread if needed"""
+    global the_stamp_cleaner
+    if the_stamp_cleaner is None:
+        the_stamp_cleaner = StampCleaner()
+    return the_stamp_cleaner
+def flush_stamp_cleaner() -> None :
+    """Wait for the stamp cleaner, if there is one, to finish"""
+    if the_stamp_cleaner is not None:
+        the_stamp_cleaner.flush()
+
+##
+## Stamp watching: instead of testing for the stamp file of each running task,
+## keep a set of stamp files that have appeared in the workdir.
+##
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_Q_OVERFLOW  = 0x00004000
+def inotify_open() -> Optional[int] :
+    """Open an inotify file descriptor.
+    Returns None if inotify is not available on this system."""
+    try:
+        libc = ctypes.CDLL( ctypes.util.find_library("c") or "libc.so.6",use_errno=True )
+        fd = libc.inotify_init1( os.O_NONBLOCK|os.O_CLOEXEC )
+        if fd<0: return None
+        return fd
+    except (OSError,AttributeError):
+        return None
+def inotify_add(fd,directory) -> bool :
+    """Watch one more directory for new files on an inotify file descriptor;
+    returns False if that fails, for instance because of the limit on the number of watches."""
+    try:
+        libc = ctypes.CDLL( ctypes.util.find_library("c") or "libc.so.6",use_errno=True )
+        wd = libc.inotify_add_watch\
+            ( fd,os.fsencode(directory),IN_CREATE|IN_MOVED_TO|IN_CLOSE_WRITE )
+        return wd>=0
+    except (OSError,AttributeError):
+        return False
+
+class StampWatcher():
+    """Keep track of the stamp files that appear in the stamp directories of a workdir;
+    with the sharded ``WorkdirLayout`` these are a number of subdirectories.
+    The completion test of a task is then a lookup in an in-memory set,
+    rather than a file system access per task.
+
+    :param directory: (required) the workdir; the directories where the stamps appear are added with ``watch``
+    :param method: (keyword, optional, default ``inotify``) either ``inotify``, or ``scandir`` for one listing per completion scan of the directories where stamps are expected. If inotify is not available, the scandir method is used.
+    :param stamproot: (keyword, optional, default ``expire``) only files starting with this are recorded
+    :param failroot: (keyword, optional, default ``failed``) files starting with this are also recorded, see ``WrapCompletion.failname``
+
+    Note: inotify only sees files created by processes on this host.
+    For tasks on other nodes of a shared file system, use ``scandir``.
+    """
+    def __init__(self,directory,**kwargs) -> None :
+        self.directory = directory
+        self.stamproot = kwargs.pop("stamproot","expire")
+        self.roots = ( self.stamproot,kwargs.pop("failroot","failed") )
+        self.method = kwargs.pop("method","inotify")
+        self.debug = re.search("task",kwargs.get("debug",""))
+        self.stamps : set[str] = set()
+        # watched directories, with the number of stamps still expected there
+        self.directories : dict[str,int] = {}
+        self.fd : Optional[int] = None
+        if self.method=="inotify":
+            self.fd = inotify_open()
+            if self.fd is None:
+                self.use_scandir()
+        elif self.method!="scandir":
+            raise LauncherException( f"Unknown stamp watch method <<{self.method}>>" )
+    def use_scandir(self) -> None :
+        DebugTraceMsg( f"no inotify available for <<{self.directory}>>, using scandir",
+                       self.debug,prefix="Task")
+        self.close(); self.method = "scandir"
+    def watch(self,directory) -> None :
+        """Expect one more stamp in a directory, and start watching it if needed"""
+        if directory not in self.directories:
+            self.directories[directory] = 0
+            if self.fd is not None and not inotify_add(self.fd,directory):
+                self.use_scandir()
+            # catch anything that was there before the watch started
+            self.resync(directory)
+        self.directories[directory] += 1
+    def refresh(self) -> None :
+        """Bring the set of seen stamps up to date"""
+        if self.fd is None:
+            self.resync(); return
+        while True:
+            try:
+                events = os.read(self.fd,65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset<len(events):
+                wd,mask,cookie,namelen = struct.unpack_from("iIII",events,offset)
+                offset += 16
+                name = events[offset:offset+namelen].rstrip(b"\0").decode()
+                offset += namelen
+                if mask & IN_Q_OVERFLOW:
+                    self.resync()
+                elif name.startswith(self.roots):
+                    self.stamps.add(name)
+    def resync(self,directory=None) -> None :
+        """List one directory, or else all directories where stamps are still expected"""
+        if directory is None:
+            directories = [ d for d,expected in self.directories.items() if expected>0 ]
+        else: directories = [ directory ]
+        for d in directories:
+            try:
+                with os.scandir(d) as entries:
+                    for e in entries:
+                        if e.name.startswith(self.roots):
+                            self.stamps.add(e.name)
+            except FileNotFoundError:
+                pass
+    def seen(self,name) -> bool :
+        return name in self.stamps
+    def forget(self,name,directory=None) -> None :
+        """Forget a stamp, and, if its directory is given, expect one stamp less there"""
+        self.stamps.discard(name)
+        if directory in self.directories:
+            self.directories[directory] -= 1
+    def close(self) -> None :
+        if self.fd is not None:
+            os.close(self.fd); self.fd = None
+
+stamp_watchers : dict[str,StampWatcher] = {}
+def stamp_watcher(directory,**kwargs) -> StampWatcher :
+    """Return the watcher for a directory, creating it if needed.
+    There is one watcher per directory, shared by all tasks."""
+    key = os.path.abspath(directory)
+    if key not in stamp_watchers:
+        stamp_watchers[key] = StampWatcher(key,**kwargs)
+    return stamp_watchers[key]
+def refresh_stamp_watchers() -> None :
+    """Update all stamp watchers; this is done once per completion scan"""
+    for w in stamp_watchers.values():
+        w.refresh()
+
+class WatchedCompletion(WrapCompletion):
+    """A WrapCompletion that uses the same stamp files,
+    but detects them through a ``StampWatcher`` on the workdir.
+    The derived class ``ScandirCompletion`` forces the scandir method.
+    """
+    watchmethod = "inotify"
+    def __init__(self,**kwargs) -> None :
+        WrapCompletion.__init__(self,**kwargs)
+        self.watcher : Optional[StampWatcher] = None
+    def attach(self,txt):
+        """Attach the stamp as in WrapCompletion, and make sure the stamp directory is watched"""
+        command_with_stamp = WrapCompletion.attach(self,txt)
+        self.watcher = stamp_watcher(self.workdir,method=self.watchmethod)
+        self.watcher.watch( self.layout.directory(self.workdir,"expire",self.taskid) )
+        return command_with_stamp
+    def test(self,curtime : float ) -> bool :
+        """Test for the stamp file in the set of stamps seen"""
+        if Completion.test(self,curtime):
+            return True
+        stamptest = self.watcher is not None \
+            and self.watcher.seen( os.path.basename(self.stampname()) )
+        if stamptest:
+            DebugTraceMsg(lambda : f"stamp file <<{self.stampname()}>> seen",
+                          self.debug,prefix="Task")
+            self.stamped = True
+        return stamptest
+    def failed(self) -> bool :
+        """Look for the exit status file in the set of files seen"""
+        return self.watcher is not None \
+            and self.watcher.seen( os.path.basename(self.failname()) )
+    def forget(self):
+        if self.watcher is not None:
+            self.watcher.forget( os.path.basename(self.failname()) )
+            self.watcher.forget( os.path.basename(self.stampname()),
+                                 self.layout.directory(self.workdir,"expire",self.taskid) )
     def cleanup(self):
-        os.system("rm -f %s" % self.stampname())
+        WrapCompletion.cleanup(self)
+        self.forget()
+    def clear(self):
+        WrapCompletion.clear(self)
+        self.forget()
+
+class ScandirCompletion(WatchedCompletion):
+    watchmethod = "scandir"
+
+def WrapCompletionClass(stampwatch=None) -> Type[Completion] :
+    """Completion class for wrapped tasks, given the ``stampwatch`` option"""
+    if stampwatch is None or stampwatch=="stamp":
+        return WrapCompletion
+    elif stampwatch=="inotify":
+        return WatchedCompletion
+    elif stampwatch=="scandir":
+        return ScandirCompletion
+    else:
+        raise LauncherException( f"Unknown stampwatch value <<{stampwatch}>>" )
 
 class BareCompletion(Completion):
     """BareCompletion does not wrap, so it uses the default attach method,
@@ -673,25 +1225,64 @@ class BareCompletion(Completion):
     """
     def __init__(self,**kwargs) -> None :
         Completion.__init__(self,**kwargs)
+        self.layout = workdir_layout(self.workdir)
     def stampname(self):
         """Internal function that gives the name of the stamp file,
         including directory path"""
-        return "%s/%s%s" % (self.workdir,"expire",str(self.taskid))
+        return self.layout.filename(self.workdir,"expire",self.taskid)
     def test(self,**args):
         """Test for the existence of the stamp file"""
         stampfile = self.stampname()
         stamptest = os.path.isfile(stampfile)
         if stamptest:
-            DebugTraceMsg(f"stamp file <<{stampfile}>> detected",
+            DebugTraceMsg(lambda : f"stamp file <<{stampfile}>> detected",
                           self.debug,prefix="Task")
         return stamptest
     def cleanup(self):
-        os.system("rm -f %s" % self.stampname())
+        """Remove the stamp file, in the background"""
+        stamp_cleaner().remove( [ self.stampname() ] )
 
 class FileCompletion(Completion):
     def __init__(self,**kwargs):
         throw("Unimplemented completion type, needed in RandomSleepTask")
 
+class ExecutorCompletion(Completion):
+    """Completion for executors that report the exit of a task themselves,
+    such as the ``SSHAgentExecutor``. The command is not altered,
+    and the test asks the executor.
+
+    :param executor: (keyword, required) the Executor that runs the task
+    """
+    def __init__(self,**kwargs) -> None :
+        self.executor = kwargs.pop("executor")
+        Completion.__init__(self,**kwargs)
+    def test(self,curtime : float ) -> bool :
+        if Completion.test(self,curtime):
+            return True
+        return self.executor.has_exited(self.taskid)
+    def exit_status(self) -> Optional[int] :
+        return self.executor.exit_status(self.taskid)
+    def cleanup(self):
+        self.executor.forget_exit(self.taskid)
+
+class TaskSettings():
+    """The settings of a task that are the same for all tasks of a job,
+    such as its workdir. These are interned, see ``task_settings``,
+    so that each task only stores a reference."""
+    __slots__ = ("debug","workdir","taskmaxruntime","completionclass")
+    def __init__(self,debug : bool,workdir : Optional[str],
+                 taskmaxruntime : int,completionclass) -> None :
+        self.debug = debug
+        self.workdir = workdir
+        self.taskmaxruntime = taskmaxruntime
+        self.completionclass = completionclass
+
+@functools.lru_cache(maxsize=None)
+def task_settings(debug : bool,workdir : Optional[str],
+                  taskmaxruntime : int,completionclass) -> TaskSettings :
+    """The unique TaskSettings object with these values"""
+    return TaskSettings(debug,workdir,taskmaxruntime,completionclass)
+
 class Task():
     """A Task is an abstract object associated with a commandline
 
@@ -701,23 +1292,44 @@ class Task():
     :param linewrapper: (keyword, required)
     :param debug: (keyword, optional) string of debug keywords
     """
+    # there can be millions of queued tasks, so we do not give them a dict,
+    # and the rarely used members are kept in the options of the commandline
+    __slots__ = ( "settings","taskid","command","size","has_started","nodes",
+                  "starttick","starttime","locator","completion",
+                  "actual_command","runningtime","options", )
+    priority = TaskOption(); queue = TaskOption(); name = TaskOption()
+    after = TaskOption(); retries = TaskOption()
+    # failed tasks can be run again, see ``RetryPolicy``
+    attempt = TaskOption(); exitstatus = TaskOption()
+    # running time predicted from earlier runs, see ``RuntimeHistory``
+    predicted = TaskOption()
     def __init__(self,command : Commandline,**kwargs) -> None :
-        self.debugs = kwargs.get("debug","")
-        self.debug = re.search("task",self.debugs)
-        self.workdir = kwargs.pop("workdir",None)
-
         # instantiate a completion for this id.
         self.taskid : int = kwargs.pop("taskid")
-        self.taskmaxruntime : int = int( kwargs.pop("taskmaxruntime",0) )
-        self.completionclass = kwargs.pop("completionclass")
+        self.settings : TaskSettings = task_settings\
+            ( bool( re.search("task",kwargs.get("debug","")) ),kwargs.pop("workdir",None),
+              int( kwargs.pop("taskmaxruntime",0) ),kwargs.pop("completionclass") )
 
         self.command : str = command["command"]
         if re.search( r'\bsrun\b',self.command ):
             raise LauncherException(f"Detected nested parallelism using srun in line <<{self.command}>>")
         self.size : int = command["cores"]
+        self.options : Optional[TaskOptions] = command.options
         self.has_started = False
-        DebugTraceMsg("created task <<%s>>" % str(self),self.debug,prefix="Task")
+        DebugTraceMsg( lambda : "created task <<%s>>" % str(self),self.debug,prefix="Task")
         self.nodes = None
+    @property
+    def debug(self) -> bool :
+        return self.settings.debug
+    @property
+    def workdir(self) -> Optional[str] :
+        return self.settings.workdir
+    @property
+    def taskmaxruntime(self) -> int :
+        return self.settings.taskmaxruntime
+    @property
+    def completionclass(self):
+        return self.settings.completionclass
     def start_on_nodes(self,**kwargs) -> None :
         """Start the task.
 
@@ -726,21 +1338,36 @@ class Task():
         This sets ``self.startime`` to right before the execution begins. We do not keep track
         of the endtime, but instead set ``self.runningtime`` in the ``hasCompleted`` routine.
         """
-        self.starttick : int = int( kwargs.pop("starttick",0) )
-        self.starttime : float = time.time()
-        self.locator : Optional[HostLocator] = kwargs.pop("locator")
-        self.completion = self.completionclass\
-            (taskid=self.taskid,
-             starttime=self.starttime, taskmaxruntime=self.taskmaxruntime,
-             workdir=self.workdir)
-        wrapped,exec_prefix = self.line_with_completion()
+        wrapped,exec_prefix = self.prepare_start(**kwargs)
 
         # and here we go
         self.execute_on_pool(wrapped,prefix=exec_prefix)
+    def prepare_start(self,**kwargs) -> tuple[str,str] :
+        """Everything in ``start_on_nodes`` short of the actual execution:
+        set the locator and the completion object, and
+        return the commandline to execute and its prefix.
+        Same arguments as ``start_on_nodes``.
+        """
+        self.starttick : int = int( kwargs.pop("starttick",0) )
+        self.starttime : float = time.time()
+        self.locator : Optional[HostLocator] = kwargs.pop("locator")
+        commandexecutor = self.locator.pool.commandexecutor
+        if commandexecutor.reports_completion:
+            # the executor tells us when the task is done, no need for stamps
+            self.completion = ExecutorCompletion\
+                (taskid=self.taskid,executor=commandexecutor,
+                 starttime=self.starttime, taskmaxruntime=self.taskmaxruntime,
+                 workdir=self.workdir)
+        else:
+            self.completion = self.completionclass\
+                (taskid=self.taskid,
+                 starttime=self.starttime, taskmaxruntime=self.taskmaxruntime,
+                 workdir=self.workdir)
+        return self.line_with_completion()
     def execute_on_pool(self,line,prefix=""):
         """ Task.execute """
         DebugTraceMsg(
-            f"""starting task id={self.taskid} of size {self.size} on <<{str(self.locator)}>>
+            lambda : f"""starting task id={self.taskid} of size {self.size} on <<{str(self.locator)}>>
 in cwd=<<{os.getcwd()}>>
 prefix=<<{prefix}>>, cmd=<<{line}>>""",
             self.debug,prefix="Task")
@@ -748,7 +1375,17 @@ prefix=<<{prefix}>>, cmd=<<{line}>>""",
         commandexecutor = self.locator.pool.commandexecutor
         commandexecutor.execute(line,self.locator,id=self.taskid,prefix=prefix)
         self.has_started = True
-        DebugTraceMsg( f"started taskid={self.taskid}",self.debug,prefix="Task" )
+        DebugTraceMsg( lambda : f"started taskid={self.taskid}",self.debug,prefix="Task" )
+    async def aexecute_on_pool(self,line,prefix=""):
+        """Coroutine version of ``execute_on_pool``: the task counts as started
+        once the executor's ``aexecute`` returns."""
+        DebugTraceMsg( lambda : f"launching task id={self.taskid} of size {self.size} on <<{str(self.locator)}>>",
+                       self.debug,prefix="Task")
+        self.starttime = time.time()
+        commandexecutor = self.locator.pool.commandexecutor
+        await commandexecutor.aexecute(line,self.locator,id=self.taskid,prefix=prefix)
+        self.has_started = True
+        DebugTraceMsg( lambda : f"started taskid={self.taskid}",self.debug,prefix="Task" )
     def isRunning(self):
         return self.has_started
     def line_with_completion(self):
@@ -771,27 +1408,45 @@ prefix=<<{prefix}>>, cmd=<<{line}>>""",
         completed : bool = self.has_started and self.completion.test(0)
         self.runningtime : float = time.time()-self.starttime
         if completed:
-            DebugTraceMsg( f"completed taskid={self.taskid} in {self.runningtime:5.3f}",
+            DebugTraceMsg( lambda : f"completed taskid={self.taskid} in {self.runningtime:5.3f}",
                            self.debug,prefix="Task")
         return completed
+    def options_prefix(self) -> str :
+        """The options of this task in commandline syntax, see ``commandline_options``;
+        empty if they have default values"""
+        options = []
+        if self.priority!=0:
+            options.append( f"priority={self.priority}" )
+        if self.queue!="":
+            options.append( f"queue={self.queue}" )
+        if self.name!="":
+            options.append( f"name={self.name}" )
+        if len(self.after)>0:
+            options.append( "after="+"+".join(self.after) )
+        if self.retries is not None:
+            options.append( f"retries={self.retries}" )
+        return "{"+",".join(options)+"} " if len(options)>0 else ""
     def __repr__(self):
         s = f"Task id={self.taskid}, cmd=<<{self.command}>>, pool size={self.size}"
         return s
 
 class WrappedTask(Task):
+    __slots__ = ()
     def __init__(self,command : Commandline,**kwargs) -> None :
         # the command includes core count
-        Task.__init__(self,command,completionclass=WrapCompletion,**kwargs)
-        DebugTraceMsg(f"created wrapped task id={self.taskid}",self.debug,prefix="Task")
+        completionclass = kwargs.pop("completionclass",WrapCompletion)
+        Task.__init__(self,command,completionclass=completionclass,**kwargs)
+        DebugTraceMsg(lambda : f"created wrapped task id={self.taskid}",self.debug,prefix="Task")
 class BareTask(Task):
+    __slots__ = ()
     def __init__(self,command : Commandline,**kwargs) -> None :
         id = kwargs.get("taskid")
         debugs = kwargs.get("debug","")
         debug = re.search("task",debugs)
-        DebugTraceMsg(f"creating bare task id={id}",debug,prefix="Task")
+        DebugTraceMsg(lambda : f"creating bare task id={id}",debug,prefix="Task")
         # the kwargs include taskid
         Task.__init__(self,command,completionclass=BareCompletion,**kwargs)
-        DebugTraceMsg(f"created bare task id={self.taskid}",self.debug,prefix="Task")
+        DebugTraceMsg(lambda : f"created bare task id={self.taskid}",self.debug,prefix="Task")
     def line_with_completion(self):
         line = re.sub("PYL_ID",str(self.taskid),self.command)
         line = re.sub("PYLTID",str(self.taskid),line)
@@ -808,6 +1463,7 @@ class RandomSleepTask(Task):
     :param tmin: minimum running time (keyword, optional; default=1)
     :param completion: Completion object (keyword, optional; if you leave this unspecified, the next two parameters become relevant
     """
+    __slots__ = ()
     def __init__(self,**kwargs) -> None :
         if ( taskid := int(kwargs.pop("taskid",-1)) )<0:
             raise LauncherException("Need an explicit sleep task ID")
@@ -898,6 +1554,155 @@ class HostLocator():
     def __str__(self) -> str:
         return f"Locator: size={self.extent} offset={self.offset} <<{[ str(self[i]) for i in range(self.extent) ]}>>"
 
+class FreeSlotTree():
+    """Segment tree over the slots of a host pool, used to find
+    a run of consecutive free slots in logarithmic time.
+
+    For each segment we record the number of free slots at its
+    left end (``prefix``), at its right end (``suffix``), and
+    the longest free run anywhere in it (``best``).
+    Occupying and releasing a range are lazily propagated.
+
+    A run of free slots can be cut by walls, such as the boundaries between hosts:
+    then the runs that are found never contain a wall.
+
+    :param size: number of slots
+    :param walls: (optional) offsets of the slots where a run of free slots is cut off
+    """
+    def __init__(self,size : int,walls=()) -> None :
+        self.size = size
+        self.walls : set[int] = set( [ w for w in walls if 0<w<size ] )
+        tsize = 4*max(size,1)
+        self.prefix : list[int] = [0]*tsize
+        self.suffix : list[int] = [0]*tsize
+        self.best   : list[int] = [0]*tsize
+        self.lazy   : list[Optional[bool]] = [None]*tsize
+        if size>0 and len(self.walls)>0:
+            # the values of each segment when it is completely free
+            self.build(1,0,size)
+            self.freevalues = ( self.prefix[:],self.suffix[:],self.best[:] )
+        elif size>0:
+            self.set_range(1,0,size,True)
+    def build(self,node,lo,hi) -> None :
+        if hi-lo==1:
+            self.prefix[node] = self.suffix[node] = self.best[node] = 1
+            return
+        mid = (lo+hi)//2
+        self.build(2*node,lo,mid); self.build(2*node+1,mid,hi)
+        self.pull(node,lo,hi)
+    def set_range(self,node,lo,hi,free : bool) -> None :
+        # set a whole segment to free or occupied
+        if free and len(self.walls)>0:
+            prefix,suffix,best = self.freevalues
+            self.prefix[node] = prefix[node]; self.suffix[node] = suffix[node]
+            self.best[node] = best[node]
+        else:
+            length = hi-lo if free else 0
+            self.prefix[node] = self.suffix[node] = self.best[node] = length
+        self.lazy[node] = free
+    def push(self,node,lo,hi) -> None :
+        if self.lazy[node] is not None and hi-lo>1:
+            mid = (lo+hi)//2
+            self.set_range(2*node,lo,mid,self.lazy[node])
+            self.set_range(2*node+1,mid,hi,self.lazy[node])
+        self.lazy[node] = None
+    def pull(self,node,lo,hi) -> None :
+        mid = (lo+hi)//2; left = 2*node; right = 2*node+1
+        joined = mid not in self.walls
+        self.prefix[node] = self.prefix[left] \
+            if self.prefix[left]<mid-lo or not joined else mid-lo+self.prefix[right]
+        self.suffix[node] = self.suffix[right] \
+            if self.suffix[right]<hi-mid or not joined else hi-mid+self.suffix[left]
+        self.best[node] = max( self.best[left],self.best[right],
+                               self.suffix[left]+self.prefix[right] if joined else 0 )
+    def assign(self,first,last,free : bool,node=1,lo=0,hi=None) -> None :
+        """Mark slots ``first`` up to but not including ``last`` as free or occupied"""
+        if hi is None: hi = self.size
+        if last<=lo or hi<=first: return
+        if first<=lo and hi<=last:
+            self.set_range(node,lo,hi,free); return
+        self.push(node,lo,hi)
+        mid = (lo+hi)//2
+        self.assign(first,last,free,2*node,lo,mid)
+        self.assign(first,last,free,2*node+1,mid,hi)
+        self.pull(node,lo,hi)
+    def occupy(self,first,extent) -> None :
+        self.assign(first,first+extent,False)
+    def release(self,first,extent) -> None :
+        self.assign(first,first+extent,True)
+    def longest(self) -> int :
+        """Length of the longest free run"""
+        return self.best[1] if self.size>0 else 0
+    def free_runs(self) -> list[tuple[int,int]] :
+        """Return all maximal runs of free slots as (offset,length) pairs, by increasing offset.
+        Segments that are completely free or completely occupied are not descended into."""
+        runs : list[list[int]] = []
+        def collect(node,lo,hi):
+            if self.best[node]==0:
+                return
+            if self.best[node]==hi-lo:
+                if len(runs)>0 and runs[-1][0]+runs[-1][1]==lo:
+                    runs[-1][1] += hi-lo
+                else: runs.append( [lo,hi-lo] )
+                return
+            self.push(node,lo,hi)
+            mid = (lo+hi)//2
+            collect(2*node,lo,mid); collect(2*node+1,mid,hi)
+        if self.size>0:
+            collect(1,0,self.size)
+        return [ (offset,length) for offset,length in runs ]
+    def find(self,request,start=0) -> Optional[int] :
+        """Return the lowest offset, from ``start`` on,
+        of ``request`` consecutive free slots, or None"""
+        if request<=0:
+            return start
+        if request>self.longest() or start>=self.size:
+            return None
+        if start>0:
+            return self.find_from(request,start,1,0,self.size)
+        node = 1; lo = 0; hi = self.size
+        while hi-lo>1:
+            self.push(node,lo,hi)
+            mid = (lo+hi)//2; left = 2*node; right = 2*node+1
+            if self.best[left]>=request:
+                node = left; hi = mid
+            elif mid not in self.walls and self.suffix[left]+self.prefix[right]>=request:
+                return mid-self.suffix[left]
+            else:
+                node = right; lo = mid
+        return lo
+    def find_from(self,request,start,node,lo,hi) -> Optional[int] :
+        # as ``find``, in the segment of this node; only segments that contain
+        # the start are partially searched, so this is still a single descent
+        if hi<=start or self.best[node]<request:
+            return None
+        if hi-lo==1:
+            return lo
+        self.push(node,lo,hi)
+        mid = (lo+hi)//2; left = 2*node; right = 2*node+1
+        if ( found := self.find_from(request,start,left,lo,mid) ) is not None:
+            return found
+        if mid not in self.walls:
+            first = max(start,mid-self.suffix[left])
+            if first<mid and mid-first+self.prefix[right]>=request:
+                return first
+        return self.find_from(request,start,right,mid,hi)
+    def free_from(self,first,node=1,lo=0,hi=None) -> int :
+        """Return the number of consecutive free slots from ``first`` on"""
+        if hi is None: hi = self.size
+        if first>=hi:
+            return 0
+        if first<=lo:
+            return self.prefix[node]
+        self.push(node,lo,hi)
+        mid = (lo+hi)//2
+        if first>=mid:
+            return self.free_from(first,2*node+1,mid,hi)
+        length = self.free_from(first,2*node,lo,mid)
+        if length==mid-first and mid not in self.walls:
+            length += self.prefix[2*node+1]
+        return length
+
 def HostName():
     """This just returns the hostname. See also ``ClusterName``."""
     import socket
@@ -909,10 +1714,28 @@ class HostPoolBase():
 
     :param commandexecutor: (keyword, optional, default=``LocalExecutor``) the ``Executor`` object for this host pool
     :param workdir: (keyword, optional) the workdir for the command executor
+    :param placement: (keyword, optional, default ``flat``) with ``node``, tasks are placed with respect to host boundaries, see ``find_on_hosts``
+    :param numasize: (keyword, optional, default 0) number of slots per NUMA domain or socket, if known; this is used by the ``node`` placement
     :param debug: (keyword, optional) a string of debug types; if this contains 'host', anything derived from ``HostPoolBase`` will do a debug trace
     """
     def __init__(self,**kwargs) -> None :
         self.nodes : list[Node] = []
+        self.freeslots : Optional[FreeSlotTree] = None # built on first request
+        # free slots with walls at the host and NUMA boundaries, see ``find_on_hosts``
+        self.hostslots : Optional[FreeSlotTree] = None
+        self.numaslots : Optional[FreeSlotTree] = None
+        self.hostranges : Optional[list[tuple[int,int]]] = None # built on first request
+        self.hostindex : list[int] = []
+        self.largesthost = 0
+        self.placement = kwargs.pop("placement","flat")
+        if self.placement not in [ "flat","node" ]:
+            raise LauncherException( f"Unknown placement <<{self.placement}>>" )
+        self.numasize = int( kwargs.pop("numasize",0) )
+        # locality statistics, see ``record_locality``
+        self.placed = 0; self.onehost = 0; self.numaaligned = 0
+        self.wholenode = 0; self.straddling = 0
+        self.task_locators : dict[int,HostLocator] = {}
+        self.occupied : int = 0
         self.occupancies : list[float] = []
         self.commandexecutor = kwargs.pop("commandexecutor",None)
         if not isinstance(self.commandexecutor,(Executor)):
@@ -926,18 +1749,37 @@ class HostPoolBase():
             raise LauncherException("workdir arg is ignored with explicit executor")
         self.debugs = kwargs.get("debug","")
         self.debug = re.search("host",self.debugs)
-    def append_node(self,host_dict : HostDict) -> None:
+    def append_node(self,host_dict : HostDict,setup=True) -> None:
         """Create a new item in this pool by specifying either a Node object
         or a hostname plus core number. This function is called in a loop when a
-        ``HostPool`` is created from a ``HostList`` object."""
+        ``HostPool`` is created from a ``HostList`` object.
+        With ``setup=False`` the executor is not yet set up on the node; see ``setup_nodes``."""
 
         node : Node = Node(host_dict,nodeid=len(self.nodes))
         self.nodes.append( node )
-        self.commandexecutor.setup_on_node(node)
+        self.pool_changed()
+        if setup:
+            self.commandexecutor.setup_on_node(node)
+    def setup_nodes(self) -> None :
+        """Set up the executor on all nodes at once. Nodes on hosts
+        where this failed are left out of the pool, and the remaining nodes
+        are renumbered."""
+        failed = self.commandexecutor.setup_on_nodes(self.nodes)
+        if len(failed)>0:
+            self.nodes = [ n for n in self.nodes if n.host_dict['host'] not in failed ]
+            for i,n in enumerate(self.nodes):
+                n.nodeid = i
+            self.pool_changed()
+            print( f"Host pool reduced to {len(self.nodes)} slots, leaving out: {' '.join(sorted(failed))}",
+                   flush=True )
+            if len(self.nodes)==0:
+                raise LauncherException("No hosts left in the pool")
     def __len__(self) -> int :
         return len(self.nodes)
     def occupancy(self) -> int  :
-        return sum( [ 1 for n in self.nodes if not n.isfree() ] )
+        """Number of occupied nodes; this is kept up to date by
+        ``occupyNodes`` and the release methods."""
+        return self.occupied
     def record_occupancy(self) -> None :
         self.occupancies.append( self.occupancy() )
     def max_occupancy(self) -> float :
@@ -959,20 +1801,148 @@ class HostPoolBase():
             if not name in u:
                 u.append(name)
         return sorted(u)
+    def pool_changed(self) -> None :
+        """Forget the indexes of the nodes, after nodes have been added or removed"""
+        self.freeslots = None; self.hostslots = None; self.numaslots = None
+        self.hostranges = None
+    def free_slot_tree(self) -> FreeSlotTree :
+        """Return the index of free nodes, building it if the pool has changed"""
+        if self.freeslots is None:
+            self.freeslots = self.build_slot_tree( [] )
+        return self.freeslots
+    def build_slot_tree(self,walls) -> FreeSlotTree :
+        tree = FreeSlotTree(len(self.nodes),walls)
+        for n in self.nodes:
+            if not n.isfree():
+                tree.occupy(n.nodeid,1)
+        return tree
+    def placement_trees(self) -> tuple[FreeSlotTree,FreeSlotTree] :
+        """Return the indexes of free nodes with walls at the host boundaries,
+        and also at the NUMA domain boundaries, building them if the pool has changed"""
+        if self.hostslots is None or self.numaslots is None:
+            hosts = self.host_ranges()
+            self.hostslots = self.build_slot_tree( [ first for first,last in hosts ] )
+            if self.numasize>0:
+                self.numaslots = self.build_slot_tree\
+                    ( [ w for first,last in hosts for w in range(first,last,self.numasize) ] )
+            else: self.numaslots = self.hostslots
+        return self.hostslots,self.numaslots
+    def slot_trees(self) -> list[FreeSlotTree] :
+        """All indexes of free nodes that have been built"""
+        trees = [ self.free_slot_tree() ]
+        if self.hostslots is not None:
+            trees.append(self.hostslots)
+        if self.numaslots is not None and self.numaslots is not self.hostslots:
+            trees.append(self.numaslots)
+        return trees
+    def host_ranges(self) -> list[tuple[int,int]] :
+        """Return the ranges ``(first,last)``, with ``last`` not included,
+        of consecutive slots on the same host, building them if the pool has changed.
+        This also sets ``hostindex``, the index of the range of each slot,
+        and ``largesthost``, the number of slots of the largest host."""
+        if self.hostranges is None:
+            self.hostranges = []; first = 0
+            for i in range(1,len(self.nodes)+1):
+                if i==len(self.nodes) or \
+                   self.nodes[i].host_dict['host']!=self.nodes[first].host_dict['host']:
+                    self.hostranges.append( (first,i) ); first = i
+            self.hostindex = [ h for h,(first,last) in enumerate(self.hostranges)
+                               for i in range(first,last) ]
+            self.largesthost = max( [ last-first for first,last in self.hostranges ],default=0 )
+        return self.hostranges
+    def find_on_hosts(self,request) -> Optional[int] :
+        """Find ``request`` consecutive free slots with respect to host boundaries,
+        for the ``node`` placement; return the lowest offset, or None.
+
+        * A task that fits on a host is placed on one host. If ``numasize`` is known,
+          the task is preferably placed in one NUMA domain, or starting on a domain boundary.
+        * A task larger than any host is placed on whole hosts, starting at the beginning of a host.
+
+        The lowest fitting run is found by a descent of a ``FreeSlotTree`` that has walls
+        at the host boundaries, or also at the NUMA boundaries. Runs that have to start
+        at a boundary are found by repeated descents, each starting beyond the boundary
+        that did not work.
+        """
+        tree = self.free_slot_tree()
+        if request<=0:
+            return 0
+        if request>tree.longest():
+            return None
+        hosts = self.host_ranges()
+        if request>self.largesthost:
+            # the run has to start at a host, so we use the tree without walls
+            return self.find_aligned( tree,request,
+                                      lambda first:hosts[ self.hostindex[first] ][0] )
+        hostslots,numaslots = self.placement_trees()
+        numa = self.numasize
+        if numa>0:
+            if request<=numa:
+                found = numaslots.find(request)
+            else:
+                def domain_start(first):
+                    hostfirst,hostlast = hosts[ self.hostindex[first] ]
+                    return min( hostlast,hostfirst+( (first-hostfirst+numa-1)//numa )*numa )
+                found = self.find_aligned(hostslots,request,domain_start,up=True)
+            if found is not None:
+                return found
+        return hostslots.find(request)
+    def find_aligned(self,tree,request,boundary,up=False) -> Optional[int] :
+        """Find the lowest run of ``request`` free slots in the tree that starts at a boundary.
+        The function ``boundary`` gives the last boundary at or before a slot,
+        or with ``up`` the first one at or after it."""
+        start = 0
+        while ( found := tree.find(request,start) ) is not None:
+            aligned = boundary(found)
+            if not up and aligned<found:
+                # the next host
+                h = self.hostindex[found]+1
+                if h>=len(self.hostranges): return None
+                aligned = self.hostranges[h][0]
+            if aligned<len(self.nodes) and tree.free_from(aligned)>=request:
+                return aligned
+            start = aligned+1
+        return None
+    def record_locality(self,locator : HostLocator) -> None :
+        """Count whether a placed task is on one host, and in one NUMA domain,
+        or on whole hosts, or straddling hosts."""
+        if locator.extent<=0: return
+        hosts = self.host_ranges()
+        first = locator.offset; last = first+locator.extent-1
+        hostfirst = hosts[ self.hostindex[first] ][0]
+        self.placed += 1
+        if self.hostindex[first]==self.hostindex[last]:
+            self.onehost += 1
+            numa = self.numasize
+            if numa>0 and ( (first-hostfirst)//numa==(last-hostfirst)//numa
+                            or (first-hostfirst)%numa==0 ):
+                self.numaaligned += 1
+        elif hostfirst==first:
+            self.wholenode += 1
+        else:
+            self.straddling += 1
+    def locality_report(self) -> str :
+        numa = f", NUMA domains of {self.numasize} slots" if self.numasize>0 else ""
+        message = f"""placement: {self.placement}{numa}
+tasks on one host: {self.onehost} out of {self.placed}
+"""
+        if self.numasize>0:
+            message += f" .. in one NUMA domain or domain aligned: {self.numaaligned}\n"
+        message += f"""tasks on whole hosts: {self.wholenode}
+tasks straddling hosts: {self.straddling}
+"""
+        return message
     def request_nodes(self,request) -> Optional[HostLocator] :
-        """Request a number of nodes; this returns a HostLocator object"""
-        DebugTraceMsg("request %d core(s)" % request,self.debug,prefix="Host")
-        start = 0; found = False    
-        while not found:
-            if start+request>len(self.nodes):
-                break
-            # check that all loci for the next `request' number are free 
-            if found := all( [ self[i].isfree() for i in range(start,start+request) ] ):
-                break
-            else: start += 1
-        if found:
+        """Request a number of nodes; this returns a HostLocator object
+        for the lowest offset where that many consecutive nodes are free.
+        With the ``node`` placement, see ``find_on_hosts``."""
+        DebugTraceMsg(lambda : "request %d core(s)" % request,self.debug,prefix="Host")
+        if self.placement=="node":
+            start = self.find_on_hosts(request)
+        else:
+            start = self.free_slot_tree().find(request)
+        if start is not None:
             locator : HostLocator = HostLocator(pool=self,offset=start,extent=request)
-            DebugTraceMsg("returning <<%s>>" % str(locator),self.debug,prefix="Host")
+            DebugTraceMsg( lambda : "returning <<%s>>" % str(locator),self.debug,prefix="Host")
             return locator
         else: 
             DebugTraceMsg("could not locate",self.debug,prefix="Host")
@@ -985,21 +1955,51 @@ class HostPoolBase():
         * taskid : like the man says
         """
         nodenums = range(locator.offset,locator.offset+locator.extent)
-        DebugTraceMsg("occupying nodes %s with %d" % (str(nodenums),taskid),
+        DebugTraceMsg(lambda : "occupying nodes %s with %d" % (str(nodenums),taskid),
                       self.debug,prefix="Host")
         for n in nodenums:
+            if self[n].isfree():
+                self.occupied += 1
             self[n].occupyWithTask(taskid)
-    def releaseNodesByTask(self,taskid):
-        """Given a task id, release the nodes that are associated with it"""
+        for tree in self.slot_trees():
+            tree.occupy(locator.offset,locator.extent)
+        self.task_locators[taskid] = locator
+        self.record_locality(locator)
+    def release_node(self,node) -> None :
+        DebugTraceMsg( lambda : f"releasing node {node}",
+                       self.debug,prefix="Host")
+        if not node.isfree():
+            self.occupied -= 1
+        node.release()
+        for tree in self.slot_trees():
+            tree.release(node.nodeid,1)
+    def release_locator(self,taskid) -> bool :
+        """Release the nodes of a task through the locator it was given
+        in ``occupyNodes``; this only touches the nodes of that task.
+        If the task is not known, fall back to scanning the whole pool.
+        Return whether any nodes were found."""
         done = False
-        for n in self.nodes:
+        if (locator := self.task_locators.pop(taskid,None)) is not None:
+            nodes = [ self[n] for n in range(locator.offset,locator.offset+locator.extent) ]
+        else:
+            nodes = self.nodes
+        for n in nodes:
             if n.taskid==taskid:
-                DebugTraceMsg( f"releasing node {n}",
-                              self.debug,prefix="Host")
-                n.release(); done = True
-        if not done:
+                self.release_node(n); done = True
+        return done
+    def releaseNodesByTask(self,taskid):
+        """Given a task id, release the nodes that are associated with it"""
+        if not self.release_locator(taskid):
             raise LauncherException("Could not find nodes associated with id %s"
                                     % str(taskid))
+    def releaseNodesByTasks(self,taskids):
+        """Release the nodes of a batch of tasks"""
+        missing = [ t for t in taskids if not self.release_locator(t) ]
+        DebugTraceMsg( lambda : f"released nodes of {len(taskids)-len(missing)} tasks",
+                       self.debug,prefix="Host")
+        if missing:
+            raise LauncherException("Could not find nodes associated with ids %s"
+                                    % str(sorted(missing)))
     #def __iter__(self) -> HostPoolBase : ## this suddenly gives runtime error
     def __iter__(self)  :
         self.nodeiter : int = 0
@@ -1016,6 +2016,11 @@ class HostPoolBase():
         DebugTraceMsg("HostpoolBase release",self.debug,prefix="Host")
         self.commandexecutor.terminate()
         DebugTraceMsg(" .. released",self.debug,prefix="Host")
+    async def arelease(self) -> None :
+        """Coroutine version of ``release``"""
+        DebugTraceMsg("HostpoolBase release",self.debug,prefix="Host")
+        await self.commandexecutor.aterminate()
+        DebugTraceMsg(" .. released",self.debug,prefix="Host")
     def display(self) -> str :
         return ' '.join( [ str(n.taskid) for n in self ] )
     def final_report(self) -> str:
@@ -1028,7 +2033,7 @@ Number of tasks executed:
 max: {self.max_occupancy()}
 avg: {self.average_occupancy():.2f}
 unused cores: {unused}
-""" 
+""" + self.locality_report()
         return message
     def printhosts(self) -> str :
         hostlist = ""
@@ -1063,6 +2068,7 @@ class HostPool(HostPoolBase):
             (self,
              commandexecutor=kwargs.pop\
                  ("commandexecutor",LocalExecutor(workdir=workdir)),
+             placement=kwargs.pop("placement","flat"),numasize=kwargs.pop("numasize",0),
              debug=kwargs.get("debug",""))
         if ( nhosts := int( kwargs.pop("nhosts",0) ) ) > 0:
             localhost = HostName()
@@ -1070,13 +2076,14 @@ class HostPool(HostPoolBase):
             for i in range(nhosts):
                 self.append_node( {'host':localhost,
                                    "hostnum":0, "task_loc":0, "phys_core":"0-0" ## defaults!
-                                   } )
+                                   },setup=False )
         else:
             try :
                 hostlist = kwargs.pop("hostlist")
                 for h in hostlist:
-                    self.append_node(h)
+                    self.append_node(h,setup=False)
             except: raise LauncherException("HostPool creation needs n or list")
+        self.setup_nodes()
         DebugTraceMsg( f"Created host pool from <<{hostlist}>>" ,self.debug,prefix="Host")
     def __del__(self):
         """The ``SSHExecutor`` class creates a permanent ssh connection, 
@@ -1353,100 +2360,309 @@ class LocalHostPool(HostPool):
 
     :param nhosts: (keyword, optional, default=1) number of times the localhost should be listed
     :param workdir: (keyword, optional) workdir for the commandexecutor
+    :param spawn: (keyword, optional, default False) use the ``ChildProcessExecutor`` instead of the ``LocalExecutor``
+    :param execfiles: (keyword, optional, default False) write exec files, see ``Executor``
+    :param layout: (keyword, optional) layout of the workdir, see ``WorkdirLayout``
+    :param aggregate_output: (keyword, optional, default False) aggregate the task output, see ``Executor``; this needs ``spawn``
     """
     def __init__(self,**kwargs) -> None :
         nhosts = kwargs.pop("nhosts",1)
         self.debug = kwargs.get("debug","")
         self.workdir=kwargs.pop("workdir",MakeRandomDir())
+        executorclass = ChildProcessExecutor if kwargs.pop("spawn",False) else LocalExecutor
         HostPool.__init__(
             self, nhosts=nhosts,workdir=self.workdir,
-            commandexecutor=LocalExecutor(
-                debug=self.debug,workdir=self.workdir,
+            commandexecutor=executorclass(
+                debug=self.debug,workdir=self.workdir,execfiles=kwargs.pop("execfiles",False),
+                layout=kwargs.pop("layout",None),
+                aggregate_output=kwargs.pop("aggregate_output",False),
                 #workdir=kwargs.pop("workdir",None),
                 force_workdir=kwargs.pop("force_workdir",False)),
             debug=self.debug,**kwargs)
 
 def CompactIntList(intlist):
-    if len(intlist)==0:
-        return ""
-    elif len(intlist)==1:
-        return str(intlist[0])
-    else:
-        compact = str(intlist[0]); base = intlist[0]
-        if intlist[1]>intlist[0]+1:
-            return str(intlist[0])+" "+CompactIntList(intlist[1:])
+    """Render a sorted list of integers with ranges, as in ``1-3 5 7-8``.
+    This is done in one pass, since the lists can be long."""
+    ranges = []; start = 0
+    for e in range(1,len(intlist)+1):
+        # close the current range at the end, or if there is a gap
+        if e==len(intlist) or intlist[e]>intlist[start]+e-start:
+            if e-start==1:
+                ranges.append( str(intlist[start]) )
+            else:
+                ranges.append( f"{intlist[start]}-{intlist[e-1]}" )
+            start = e
+    return " ".join(ranges)
+
+class RuntimeHistory():
+    """Running times of completed tasks, kept from run to run, to predict
+    the running time of queued tasks. Times are averaged per core count and command,
+    and per core count and command template, which is the command with all numbers
+    replaced by ``#``. A command that has not run before is predicted by its template.
+
+    The history is a json file, which is read when this object is created,
+    and rewritten by ``save``.
+
+    :param filename: name of the history file
+    :param debug: (keyword, optional) debug string; this class responds to "queue"
+    """
+    def __init__(self,filename,**kwargs) -> None :
+        self.filename = filename
+        self.debug = re.search("queue",kwargs.get("debug",""))
+        # key -> [ count, average ]
+        self.commands  : dict[str,list] = {}
+        self.templates : dict[str,list] = {}
+        if os.path.isfile(filename):
+            with open(filename,"r") as f:
+                history = json.load(f)
+            self.commands = history.get("commands",{})
+            self.templates = history.get("templates",{})
+        DebugTraceMsg( f"runtime history <<{filename}>> of {len(self.commands)} commands, "
+                       f"{len(self.templates)} templates",self.debug,prefix="Queue")
+    @staticmethod
+    def template(command : str) -> str :
+        return re.sub( r"[0-9]+(\.[0-9]+)?","#"," ".join( command.split() ) )
+    def keys(self,task : Task) -> tuple[str,str] :
+        return f"{task.size} {task.command}",\
+            f"{task.size} {RuntimeHistory.template(task.command)}"
+    def predict(self,task : Task) -> Optional[float] :
+        """Predicted running time of a task, or None if there is no history for it"""
+        command,template = self.keys(task)
+        if command in self.commands:
+            return self.commands[command][1]
+        if template in self.templates:
+            return self.templates[template][1]
+        return None
+    def expected(self,task : Task) -> float :
+        """Predicted running time of a task; without a prediction,
+        the average over all templates in the history"""
+        if task.predicted is not None:
+            return task.predicted
+        count = sum( [ c for c,a in self.templates.values() ] )
+        if count==0:
+            return 0.
+        return sum( [ c*a for c,a in self.templates.values() ] )/count
+    def record(self,task : Task) -> None :
+        """Add the running time of a completed task to the averages"""
+        for table,key in zip( [ self.commands,self.templates ],self.keys(task) ):
+            count,average = table.get(key,[0,0.])
+            table[key] = [ count+1,average+(task.runningtime-average)/(count+1) ]
+    def save(self) -> None :
+        with open(self.filename+".tmp","w") as f:
+            json.dump( { "commands":self.commands,"templates":self.templates },f )
+        os.replace(self.filename+".tmp",self.filename)
+
+def ListScheduleMakespan(tasks : list[tuple[float,int]],ncores : int) -> float :
+    """Makespan of starting tasks, given as (running time,cores), in list order
+    on ``ncores`` cores: each task starts as soon as enough cores are free.
+    Whether the free cores are consecutive is not considered."""
+    now = 0.; free = ncores; makespan = 0.
+    ending : list[tuple[float,int]] = [] # heap of ( end time, cores )
+    for runtime,cores in tasks:
+        cores = min(cores,ncores)
+        while free<cores:
+            now,released = heapq.heappop(ending)
+            free += released
+        heapq.heappush( ending,(now+runtime,cores) )
+        free -= cores
+        makespan = max(makespan,now+runtime)
+    return makespan
+
+class FreeGaps():
+    """The runs of free slots in a host pool, grouped by length,
+    for placing a batch of tasks in one scheduling round, see ``TaskQueue.startQueued``.
+    Taking slots from a gap shrinks it; the host pool itself is not consulted.
+
+    :param runs: list of (offset,length) pairs, see ``FreeSlotTree.free_runs``
+    """
+    def __init__(self,runs : list[tuple[int,int]]) -> None :
+        self.bylength : dict[int,list[int]] = {} # length -> heap of offsets
+        for offset,length in runs:
+            self.add(offset,length)
+    def add(self,offset,length) -> None :
+        if length>0:
+            heapq.heappush( self.bylength.setdefault(length,[]),offset )
+    def __len__(self) -> int :
+        return sum( [ len(offsets) for offsets in self.bylength.values() ] )
+    def longest(self) -> int :
+        return max( self.bylength.keys(),default=0 )
+    def histogram(self) -> dict[int,int] :
+        """Number of gaps of each length"""
+        return { length:len(offsets) for length,offsets in sorted(self.bylength.items()) }
+    def take(self,size,policy="ffd") -> Optional[int] :
+        """Take ``size`` slots from a gap; return their offset, or None if no gap is large enough.
+        With policy ``bestfit`` this is the smallest gap that fits,
+        otherwise the gap with the lowest offset."""
+        fits = [ length for length in self.bylength.keys() if length>=size ]
+        if len(fits)==0:
+            return None
+        if policy=="bestfit":
+            length = min(fits)
         else:
-            for e in range(1,len(intlist)):
-                if intlist[e]>intlist[0]+e:
-                    return str(intlist[0])+"-"+str(intlist[e-1])+" "\
-                        +CompactIntList(intlist[e:])
-            return str(intlist[0])+"-"+str(intlist[-1])
+            length = min( fits,key=lambda l:self.bylength[l][0] )
+        offsets = self.bylength[length]
+        offset = heapq.heappop(offsets)
+        if len(offsets)==0:
+            del self.bylength[length]
+        self.add(offset+size,length-size)
+        return offset
 
 class TaskQueue():
     """Object that does the maintains a list of Task objects.
-    This is internally created inside a ``LauncherJob`` object."""
+    This is internally created inside a ``LauncherJob`` object.
+
+    Queued tasks are kept per sub-queue, see ``Task.queue``, and there
+    in buckets by priority and core count. In each bucket tasks are started in order of task id,
+    or, with a runtime history, longest predicted running time first.
+
+    :param packing: (keyword, optional, default ``ffd``) how queued tasks are placed, see ``startQueued``
+    :param queueweights: (keyword, optional) dict of sub-queue names and their weight in the fair share scheduling; the default weight is 1
+    :param history: (keyword, optional) RuntimeHistory object to predict running times
+    :param waiting: (keyword, optional) dict of tasks that wait for other tasks, see ``TaskGenerator``; these are saved as queued
+    :param journal: (keyword, optional) QueueJournal object to record state changes in
+    :param debug: (keyword, optional) debug string; this class responds to "queue"
+    """
+    packings = [ "ffd","bestfit","legacy" ]
     def __init__(self,**kwargs) -> None :
-        self.queue     : list[Task] = []
+        # sub-queue -> ( -priority, -cores ) -> heap of ( -predicted time, task id, task )
+        self.buckets   : dict[str,dict[tuple[int,int],list[tuple[float,int,Task]]]] = {}
+        self.nqueued = 0
+        self.queueweights : dict[str,float] = kwargs.pop("queueweights",{})
+        # cores in use, and tasks started, per sub-queue
+        self.inuse : dict[str,int] = {}; self.queuestarted : dict[str,int] = {}
         self.running   : list[Task] = []
         self.completed : list[Task] = []
         self.aborted   : list[Task] = []
         self.maxsimul = 0; self.submitdelay = 0
+        self.packing = kwargs.pop("packing","ffd")
+        if self.packing not in TaskQueue.packings:
+            raise LauncherException( f"Unknown packing <<{self.packing}>>, "
+                                     f"should be one of {TaskQueue.packings}" )
+        # statistics: scheduling rounds, and the most free gaps seen in a round
+        self.rounds = 0; self.maxgaps = 0
         # not used? self.queuestate = kwargs.pop("queuestate","./queuestate")
-        self.debugs = kwargs.get("debug",False)
+        self.journal : Optional[QueueJournal] = kwargs.pop("journal",None)
+        self.history : Optional[RuntimeHistory] = kwargs.pop("history",None)
+        self.waiting : dict[int,Task] = kwargs.pop("waiting",{})
+        # heap of ( time, task id, task ) of tasks to be queued again at that time
+        self.postponed : list[tuple[float,int,Task]] = []
+        self.debugs = kwargs.get("debug","")
         self.debug = re.search("queue",self.debugs)
         self._didran = False
+    def queued_tasks(self) -> typing.Iterator[Task] :
+        """The queued tasks, in no particular order"""
+        return ( entry[2] for buckets in self.buckets.values()
+                 for bucket in buckets.values() for entry in bucket )
+    @property
+    def queue(self) -> list[Task] :
+        """The queued tasks, in no particular order. Since the tasks are kept in buckets,
+        this is a copy: adding to it does not queue a task, use ``enqueue`` for that."""
+        return list( self.queued_tasks() )
+    def sorted_queue(self) -> list[Task] :
+        """The queued tasks, in order of task id"""
+        return sorted( self.queued_tasks(),key=lambda t:t.taskid )
     def finished(self):
-        return self._didran and len(self.queue)==0
+        return self._didran and self.nqueued==0
     def isEmpty(self):
-        """Test whether the queue is empty and no tasks running"""
-        return self.queue==[] and self.running==[]
+        """Test whether the queue is empty and no tasks running or postponed"""
+        return self.nqueued==0 and self.running==[] and self.postponed==[]
     def enqueue(self,task : Task ) -> None :
         """Add a task to the queue"""
-        DebugTraceMsg("enqueueing <%s>" % str(task),self.debug,prefix="Queue")
-        self.queue.append(task)
+        DebugTraceMsg( lambda : "enqueueing <%s>" % str(task),self.debug,prefix="Queue")
+        if self.history is not None:
+            task.predicted = self.history.predict(task)
+            expected = self.history.expected(task)
+        else: expected = 0.
+        buckets = self.buckets.setdefault(task.queue,{})
+        heapq.heappush( buckets.setdefault( (-task.priority,-task.size),[] ),
+                        (-expected,task.taskid,task) )
+        self.nqueued += 1
+        if self.journal is not None:
+            self.journal.record("queued",task)
         self._didran = True
     def startQueued(self,hostpool : HostPoolBase, **kwargs ) -> None :
-        """For all queued, try to find nodes to run it on"""
-        tqueue : list[Task] = copy.copy(self.queue)
-        tqueue.sort( key=lambda x:-x.size )
-        #
-        # This is crude: we don't list the gaps in the hostpool, so 
-        # we try to find a gap for each task
-        #
-        max_gap = max( [ t.size for t in tqueue ] + [0] )
+        """For all queued, try to find nodes to run it on.
+
+        Each task is taken from the sub-queue that uses the fewest cores
+        relative to its weight. In a sub-queue, tasks are started by decreasing priority,
+        then by decreasing core count, then in order of task id or longest predicted running time.
+        With the ``ffd`` and ``bestfit`` packing the free gaps of the host pool are
+        listed once (see ``FreeGaps``), and each task goes into the first gap,
+        or the smallest gap, that fits it.
+        The ``legacy`` packing, and the ``node`` placement of the host pool,
+        request nodes from the host pool for each task.
+        Once a task does not fit, no tasks of that size or larger are tried.
+
+        :param starttick: (keyword, optional, default 0) tick number to record in the started tasks
+        :param launch: (keyword, optional) function of task, locator, starttick that starts the task; default is the task's ``start_on_nodes``. The task is counted as running as soon as this returns.
+        """
+        if self.nqueued==0:
+            return
         starttick = kwargs.pop("starttick",0)
-        for t in tqueue:
-            # go through tasks in descending size
-            # if one doesn't fit, skip all of same size
-            task_size = t.size
-            if task_size>max_gap:
-                # there can be smaller tasks so continue
-                if max_gap>0: 
+        launch = kwargs.pop("launch",None)
+        # the node placement has its own search, see ``HostPoolBase.find_on_hosts``
+        pergap = self.packing!="legacy" and hostpool.placement=="flat"
+        if pergap:
+            gaps = FreeGaps( hostpool.free_slot_tree().free_runs() )
+            self.rounds += 1; self.maxgaps = max(self.maxgaps,len(gaps))
+            DebugTraceMsg( lambda : f"free gaps (length:count): {gaps.histogram()}",
+                           self.debug,prefix="Queue")
+        toolarge = math.inf # smallest size that did not fit
+        blocked : set[str] = set() # sub-queues without a task that fits
+        while len(blocked)<len(self.buckets):
+            name = min( [ name for name in self.buckets.keys() if name not in blocked ],
+                        key=lambda name:(self.inuse.get(name,0)/self.queueweight(name),name) )
+            buckets = self.buckets[name]
+            for key in sorted( buckets.keys() ):
+                task_size = -key[1]
+                if task_size>=toolarge:
+                    continue
+                bucket = buckets[key]
+                t = bucket[0][2]
+                if not pergap:
+                    locator = hostpool.request_nodes(task_size)
+                elif ( offset:=gaps.take(task_size,self.packing) ) is not None:
+                    locator = HostLocator(pool=hostpool,offset=offset,extent=task_size)
+                else: locator = None
+                if locator is None:
+                    DebugTraceMsg( lambda : f"could not find gap of {task_size} for <{str(t)}>",
+                                   self.debug,prefix="Queue")
+                    toolarge = task_size
                     continue
-                else: break
-            if locator := hostpool.request_nodes(task_size):
                 DebugTraceMsg\
-                    (f"starting task <{str(t)}> on locator <{str(locator)}>",
+                    (lambda : f"starting task <{str(t)}> on locator <{str(locator)}>",
                      self.debug,prefix="Queue")
                 if self.submitdelay>0:
                     time.sleep(self.submitdelay)
-                t.start_on_nodes(locator=locator,starttick=starttick)
+                if launch is None:
+                    t.start_on_nodes(locator=locator,starttick=starttick)
+                else:
+                    launch(t,locator,starttick)
                 hostpool.occupyNodes(locator,t.taskid)
-                self.queue.remove(t)
+                if self.journal is not None:
+                    self.journal.record("started",t)
+                heapq.heappop(bucket); self.nqueued -= 1
+                if len(bucket)==0:
+                    del buckets[key]
+                    if len(buckets)==0:
+                        del self.buckets[name]
+                self.inuse[name] = self.inuse.get(name,0)+task_size
+                self.queuestarted[name] = self.queuestarted.get(name,0)+1
                 self.running.append(t)
                 self.maxsimul = max(self.maxsimul,len(self.running))
+                break
             else:
-                DebugTraceMsg( f"could not find gap of {task_size} for <{str(t)}>",
-                               self.debug,prefix="Queue")
-                max_gap = task_size-1
-                continue
+                blocked.add(name)
+    def queueweight(self,name) -> float :
+        return self.queueweights.get(name,1)
     def find_recently_completed(self):
         """Find the first recently completed task.
         Note the return, not yield.
         """
+        refresh_stamp_watchers()
         for t in self.running:
             if t.hasCompleted():
-                DebugTraceMsg(".. job completed: %d" % t.taskid,
+                DebugTraceMsg(lambda : ".. job completed: %d" % t.taskid,
                               self.debug,prefix="Queue")
                 return t
         return None
@@ -1456,15 +2672,66 @@ class TaskQueue():
         """
         for t in self.running:
             if abort_test(t):
-                DebugTraceMsg(".. job aborted: %d ran from %d" \
+                DebugTraceMsg(lambda : ".. job aborted: %d ran from %d" \
                                   % (t.taskid,t.starttick),
                               self.debug,prefix="Queue")
                 return t
         return None
+    def find_all_recently_completed(self) -> list[Task] :
+        """Find all tasks that completed since the last scan.
+        This does one completion test per running task; the tasks
+        are not yet moved out of the running list, see ``retire``.
+        """
+        refresh_stamp_watchers()
+        completed : list[Task] = [ t for t in self.running if t.hasCompleted() ]
+        if len(completed)>0:
+            DebugTraceMsg( lambda : ".. jobs completed: %s" % \
+                               CompactIntList( sorted( [ t.taskid for t in completed ] ) ),
+                           self.debug,prefix="Queue")
+        return completed
+    def find_all_recently_aborted(self,abort_test) -> list[Task] :
+        """Find all running tasks that satisfy the abort test."""
+        aborted : list[Task] = [ t for t in self.running if abort_test(t) ]
+        if len(aborted)>0:
+            DebugTraceMsg( lambda : ".. jobs aborted: %s" % \
+                               CompactIntList( sorted( [ t.taskid for t in aborted ] ) ),
+                           self.debug,prefix="Queue")
+        return aborted
+    def retire(self,tasks : list[Task],retired : Optional[list[Task]]) -> None :
+        """Move a batch of tasks from the running list to the ``retired`` list,
+        which is either ``self.completed`` or ``self.aborted``,
+        or None for tasks that are going to be queued again, see ``postpone``.
+        The running list is rebuilt in one pass, rather than with a ``remove`` per task."""
+        if len(tasks)==0: return
+        retire_ids = set( [ t.taskid for t in tasks ] )
+        self.running = [ t for t in self.running if t.taskid not in retire_ids ]
+        for t in tasks:
+            self.inuse[t.queue] = self.inuse.get(t.queue,0)-t.size
+        if retired is None:
+            return
+        retired.extend(tasks)
+        if self.journal is not None:
+            event = "aborted" if retired is self.aborted else "completed"
+            for t in tasks:
+                self.journal.record(event,t)
+    def postpone(self,tasks : list[tuple[Task,float]]) -> None :
+        """Take a batch of tasks out of the running list, each to be queued again
+        at the time given with it; this is done by ``requeue_due``.
+        Other tasks are started in the meantime."""
+        self.retire( [ t for t,until in tasks ],None )
+        for t,until in tasks:
+            heapq.heappush( self.postponed,(until,t.taskid,t) )
+    def requeue_due(self,now : float) -> int :
+        """Queue the postponed tasks whose time has come; return how many there were"""
+        requeued = 0
+        while len(self.postponed)>0 and self.postponed[0][0]<=now:
+            until,taskid,t = heapq.heappop(self.postponed)
+            self.enqueue(t); requeued += 1
+        return requeued
     def __repr__(self) -> str:
         completed : list[int] = sorted( [ t.taskid for t in self.completed ] )
         aborted   : list[int] = sorted( [ t.taskid for t in self.aborted] )
-        queued    : list[int] = sorted( [ t.taskid for t in self.queue] )
+        queued    : list[int] = sorted( [ t.taskid for t in self.queued_tasks() ] )
         running   : list[int] = sorted( [ t.taskid for t in self.running ] )
         return \
 """\
@@ -1479,17 +2746,16 @@ running   %3d jobs: %s
         len(running),str( CompactIntList(running) ),
       )
     def savestate(self):
-        state = ""
-        state += "queued\n"
-        for t in self.queue:
-            state += "%s: %s\n" % (t.taskid,t.command)
-        state += "running\n"
-        for t in self.running:
-            state += "%s: %s\n" % (t.taskid,t.command)
-        state += "completed\n"
-        for t in self.completed:
-            state += "%s: %s\n" % (t.taskid,t.command)
-        return state
+        state = [ "queued\n" ]
+        queued = sorted( itertools.chain( self.queued_tasks(),self.waiting.values(),
+                                          [ t for until,i,t in self.postponed ] ),
+                         key=lambda t:t.taskid )
+        state.extend( [ "%s: %s%s\n" % (t.taskid,t.options_prefix(),t.command) for t in queued ] )
+        state.append( "running\n" )
+        state.extend( [ "%s: %s%s\n" % (t.taskid,t.options_prefix(),t.command) for t in self.running ] )
+        state.append( "completed\n" )
+        state.extend( [ "%s: %s%s\n" % (t.taskid,t.options_prefix(),t.command) for t in self.completed ] )
+        return "".join(state)
     def final_report( self,runningtime,optimalspeedup : float ) -> str:
         """Return a string describing the max and average runtime for each task."""
         if len(self.completed)==0:
@@ -1506,12 +2772,24 @@ avg runningtime: %6.2f
 aggregate      : %6.2f
 speedup        : %6.2f
 out of ideal   : %6.2f
-""" % ( len(self.completed), len(self.aborted),
+packing        : %s
+%s""" % ( len(self.completed), len(self.aborted),
         maxtime,avgtime,sumtime,speedup,
-        optimalspeedup,
+        optimalspeedup,self.packing_report(),self.subqueue_report(),
     )
         return message
 
+    def subqueue_report(self) -> str :
+        """Tasks started per sub-queue, if there is more than one"""
+        if len(self.queuestarted)<2:
+            return ""
+        return "".join( [ f"sub-queue <<{name}>> weight {self.queueweight(name)}: {count} tasks started\n"
+                          for name,count in sorted(self.queuestarted.items()) ] )
+    def packing_report(self) -> str :
+        if self.packing=="legacy":
+            return self.packing
+        return f"{self.packing} ({self.rounds} rounds, at most {self.maxgaps} free gaps)"
+
 class TaskGenerator():
     """iterator class that can yield the following:
 
@@ -1523,11 +2801,24 @@ class TaskGenerator():
     You can iterate over an instance, or call the ``next`` method. The ``next`` method
     can accept an imposed taskcount number.
 
+    Commandlines can depend on earlier commandlines, through their ``name``
+    and ``after`` options; see ``Commandline``. A name can be shared by any number of
+    commandlines, and ``after`` then waits for all earlier ones with that name.
+    A task that has to wait is kept in this generator, and it is only handed out
+    once the tasks it depends on have completed, as reported by ``retire``.
+    If one of them is aborted, or fails after its last retry,
+    the task, and everything that depends on it, is cancelled.
+    Each dependency costs one list entry and one counter update, so
+    the time and space are linear in the number of edges of the graph.
+
     :param taskclass: (required keyword) something that derives from Task
     :param commandlinegenerator: either a list of unix commands, or a CommandlineGenerator object
     :param completion: (optional) a function of one variable (the task id) that returns Completion objects
+    :param completionclass: (optional) Completion class passed to the taskclass, if that accepts one
     :param debug: (optional) string of requested debug modes
     :param skip: (optional) list of tasks to skip, this is for restarted jobs
+    :param journal: (keyword, optional) QueueJournal object to record waiting and cancelled tasks in
+    :param layout: (keyword, optional) ``WorkdirLayout`` of the workdir, where the stamp files go
 
     """
     def __init__(self,commandlines : CommandlineGenerator,**kwargs) -> None :
@@ -1541,31 +2832,51 @@ class TaskGenerator():
         ## completion can probably go: the completion is set by the 
         ## specific taskclass
         self.workdir = kwargs.pop("workdir",None)
+        if ( layout := kwargs.pop("layout",None) ) is not None and self.workdir is not None:
+            workdir_layout(self.workdir,layout)
         taskmaxruntime = kwargs.pop("taskmaxruntime",0)
         self.completion = kwargs.pop\
             ("completion",lambda x:Completion\
              (taskid=x,
               taskmaxruntime=taskmaxruntime,workdir=self.workdir))
 
+        self.completionclass : Optional[Type[Completion]] = kwargs.pop("completionclass",None)
+
         self.taskcount = 0; self.paused = False
         self.debugs = kwargs.get("debug","")
         self.debug = re.search("task",self.debugs)
         self.skip : list[int] = kwargs.pop("skip",[])
-    def append(self,cmdline):
+        self.journal : Optional[QueueJournal] = kwargs.pop("journal",None)
+        # dependency graph: task ids per name, and named tasks that have not yet completed
+        self.named : dict[str,list[int]] = {}
+        self.unfinished : set[int] = set()
+        self.failed : set[int] = set()
+        # tasks waiting for a number of unfinished tasks, and the reverse edges
+        self.waiting : dict[int,Task] = {}
+        self.waitcount : dict[int,int] = {}
+        self.dependents : dict[int,list[int]] = {}
+        self.ready : collections.deque[Task] = collections.deque()
+        self.cancelled : list[Task] = []
+        self.nwaited = 0
+    def append(self,cmdline,**kwargs):
         """Append a Unix commandline to the task generator by 
         appending it to the commandline generator"""
-        self.commandlinegenerator.append(cmdline)
+        self.commandlinegenerator.append(cmdline,**kwargs)
     def finish(self):
         """Delegate this function to the commandline generator"""
         self.commandlinegenerator.finish()
     def stalling(self) -> bool :
-        """Delegate this function to the commandline generator"""
-        return self.commandlinegenerator.stalling()
+        """There is no ready task now: the commandline generator is stalling,
+        or the remaining tasks wait for running tasks"""
+        self.fill()
+        return len(self.ready)==0 and not self.stopping()
     def stopping(self) -> bool :
-        """Delegate this function to the commandline generator"""
-        return self.commandlinegenerator.stopping()
+        """The commandline generator is done, and no tasks are waiting"""
+        return len(self.ready)==0 and len(self.waiting)==0 \
+            and self.commandlinegenerator.stopping()
     def exhausted(self) -> bool :
-        return self.commandlinegenerator.exhausted()
+        return len(self.ready)==0 and len(self.waiting)==0 \
+            and self.commandlinegenerator.exhausted()
     def next(self,**kwargs) -> Task :
         """Deliver a Task object, or a special string:
 
@@ -1574,18 +2885,101 @@ class TaskGenerator():
         """
         if self.stalling() or self.stopping():
             raise LauncherException( "This case should not happen" )
-        comm : Commandline = self.commandlinegenerator.next()
+        return self.ready.popleft()
+    def fill(self) -> None :
+        """Take commandlines from the commandline generator until there is a task
+        that is ready to run, or until the generator has no more for now.
+        Tasks that have to wait for others are set aside, see ``retire``."""
+        generator = self.commandlinegenerator
+        while len(self.ready)==0 and not ( generator.stalling() or generator.stopping() ):
+            task = self.make_task( generator.next() )
+            if task.name!="":
+                self.named.setdefault(task.name,[]).append(task.taskid)
+                self.unfinished.add(task.taskid)
+            if len(task.after)==0:
+                self.ready.append(task); continue
+            unknown = [ n for n in task.after
+                        if n not in self.named and n not in generator.completed_names ]
+            if len(unknown)>0:
+                raise LauncherException\
+                    ( f"Task <<{task.command}>> comes after unknown name(s) {unknown}; "
+                      "names have to be defined on earlier commandlines" )
+            depends = set( [ d for n in task.after for d in self.named.get(n,[])
+                             if d!=task.taskid and ( d in self.unfinished or d in self.failed ) ] )
+            if len(depends & self.failed)>0:
+                self.cancel(task); continue
+            depends = depends & self.unfinished
+            if len(depends)==0:
+                self.ready.append(task); continue
+            DebugTraceMsg( lambda : f"task {task.taskid} waits for {CompactIntList(sorted(depends))}",
+                           self.debug,prefix="Task" )
+            for d in depends:
+                self.dependents.setdefault(d,[]).append(task.taskid)
+            self.waiting[task.taskid] = task; self.waitcount[task.taskid] = len(depends)
+            self.nwaited += 1
+            if self.journal is not None:
+                self.journal.record("queued",task)
+    def retire(self,tasks : list[Task],aborted=False) -> None :
+        """Report completed tasks, or aborted tasks if ``aborted`` is true.
+        Tasks that wait for them become ready, or are cancelled in the case of an abort."""
+        if len(self.unfinished)==0:
+            return
+        for t in tasks:
+            if t.taskid not in self.unfinished:
+                continue
+            self.unfinished.discard(t.taskid)
+            if aborted:
+                self.failed.add(t.taskid)
+            for d in self.dependents.pop(t.taskid,[]):
+                if d not in self.waiting:
+                    continue # cancelled before
+                if aborted:
+                    self.cancel( self.waiting[d] )
+                    continue
+                self.waitcount[d] -= 1
+                if self.waitcount[d]==0:
+                    del self.waitcount[d]
+                    self.ready.append( self.waiting.pop(d) )
+    def cancel(self,task : Task) -> None :
+        """Cancel a task because a task it depends on was aborted,
+        and likewise everything that depends on it."""
+        cancel = [ task ]
+        while len(cancel)>0:
+            t = cancel.pop()
+            DebugTraceMsg( lambda : f"cancelling task {t.taskid} <<{t.command}>>",self.debug,prefix="Task" )
+            self.waiting.pop(t.taskid,None); self.waitcount.pop(t.taskid,None)
+            self.cancelled.append(t)
+            if self.journal is not None:
+                self.journal.record("aborted",t)
+            if t.taskid in self.unfinished:
+                self.unfinished.discard(t.taskid); self.failed.add(t.taskid)
+            for d in self.dependents.pop(t.taskid,[]):
+                if d in self.waiting:
+                    cancel.append( self.waiting[d] )
+    def dependency_report(self) -> str :
+        """Number of tasks that waited for others, and that were cancelled; empty without dependencies"""
+        if self.nwaited==0 and len(self.cancelled)==0:
+            return ""
+        cancelled = CompactIntList( sorted( [ t.taskid for t in self.cancelled ] ) )
+        return f"""tasks waited for dependencies: {self.nwaited}
+tasks cancelled: {len(self.cancelled)} {cancelled}
+"""
+    def make_task(self,comm : Commandline,**kwargs) -> Task :
+        """Turn a commandline into a task with the next task id"""
         taskid : int = kwargs.get("imposedcount",self.taskcount) ## what does this do?
         self.taskcount += 1
         # if taskid in self.skip:
         #     return self.next(imposedcount=imposedcount)
         # else:
-        DebugTraceMsg(f"task generator next: id={taskid}",
+        DebugTraceMsg(lambda : f"task generator next: id={taskid}",
                       self.debug,prefix="Task")
+        taskargs = {}
+        if self.completionclass is not None:
+            taskargs["completionclass"] = self.completionclass
         return self.taskclass\
             ( comm,taskid=taskid,debug=self.debugs,
              workdir = self.workdir,
-             )
+             **taskargs )
     def __iter__(self): return self
 
 class WrappedTaskGenerator(TaskGenerator):
@@ -1626,13 +3020,249 @@ def environment_list():
             listcommand += "export %s=\"%s\"\n" % (e,val)
     return listcommand
 
+def environment_delta(snapshot : dict[str,str]) -> list[str] :
+    """Return the ``export`` and ``unset`` lines that take an environment
+    from a snapshot of ``os.environ`` to the current one; variables are
+    filtered as in ``environment_list``."""
+    lines = []
+    for e,val in os.environ.items():
+        if snapshot.get(e)!=val and not re.search("[; ()]",val) \
+           and not re.search("command-variables",val):
+            lines.append( "export %s=\"%s\"\n" % (e,val) )
+    lines.extend( [ f"unset {e}\n" for e in snapshot if e not in os.environ ] )
+    return lines
+
+def append_task_output(log,taskid : int,data : bytes) -> int :
+    """Append the output of a task to a log, opened for binary appending,
+    as a header line followed by the output; return the offset of the output.
+    (The worker agent has its own copy of this, see ``AGENT_SOURCE``.)"""
+    header = f"==> task {taskid}: {len(data)} bytes <==\n".encode()
+    log.seek(0,os.SEEK_END)
+    offset = log.tell()+len(header)
+    log.write(header+data+b"\n"); log.flush()
+    return offset
+
+class TaskOutputIndex():
+    """Index of the aggregated output of tasks, in the directory ``output`` of a workdir.
+
+    * The output of the tasks on a host goes in a log ``output/<host>.log``,
+      which has one segment per task: a header line ``==> task 12: 345 bytes <==``
+      and then the output. Only one process writes to each log.
+    * The file ``output/hosts`` lists the hosts, one per line.
+    * The file ``output/index`` has a record for each task at position ``taskid*recordsize``,
+      containing the number of the host plus one, zero if there is no output,
+      and the offset and length of the output in the log of that host.
+
+    So the output of any task is found with two reads; see ``TaskOutputReader``.
+
+    :param workdir: (required) the workdir
+    """
+    recordformat = "<qqq"
+    recordsize = struct.calcsize(recordformat)
+    def __init__(self,workdir) -> None :
+        self.directory = f"{workdir}/output"
+        os.makedirs(self.directory,exist_ok=True)
+        self.lock = threading.Lock()
+        self.hostnumbers : dict[str,int] = {}
+        if os.path.isfile(f"{self.directory}/hosts"):
+            with open(f"{self.directory}/hosts") as hosts:
+                for host in hosts.read().split():
+                    self.hostnumbers[host] = len(self.hostnumbers)
+        self.index = os.open( f"{self.directory}/index",os.O_RDWR|os.O_CREAT,0o666 )
+        self.recorded = 0
+    def logname(self,host) -> str :
+        return f"{self.directory}/{host}.log"
+    def record(self,host,taskid : int,offset : int,length : int) -> None :
+        """Record where the output of a task is"""
+        with self.lock:
+            if host not in self.hostnumbers:
+                self.hostnumbers[host] = len(self.hostnumbers)
+                with open(f"{self.directory}/hosts","a") as hosts:
+                    hosts.write(host+"\n")
+            os.pwrite( self.index,
+                       struct.pack(self.recordformat,self.hostnumbers[host]+1,offset,length),
+                       taskid*self.recordsize )
+            self.recorded += 1
+    def close(self) -> None :
+        os.close(self.index)
+
+class TaskOutputCollector():
+    """Read the output of tasks from pipes in a background thread;
+    when a pipe is closed, append the output to a log as one segment,
+    and record it in the index, see ``TaskOutputIndex``.
+    Output is kept in memory until then, which is fine for the many
+    small outputs that this is meant for.
+
+    :param logname: (required) the log, which only this collector writes to
+    :param record: (required) function of task id, offset, and length that records a segment
+    """
+    def __init__(self,logname,record) -> None :
+        self.log = open(logname,"ab")
+        self.record = record
+        self.selector = selectors.DefaultSelector()
+        # open pipes, with the task id and the output so far
+        self.buffers : dict[int,tuple[int,list[bytes]]] = {}
+        # pipes are registered by the thread itself, which is woken up for that
+        self.added : list[tuple[int,int]] = []
+        self.lock = threading.Condition()
+        self.wakeup_read,self.wakeup_write = os.pipe()
+        self.selector.register(self.wakeup_read,selectors.EVENT_READ)
+        self.segments = 0
+        threading.Thread(target=self.run,daemon=True).start()
+    def add(self,fd : int,taskid : int) -> None :
+        """Collect the output of a task from the read end of a pipe"""
+        with self.lock:
+            self.added.append( (fd,taskid) )
+        os.write(self.wakeup_write,b"x")
+    def run(self) -> None :
+        while True:
+            for key,mask in self.selector.select():
+                with self.lock:
+                    if key.fd==self.wakeup_read:
+                        os.read(self.wakeup_read,4096)
+                        for fd,taskid in self.added:
+                            self.buffers[fd] = (taskid,[])
+                            self.selector.register(fd,selectors.EVENT_READ)
+                        self.added = []
+                    elif key.fd in self.buffers:
+                        data = os.read(key.fd,65536)
+                        if data:
+                            self.buffers[key.fd][1].append(data)
+                        else:
+                            self.close(key.fd)
+    def close(self,fd : int) -> None :
+        """Write the output from a pipe as a segment; this is called with the lock held"""
+        try:
+            self.selector.unregister(fd)
+        except KeyError: pass
+        os.close(fd)
+        taskid,chunks = self.buffers.pop(fd)
+        data = b"".join(chunks)
+        self.record( taskid,append_task_output(self.log,taskid,data),len(data) )
+        self.segments += 1
+        self.lock.notify_all()
+    def flush(self,timeout : float = 10.) -> list[int] :
+        """Wait until all pipes are closed. After ``timeout`` seconds
+        write the output of pipes that are still open, presumably because
+        a task left a background process; return the task ids of those."""
+        with self.lock:
+            self.lock.wait_for( lambda : not self.added and not self.buffers,timeout=timeout )
+            for fd,taskid in self.added:
+                self.buffers[fd] = (taskid,[])
+            self.added = []
+            unfinished = sorted( [ taskid for taskid,chunks in self.buffers.values() ] )
+            for fd in list(self.buffers.keys()):
+                self.close(fd)
+            return unfinished
+
+class TaskOutputReader():
+    """Random access to the aggregated output of tasks, see ``TaskOutputIndex``.
+    This can be used while the launcher is still running.
+
+    :param workdir: (required) the workdir of the launcher run
+    """
+    def __init__(self,workdir) -> None :
+        self.directory = f"{workdir}/output"
+        if not os.path.isfile(f"{self.directory}/index"):
+            raise LauncherException( f"No aggregated task output in <<{workdir}>>" )
+        self.index = open(f"{self.directory}/index","rb")
+        self.hosts : list[str] = []
+        self.logs : dict[int,Any] = {}
+    def host(self,hostnumber : int) -> str :
+        if hostnumber>=len(self.hosts):
+            # more hosts may have been added since we last looked
+            with open(f"{self.directory}/hosts") as hosts:
+                self.hosts = hosts.read().split()
+        return self.hosts[hostnumber]
+    def locate(self,taskid : int) -> Optional[tuple[str,int,int]] :
+        """Return the host, offset, and length of the output of a task,
+        or None if there is none"""
+        self.index.seek( taskid*TaskOutputIndex.recordsize )
+        record = self.index.read( TaskOutputIndex.recordsize )
+        if len(record)<TaskOutputIndex.recordsize:
+            return None
+        hostnumber,offset,length = struct.unpack(TaskOutputIndex.recordformat,record)
+        if hostnumber==0:
+            return None
+        return self.host(hostnumber-1),offset,length
+    def output(self,taskid : int) -> Optional[bytes] :
+        """Return the output of a task, or None if there is none"""
+        location = self.locate(taskid)
+        if location is None:
+            return None
+        host,offset,length = location
+        if host not in self.logs:
+            self.logs[host] = open(f"{self.directory}/{host}.log","rb")
+        log = self.logs[host]
+        log.seek(offset)
+        return log.read(length)
+    def tasks(self) -> list[int] :
+        """Return the ids of all tasks that have output"""
+        self.index.seek(0)
+        records = self.index.read()
+        size = TaskOutputIndex.recordsize
+        return [ taskid for taskid in range(len(records)//size)
+                 if struct.unpack_from(TaskOutputIndex.recordformat,records,taskid*size)[0]>0 ]
+    def outputs(self,first : int,last : int) -> typing.Iterator[tuple[int,bytes]] :
+        """Yield the task id and output of the tasks from ``first`` to ``last`` inclusive
+        that have output"""
+        for taskid in range(first,last+1):
+            if ( data := self.output(taskid) ) is not None:
+                yield taskid,data
+    def close(self) -> None :
+        self.index.close()
+        for log in self.logs.values():
+            log.close()
+
+def task_output_main(arguments : list[str]) -> int :
+    """Command line interface to the ``TaskOutputReader``:
+
+    ``python -m pylauncher output WORKDIR [ TASKS ]``
+
+    where ``TASKS`` are task ids or ranges such as ``12`` or ``100-199``.
+    Without tasks, the ids of the tasks with output are listed.
+    The output of one task is printed as is; for more tasks,
+    each output is preceded by a header line.
+    """
+    if len(arguments)<1:
+        print( "Usage: python -m pylauncher output WORKDIR [ TASKS ]",
+               file=sys.stderr )
+        return 1
+    reader = TaskOutputReader(arguments[0])
+    if len(arguments)==1:
+        print( CompactIntList(reader.tasks()) )
+        return 0
+    ranges = []
+    for r in arguments[1:]:
+        first,_,last = r.partition("-")
+        ranges.append( ( int(first),int(last) if last else int(first) ) )
+    out = sys.stdout.buffer
+    if len(ranges)==1 and ranges[0][0]==ranges[0][1]:
+        data = reader.output(ranges[0][0])
+        if data is None:
+            print( f"No output for task {ranges[0][0]}",file=sys.stderr )
+            return 1
+        out.write(data)
+    else:
+        for first,last in ranges:
+            for taskid,data in reader.outputs(first,last):
+                out.write( f"==> task {taskid} <==\n".encode() )
+                out.write(data)
+    out.flush()
+    reader.close()
+    return 0
+
 class Executor():
     """Class for starting a commandline on some actual computing device.
 
     All derived classes need to define a ``execute`` method.
 
     :param catch_output: (keyword, optional, default=True) state whether command output gets caught, or just goes to stdout
-    :param workdir: required, directory for exec and out files
+    :param workdir: required, directory for out files, and exec files if requested
+    :param execfiles: (keyword, optional, default False) write each command to an exec file in the workdir, which is then executed; this is useful for debugging. By default the command is passed to the shell as an argument, see ``shell_arguments``.
+    :param shell: (keyword, optional, default ``/bin/bash``) shell that executes the commands
+    :param layout: (keyword, optional, default ``sharded``) where the exec and out files go in the workdir, see ``WorkdirLayout``; use ``flat`` for the layout of earlier versions
+    :param aggregate_output: (keyword, optional, default False) rather than an out file per task, collect the output in one log per host, with an index; see ``TaskOutputIndex``. This is only possible for executors that capture the output of the tasks themselves.
     :parame numa_ctl: (optional) numa binding. Only supported "core" for SSH executor.
     :param debug: (optional) string of debug modes; include "exec" to trace this class
 
@@ -1640,9 +3270,24 @@ class Executor():
     """
     execstring = "exec"
     outstring = "out"
+    reports_completion = False # see ``report_exit``
+    captures_output = False # see ``aggregate_output``
+    # longer commands go into an exec file: the kernel limits one argument to 128k
+    maxcommandlength = 100000
+    # changed environment variables that are exported per task, see ``environment_source``
+    maxoverrides = 20
     def __init__(self,**kwargs) -> None :
         self.debugs = kwargs.get("debug","")
         self.debug = re.search("exec",self.debugs)
+        self.exits : dict[int,Optional[int]] = {}
+        # called on every reported exit, see ``AsyncLauncherJob``
+        self.wakeup : Optional[typing.Callable[[],None]] = None
+        # the ``aexecute`` adapter can call ``execute`` from several threads
+        self.lock = threading.Lock()
+        # cached environment file, see ``environment_source``
+        self.envcount = 0; self.envfile : Optional[str] = None
+        self.envumask : Optional[int] = None; self.envsnapshot : dict[str,str] = {}
+        self.envsource = ""; self.envstale = False
         self.catch_output = kwargs.pop("catch_output",True)
         if self.catch_output:
             self.append_output = kwargs.pop("append_output",None)
@@ -1650,6 +3295,8 @@ class Executor():
         DebugTraceMsg(f"Executor catching out: {self.catch_output}, append: {self.append_output}",
                       self.debug,prefix="Exec")
         self.count = 0
+        self.execfiles = kwargs.pop("execfiles",False)
+        self.shell = kwargs.pop("shell","/bin/bash")
         self.numactl = kwargs.pop("numactl",None)
         if workdir := kwargs.pop("workdir",None):
             print( f"explicit workdir: <<{workdir}>>" )
@@ -1666,6 +3313,16 @@ class Executor():
                 os.mkdir(self.workdir)
         else:
             raise LauncherException("Executor needs explicit workdir")
+        self.layout = workdir_layout(self.workdir,kwargs.pop("layout",None))
+        self.taskoutput : Optional[TaskOutputIndex] = None
+        self.output_incomplete : list[int] = []
+        if kwargs.pop("aggregate_output",False):
+            if not self.captures_output:
+                raise LauncherException( f"{self.__class__.__name__} can not aggregate task output;"
+                                         " use spawn=True or agent=True" )
+            # no out files: the executor catches the output
+            self.catch_output = False; self.append_output = None
+            self.taskoutput = TaskOutputIndex(self.workdir)
     def workdir_is_safe(self):
         """Test that the working directory is (in) a subdirectory of the cwd"""
         here = os.getcwd(); os.chdir(self.workdir); there = os.getcwd(); os.chdir(here)
@@ -1673,27 +3330,75 @@ class Executor():
     def cleanup(self):
         if self.workdir_is_safe():
             shutil.rmtree(self.workdir)
+            forget_stamp_directory(self.workdir)
     def setup_on_node(self,node) -> None :
         return
+    def setup_on_nodes(self,nodes) -> set[str] :
+        """Set up on a list of nodes; return the set of hostnames where this failed.
+        By default this calls ``setup_on_node`` for each."""
+        for node in nodes:
+            self.setup_on_node(node)
+        return set()
     def release_from_node(self,node):
         return
     def end_execution(self):
         return
     def smallfilenames(self):
-        execfilename = f"{self.workdir}/{self.execstring}{self.count}"
-        execoutname  = f"{self.workdir}/{self.outstring}{self.count}"
+        with self.lock:
+            count = self.count
+            self.count += 1
+        execfilename = self.layout.filename(self.workdir,self.execstring,count)
+        execoutname  = self.layout.filename(self.workdir,self.outstring,count)
         if self.catch_output:
             if self.append_output is not None:
                 execoutname = self.append_output
+            else:
+                make_stamp_directory( os.path.dirname(execoutname) )
         else:
             execoutname = ""
-        self.count += 1
         return execfilename,execoutname
-    def wrap(self,command,prefix=""):
-        """Take a commandline, write it to a small file, and return the 
-        commandline that sources that file
-        """
+    def environment_source(self) -> str :
+        """Return the lines that reproduce the current environment for a task:
+        a line that sources a file in the workdir, see ``environment_list``,
+        followed by ``export`` and ``unset`` lines for the variables
+        that have changed since that file was written, see ``environment_delta``.
+
+        The file is written the first time. After that, ``os.environ`` is only
+        compared to it after a call of ``refresh_environment``, so this costs nothing per task.
+        A new file is written if the umask has changed, or if more than ``maxoverrides``
+        variables have changed; running tasks keep sourcing the file they started with."""
+        global umask
+        with self.lock:
+            if self.envfile is None or self.envumask!=umask:
+                self.write_environment()
+            elif self.envstale:
+                self.envstale = False
+                overrides = environment_delta(self.envsnapshot)
+                if len(overrides)>self.maxoverrides:
+                    self.write_environment()
+                else:
+                    self.envsource = f". {shlex.quote(self.envfile)}\n"+"".join(overrides)
+            return self.envsource
+    def refresh_environment(self) -> None :
+        """Tell the executor that ``os.environ`` may have changed,
+        so that the next task gets the changes, see ``environment_source``"""
+        self.envstale = True
+    def write_environment(self) -> None :
+        # write a new environment file, see ``environment_source``
+        global umask
+        envfile = f"{self.workdir}/environment{self.envcount}.sh"
+        self.envcount += 1
+        DebugTraceMsg( lambda : f"writing environment to <<{envfile}>>",self.debug,prefix="Exec")
+        with open(envfile+".tmp","w") as f:
+            f.write( environment_list() )
+        os.replace(envfile+".tmp",envfile)
+        self.envfile = envfile; self.envsource = f". {shlex.quote(envfile)}\n"
+        self.envumask = umask; self.envsnapshot = dict(os.environ); self.envstale = False
+    def write_execfile(self,command) -> tuple[str,str] :
+        """Write a commandline to a small file; return the names of that file
+        and of the file that is to catch its output"""
         execfilename,execoutname = self.smallfilenames()
+        make_stamp_directory( os.path.dirname(execfilename) )
         if os.path.isfile(execfilename):
             raise LauncherException("exec file already exists <<%s>>" % execfilename)
         f = open(execfilename,"w")
@@ -1702,47 +3407,219 @@ class Executor():
         os.chmod(execfilename,stat.S_IXUSR++stat.S_IXGRP+stat.S_IXOTH+\
                      stat.S_IWUSR++stat.S_IWGRP+stat.S_IWOTH+\
                      stat.S_IRUSR++stat.S_IRGRP+stat.S_IROTH)
+        return execfilename,execoutname
+    def shell_arguments(self,command,prefix="") -> tuple[list[str],str] :
+        """Return the argument list that executes a commandline with the ``shell``,
+        and the name of the file that is to catch its output.
+        The commandline is an argument of ``shell -c``, so that no file needs to be written;
+        only with the ``execfiles`` option, or if the commandline is too long
+        for one argument, it is written to an exec file, see ``write_execfile``.
+
+        :param prefix: (optional) prefix of the shell, such as ``numactl -C 0-3 ``, or a variable assignment such as ``CUDA_VISIBLE_DEVICES=0 ``, which is executed through ``env``
+        """
+        prefixwords = shlex.split(prefix)
+        if len(prefixwords)>0 and "=" in prefixwords[0]:
+            prefixwords = [ "env" ]+prefixwords
+        if self.execfiles or len(command)>self.maxcommandlength:
+            execfilename,execoutname = self.write_execfile(command)
+            return prefixwords+[ self.shell,execfilename ],execoutname
+        execfilename,execoutname = self.smallfilenames()
+        return prefixwords+[ self.shell,"-c",command ],execoutname
+    def numa_prefix(self,pool : HostLocator) -> str :
+        """The prefix that binds a task to its cores or gpus, according to the ``numactl`` option,
+        see ``shell_arguments``; this is empty if that option is not given."""
+        if self.numactl is None:
+            return ""
+        elif self.numactl=="core":
+            return "numactl -C %s " % pool.first_range()
+        elif self.numactl=="gpu":
+            first_host : Node = pool[0]
+            return "CUDA_VISIBLE_DEVICES=%s " % first_host.host_dict['task_loc']
+        else:
+            raise LauncherException("Unknown numactl: %s" % self.numactl)
+    def wrap(self,command,prefix=""):
+        """Take a commandline, and return a commandline that executes it
+        with the output caught, see ``shell_arguments``.
+        """
+        arguments,execoutname = self.shell_arguments(command)
+        execline = " ".join( [ shlex.quote(a) for a in arguments ] )
         if self.catch_output:
             if self.append_output is not None:
                 pipe = ">>"
             else: 
                 pipe = ">"
-            wrappedcommand = "%s %s %s 2>&1" % (execfilename,pipe,execoutname)
+            wrappedcommand = "%s %s %s 2>&1" % (execline,pipe,execoutname)
         else:
-            wrappedcommand = execfilename
+            wrappedcommand = execline
         wrappedcommand = prefix+wrappedcommand
-        DebugTraceMsg("commandline <<%s>>" % wrappedcommand,
-                      self.debug,prefix="Exec")
+        DebugTraceMsg( lambda : "commandline <<%s>>" % wrappedcommand,
+                       self.debug,prefix="Exec")
         return wrappedcommand
     def execute(self,usercommand : str,pool: HostLocator,**kwargs) -> None :
         raise LauncherException("Should not call default execute")
+    def report_exit(self,taskid : int,status : Optional[int]) -> None :
+        """Record that a task has exited. Executors that know when their
+        tasks end call this, and set ``reports_completion``, so that
+        tasks get an ``ExecutorCompletion`` instead of a stamp file.
+        A status of None means that the task is gone, but its exit status is not known."""
+        DebugTraceMsg( lambda : f"task {taskid} exited with status {status}",
+                       self.debug,prefix="Exec")
+        self.exits[taskid] = status
+        if self.wakeup is not None:
+            self.wakeup()
+    def has_exited(self,taskid : int) -> bool :
+        return taskid in self.exits
+    def exit_status(self,taskid : int) -> Optional[int] :
+        return self.exits.get(taskid)
+    def forget_exit(self,taskid : int) -> None :
+        self.exits.pop(taskid,None)
+    def poll(self) -> None :
+        """Executors that need to actively look for exited tasks do that here;
+        this is called before every completion scan."""
+        return
+    def flush_output(self) -> None :
+        """Executors that aggregate task output write all of it here;
+        this is called at the end of a run."""
+        return
+    def output_report(self) -> str :
+        """Summary of the aggregated task output, if any"""
+        if self.taskoutput is None:
+            return ""
+        report = f"task output: {self.taskoutput.recorded} tasks in {self.taskoutput.directory}\n"
+        if len(self.output_incomplete)>0:
+            report += f" .. possibly incomplete: {CompactIntList(self.output_incomplete)}\n"
+        return report
+    def final_report(self) -> str :
+        return self.output_report()
     def terminate(self) -> None :
         DebugTraceMsg("base executor terminate (no-op)",self.debug,prefix="Exec")
+    async def aexecute(self,usercommand : str,pool : HostLocator,**kwargs) -> None :
+        """Coroutine version of ``execute``, used by the ``AsyncLauncherJob``.
+        By default this runs the blocking ``execute`` in a worker thread of the event loop,
+        so that every executor can be used; executors that do not block
+        can override this."""
+        await asyncio.get_running_loop().run_in_executor\
+            ( None,functools.partial(self.execute,usercommand,pool,**kwargs) )
+    async def aterminate(self) -> None :
+        """Coroutine version of ``terminate``"""
+        await asyncio.get_running_loop().run_in_executor( None,self.terminate )
 
 class LocalExecutor(Executor):
     """Execute a commandline locally, in the background.
 
-    :param prefix: (keyword, optional, default null string) for recalcitrant shells, the possibility to specify '/bin/sh' or so
+    :param prefix: (keyword, optional, default null string) for recalcitrant shells, the possibility to specify '/bin/sh' or so; this is used as the ``shell``
     """
     def __init__(self,**kwargs) -> None :
         self.prefix = kwargs.pop("prefix","")
+        if self.prefix.strip():
+            kwargs["shell"] = kwargs.get("shell",self.prefix.strip())
         Executor.__init__(self,**kwargs)
         DebugTraceMsg("Created local Executor",self.debug,prefix="Exec")
     def execute(self,usercommand : str,pool: HostLocator,**kwargs) -> None:
         wrapped = self.wrap(usercommand)
-        fullcommandline = "%s%s & " % (self.prefix,wrapped)
-        DebugTraceMsg("subprocess execution of:\n<<%s>>" % fullcommandline,
+        fullcommandline = "%s & " % wrapped
+        DebugTraceMsg(lambda : "subprocess execution of:\n<<%s>>" % fullcommandline,
                       self.debug,prefix="Exec")
         p = subprocess.Popen(fullcommandline,shell=True,env=os.environ,
                              stderr=subprocess.STDOUT)
         # !!! why that os.environ and the env prefix?
 
-def ssh_client(host,debug=False):
+class ChildProcessExecutor(Executor):
+    """Execute a commandline locally as a direct child process,
+    without a background shell. The shell is started by ``posix_spawn``
+    with its output redirected, and children are reaped in ``poll``,
+    which records the exit status, running time, and resource usage.
+    Since this executor knows when tasks exit, no stamp files are needed.
+
+    For the parameters, see the Executor class.
+    """
+    reports_completion = True
+    captures_output = True
+    def __init__(self,**kwargs) -> None :
+        Executor.__init__(self,**kwargs)
+        self.children : dict[int,tuple[int,float]] = {} # pid -> taskid,starttime
+        # totals over the reaped children, for the final report;
+        # the exit status of a task is forgotten once the task is retired
+        self.reaped = 0; self.nonzero : set[int] = set(); self.unknown : set[int] = set()
+        self.utime = 0.; self.stime = 0.; self.maxrss = 0
+        self.collector : Optional[TaskOutputCollector] = None
+        if self.taskoutput is not None:
+            host = HostName(); taskoutput = self.taskoutput
+            self.collector = TaskOutputCollector\
+                ( taskoutput.logname(host),
+                  lambda taskid,offset,length : taskoutput.record(host,taskid,offset,length) )
+        DebugTraceMsg("Created child process Executor",self.debug,prefix="Exec")
+    def execute(self,usercommand : str,pool: HostLocator,**kwargs) -> None:
+        """Spawn the shell for a command; the ``id`` keyword, the task id, is required.
+        As with the ssh executors, the ``prefix`` keyword of the task, which is for ``ibrun``,
+        is not used; the shell is prefixed with the ``numactl`` binding instead."""
+        taskid = kwargs.pop("id"); kwargs.pop("prefix",None)
+        arguments,execoutname = self.shell_arguments(usercommand,prefix=self.numa_prefix(pool))
+        actions : list[tuple] = [ (os.POSIX_SPAWN_OPEN,0,"/dev/null",os.O_RDONLY,0) ]
+        if self.catch_output:
+            mode = os.O_APPEND if self.append_output is not None else os.O_TRUNC
+            actions += [ (os.POSIX_SPAWN_OPEN,1,execoutname,os.O_WRONLY|os.O_CREAT|mode,0o666),
+                         (os.POSIX_SPAWN_DUP2,1,2) ]
+        elif self.collector is not None:
+            # the pipe descriptors are not inherited, only their copies as stdout and stderr
+            readend,writeend = os.pipe()
+            actions += [ (os.POSIX_SPAWN_DUP2,writeend,1),(os.POSIX_SPAWN_DUP2,1,2) ]
+        pid = os.posix_spawnp( arguments[0],arguments,os.environ,file_actions=actions )
+        if self.collector is not None:
+            os.close(writeend)
+            self.collector.add(readend,taskid)
+        DebugTraceMsg( lambda : f"spawned task {taskid} as pid {pid}: {arguments}",
+                       self.debug,prefix="Exec")
+        self.children[pid] = (taskid,time.time())
+    async def aexecute(self,usercommand : str,pool : HostLocator,**kwargs) -> None :
+        """Spawning does not block, and ``poll`` has to know every child,
+        so this executes directly, not in a worker thread."""
+        self.execute(usercommand,pool,**kwargs)
+    def poll(self) -> None :
+        """Reap the children of this executor that have exited, without blocking.
+        Each spawned pid is waited for by itself, so that other children
+        of the launcher process are left alone."""
+        for pid in list(self.children.keys()):
+            try:
+                waited,status,rusage = os.wait4(pid,os.WNOHANG)
+            except ChildProcessError:
+                # reaped by someone else, so the exit status is not known
+                taskid,starttime = self.children.pop(pid)
+                self.unknown.add(taskid)
+                self.report_exit(taskid,None)
+                continue
+            if waited==0:
+                continue
+            taskid,starttime = self.children.pop(pid)
+            exitcode = os.waitstatus_to_exitcode(status)
+            self.reaped += 1
+            if exitcode!=0:
+                self.nonzero.add(taskid)
+            self.utime += rusage.ru_utime; self.stime += rusage.ru_stime
+            self.maxrss = max(self.maxrss,rusage.ru_maxrss)
+            self.report_exit(taskid,exitcode)
+    def flush_output(self) -> None :
+        if self.collector is not None:
+            self.output_incomplete += self.collector.flush()
+    def final_report(self) -> str :
+        """Summary of exit codes and resource usage of the tasks"""
+        if self.reaped==0 and len(self.unknown)==0:
+            return self.output_report()
+        nonzero = sorted(self.nonzero)
+        report = f"""child processes reaped: {self.reaped}
+ .. nonzero exit status: {len(nonzero)} {CompactIntList(nonzero)}
+"""
+        if len(self.unknown)>0:
+            report += f" .. exit status unknown: {len(self.unknown)} {CompactIntList(sorted(self.unknown))}\n"
+        return report + f""" .. user time: {self.utime:.2f}, system time: {self.stime:.2f}, max rss: {self.maxrss} kB
+""" + self.output_report()
+
+def ssh_client(host,debug=False,timeout=None):
     ssh = paramiko.SSHClient()
     ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     if debug:
         print("Create paramiko ssh client to",host,flush=True)
-    ssh.connect(host)
+    ssh.connect(host,timeout=timeout,banner_timeout=timeout,auth_timeout=timeout)
     return ssh
 
 class SSHExecutor(Executor):
@@ -1758,10 +3635,16 @@ class SSHExecutor(Executor):
     Note: environment variables with a space, semicolon, or parentheses
     are not transferred.
 
-    For parameters, see the Executor class.
+    :param connect_width: (keyword, optional, default 32) number of ssh connections that are set up concurrently
+    :param connect_timeout: (keyword, optional, default 30) seconds to wait for a host to connect
+
+    For other parameters, see the Executor class.
     """
     def __init__(self,**kwargs) -> None :
         self.node_client_dict : dict[str,Any] = {}
+        self.connect_width = int( kwargs.pop("connect_width",32) )
+        self.connect_timeout = kwargs.pop("connect_timeout",30)
+        self.connect_latency : dict[str,float] = {}
         Executor.__init__(self,**kwargs)
         self.timeout = kwargs.get("timeout",None)
         self.debug_ssh = re.search("ssh",self.debugs)
@@ -1770,7 +3653,7 @@ class SSHExecutor(Executor):
         host = node.host_dict['host']
         DebugTraceMsg( f"Set up connection to {host}",self.debug_ssh,prefix="SSH")
         if host in self.node_client_dict:
-            DebugTraceMsg( f" .. reusing ssh client to host: {host}",
+            DebugTraceMsg( lambda : f" .. reusing ssh client to host: {host}",
                            self.debug_ssh,prefix="SSH")
             node.ssh_client = self.node_client_dict[host]
             node.ssh_client_unique = False
@@ -1783,6 +3666,44 @@ class SSHExecutor(Executor):
                 print( f"\nParamiko could not create ssh client to {host}\n",flush=True)
             node.ssh_client_unique = True
             self.node_client_dict[host] = node.ssh_client
+    def setup_on_nodes(self,nodes) -> set[str] :
+        """Connect to the hosts of a list of nodes concurrently,
+        ``connect_width`` at a time; report the connection time per host,
+        and return the set of hosts that could not be connected to."""
+        hosts = [ h for h in dict.fromkeys( [ n.host_dict['host'] for n in nodes ] )
+                  if h not in self.node_client_dict ]
+        def connect(host):
+            start = time.time()
+            try:
+                client = ssh_client(host,debug=self.debug_ssh,timeout=self.connect_timeout)
+            except Exception as e:
+                return host,None,time.time()-start,e
+            return host,client,time.time()-start,None
+        start = time.time(); failed : set[str] = set()
+        width = max( 1,min(self.connect_width,len(hosts)) )
+        with concurrent.futures.ThreadPoolExecutor(max_workers=width) as pool:
+            for host,client,latency,error in pool.map(connect,hosts):
+                self.connect_latency[host] = latency
+                if client is None:
+                    print( f"Could not connect to {host} after {latency:.2f} sec: {error}",flush=True )
+                    failed.add(host)
+                else:
+                    DebugTraceMsg( f"connected to {host} in {latency:.2f} sec",
+                                   self.debug_ssh,prefix="SSH")
+                    self.node_client_dict[host] = client
+        if len(hosts)>0:
+            slowest = max( hosts,key=lambda h:self.connect_latency[h] )
+            print( f"Connected to {len(hosts)-len(failed)} out of {len(hosts)} hosts in {time.time()-start:.2f} sec"
+                   f", slowest: {slowest} {self.connect_latency[slowest]:.2f} sec",flush=True )
+        # the first node on each host owns the connection
+        unique : set[str] = set()
+        for node in nodes:
+            host = node.host_dict['host']
+            if host in failed: continue
+            node.ssh_client = self.node_client_dict[host]
+            node.ssh_client_unique = host in hosts and host not in unique
+            unique.add(host)
+        return failed
     def release_from_node(self,node):
         if node.ssh_client_unique:
             node.ssh_client.close()
@@ -1791,7 +3712,7 @@ class SSHExecutor(Executor):
         Execute a commandline in the background on the ssh_client object
         in this Executor object.
 
-        * usercommand gets the environment prefixed to it
+        * usercommand gets the sourcing of the environment file prefixed to it
         * result is wrapped with Executor.wrap
 
         :param pool: (required) either a Node or HostLocator
@@ -1799,20 +3720,11 @@ class SSHExecutor(Executor):
         # if isinstance(pool,(Node)):
         #     hostname = pool.hostname
         hostname : str = pool.firsthost()
-        if self.numactl is None:
-            exec_prefix = ""
-        elif self.numactl=="core":
-            cores = pool.first_range()
-            exec_prefix = "numactl -C %s " % cores
-        elif self.numactl=="gpu":
-            first_host : Node = pool[0]
-            exec_prefix = "CUDA_VISIBLE_DEVICES=%s " % first_host.host_dict['task_loc']
-        else:
-            raise LauncherException("Unknown numactl: %s" % self.numactl)
+        exec_prefix = self.numa_prefix(pool)
         # construct the command line with environment, workdir and expiration
-        env_line = environment_list()
+        env_line = self.environment_source()
         wrapped_line = self.wrap(env_line+usercommand+"\n",prefix=exec_prefix)
-        DebugTraceMsg("Executing << ( %s ) & >> on <<%s>>" % (wrapped_line,hostname),
+        DebugTraceMsg(lambda : "Executing << ( %s ) & >> on <<%s>>" % (wrapped_line,hostname),
                       self.debug,prefix="SSH")
         ssh = self.node_client_dict[hostname]
         try:
@@ -1826,6 +3738,204 @@ class SSHExecutor(Executor):
         self.session.send('\x03')
         self.session.close()
 
+## Source of the worker agent that ``SSHAgentExecutor`` starts on each host.
+## It reads one JSON message per line from stdin:
+## {"op":"run","id":..,"args":[..],"out":..,"append":..,"log":..} or {"op":"exit"},
+## where the arguments are spawned directly, see ``Executor.shell_arguments``,
+## with the output going to the out file, if given, or else to the log, if given;
+## it writes one JSON message per line to stdout:
+## {"event":"started","id":..,"pid":..} or {"event":"exit","id":..,"status":..},
+## and, if the run message had a log, {"event":"output","id":..,"offset":..,"length":..}
+## once the output of the task is appended to that log, see ``TaskOutputCollector``.
+AGENT_SOURCE = """
+import json,os,selectors,sys,threading
+lock = threading.Condition(); outlock = threading.Lock(); children = {}
+devnull = [ (os.POSIX_SPAWN_OPEN,0,"/dev/null",os.O_RDONLY,0),
+            (os.POSIX_SPAWN_OPEN,1,"/dev/null",os.O_WRONLY,0),
+            (os.POSIX_SPAWN_DUP2,1,2) ]
+def send(msg):
+    with outlock:
+        sys.stdout.write(json.dumps(msg)+"\\n"); sys.stdout.flush()
+def reap():
+    while True:
+        with lock:
+            while not children: lock.wait()
+        try: pid,status = os.wait()
+        except ChildProcessError: continue
+        with lock: taskid = children.pop(pid,None)
+        if taskid is not None:
+            send({"event":"exit","id":taskid,"status":os.waitstatus_to_exitcode(status)})
+selector = selectors.DefaultSelector(); buffers = {}; added = []; logs = {}
+wakeup = os.pipe(); selector.register(wakeup[0],selectors.EVENT_READ)
+def collect():
+    while True:
+        for key,mask in selector.select():
+            if key.fd==wakeup[0]:
+                os.read(key.fd,4096)
+                with lock:
+                    for fd,taskid,logname in added:
+                        buffers[fd] = (taskid,logname,[]); selector.register(fd,selectors.EVENT_READ)
+                    added.clear()
+                continue
+            data = os.read(key.fd,65536)
+            if data:
+                buffers[key.fd][2].append(data); continue
+            selector.unregister(key.fd); os.close(key.fd)
+            taskid,logname,chunks = buffers.pop(key.fd); data = b"".join(chunks)
+            if logname not in logs: logs[logname] = open(logname,"ab")
+            log = logs[logname]; header = ("==> task %d: %d bytes <==\\n" % (taskid,len(data))).encode()
+            log.seek(0,2); offset = log.tell()+len(header)
+            log.write(header+data+b"\\n"); log.flush()
+            send({"event":"output","id":taskid,"offset":offset,"length":len(data)})
+threading.Thread(target=reap,daemon=True).start()
+threading.Thread(target=collect,daemon=True).start()
+for line in sys.stdin:
+    msg = json.loads(line)
+    if msg["op"]=="exit": break
+    with lock:
+        actions = devnull; collect_log = "out" not in msg and "log" in msg
+        if "out" in msg:
+            mode = os.O_APPEND if msg.get("append") else os.O_TRUNC
+            actions = devnull[:1]+[ (os.POSIX_SPAWN_OPEN,1,msg["out"],os.O_WRONLY|os.O_CREAT|mode,0o666),
+                                    (os.POSIX_SPAWN_DUP2,1,2) ]
+        elif collect_log:
+            readend,writeend = os.pipe()
+            actions = devnull[:1]+[ (os.POSIX_SPAWN_DUP2,writeend,1),(os.POSIX_SPAWN_DUP2,1,2) ]
+        pid = os.posix_spawnp(msg["args"][0],msg["args"],os.environ,file_actions=actions,setsid=True)
+        children[pid] = msg["id"]; lock.notify()
+        if collect_log:
+            os.close(writeend); added.append( (readend,msg["id"],msg["log"]) )
+    if collect_log: os.write(wakeup[1],b"x")
+    send({"event":"started","id":msg["id"],"pid":pid})
+"""
+
+class WorkerAgent():
+    """The launcher side of a worker agent on one host: commands are sent
+    as messages, and a thread reads the start and exit events,
+    which are passed to the ``report_exit`` method of the executor.
+
+    :param hostname: name of the host, for tracing
+    :param send: function that sends bytes to the agent
+    :param events: file object from which the agent's messages are read
+    :param executor: Executor to report exits to
+    """
+    def __init__(self,hostname,send,events,executor,**kwargs) -> None :
+        self.hostname = hostname
+        self.send = send; self.events = events; self.executor = executor
+        self.debug = kwargs.get("debug",False)
+        # the submitted tasks that have not exited; this is guarded by the ``sendlock``
+        self.running : set[int] = set()
+        self.alive = True
+        self.sendlock = threading.Lock()
+        self.listener = threading.Thread(target=self.listen,daemon=True)
+        self.listener.start()
+    def submit(self,taskid : int,arguments : list[str],**kwargs) -> None :
+        """Tell the agent to spawn a command, given as an argument list.
+
+        :param out: (keyword, optional) file that catches the output of the command
+        :param append: (keyword, optional, default False) append to the out file, rather than truncating it
+        :param log: (keyword, optional) if there is no out file, the agent appends the output of the command to this log
+        """
+        msg : dict[str,Any] = {"op":"run","id":taskid,"args":arguments}
+        if out := kwargs.pop("out",None):
+            msg["out"] = out; msg["append"] = kwargs.pop("append",False)
+        if ( log := kwargs.pop("log",None) ) is not None:
+            msg["log"] = log
+        with self.sendlock:
+            self.running.add(taskid)
+            self.send( (json.dumps(msg)+"\n").encode() )
+    def listen(self) -> None :
+        for line in self.events:
+            if isinstance(line,bytes):
+                line = line.decode()
+            msg = json.loads(line)
+            if msg["event"]=="started":
+                DebugTraceMsg( lambda : f"agent on {self.hostname} started task {msg['id']} as pid {msg['pid']}",
+                               self.debug,prefix="SSH")
+            elif msg["event"]=="exit":
+                with self.sendlock:
+                    self.running.discard(msg["id"])
+                self.executor.report_exit(msg["id"],msg["status"])
+            elif msg["event"]=="output":
+                self.executor.report_output(self.hostname,msg["id"],msg["offset"],msg["length"])
+        self.alive = False
+        with self.sendlock:
+            running = sorted(self.running)
+        if len(running)>0:
+            print( f"Worker agent on {self.hostname} ended with tasks running: {running}",
+                   flush=True )
+    def stop(self) -> None :
+        """Tell the agent to stop accepting commands; running commands are not killed"""
+        if self.alive:
+            try:
+                self.send( (json.dumps( {"op":"exit"} )+"\n").encode() )
+            except: pass
+
+class SSHAgentExecutor(SSHExecutor):
+    """An SSHExecutor that does not start a remote shell for each task,
+    but starts one ``WorkerAgent`` per host, over the existing ssh connection,
+    the first time a task is executed on that host.
+    The agent reports when tasks exit, so completion does not need stamp files.
+
+    :param agentpython: (keyword, optional, default ``python3``) the python on the compute nodes; this needs to be 3.9 or later
+
+    For other parameters, see the SSHExecutor class.
+    """
+    reports_completion = True
+    captures_output = True
+    def __init__(self,**kwargs) -> None :
+        self.agentpython = kwargs.pop("agentpython","python3")
+        self.agents : dict[str,WorkerAgent] = {}
+        # tasks whose output the agents have not yet reported, see ``aggregate_output``
+        self.output_pending : set[int] = set()
+        self.output_written = threading.Condition()
+        SSHExecutor.__init__(self,**kwargs)
+    def agent(self,hostname) -> WorkerAgent :
+        """Return the agent on a host, starting it if needed"""
+        with self.lock:
+            if hostname not in self.agents or not self.agents[hostname].alive:
+                DebugTraceMsg( f"starting worker agent on {hostname}",self.debug_ssh,prefix="SSH")
+                channel = self.node_client_dict[hostname].get_transport().open_session()
+                channel.exec_command( f"{self.agentpython} -u -c {shlex.quote(AGENT_SOURCE)}" )
+                self.agents[hostname] = WorkerAgent\
+                    ( hostname,channel.sendall,channel.makefile("r"),self,debug=self.debug_ssh )
+            return self.agents[hostname]
+    def execute(self,usercommand : str,pool : HostLocator, **kwargs) -> None:
+        """Execute a commandline through the agent on the first host of the pool.
+        The ``id`` keyword, the task id, is required."""
+        taskid = kwargs.pop("id")
+        hostname : str = pool.firsthost()
+        # as in SSHExecutor, the only prefix is for numa control
+        exec_prefix = self.numa_prefix(pool)
+        # the agent spawns the shell itself, with the output redirected
+        arguments,execoutname = self.shell_arguments\
+            ( self.environment_source()+usercommand+"\n",prefix=exec_prefix )
+        DebugTraceMsg( lambda : f"Executing <<{arguments}>> through agent on <<{hostname}>>",
+                       self.debug,prefix="SSH")
+        if self.taskoutput is None:
+            self.agent(hostname).submit( taskid,arguments,out=execoutname,
+                                         append=self.append_output is not None )
+        else:
+            with self.output_written:
+                self.output_pending.add(taskid)
+            self.agent(hostname).submit(taskid,arguments,log=self.taskoutput.logname(hostname))
+    def report_output(self,hostname,taskid : int,offset : int,length : int) -> None :
+        """Record that an agent has written the output of a task"""
+        if self.taskoutput is None: return
+        self.taskoutput.record(hostname,taskid,offset,length)
+        with self.output_written:
+            self.output_pending.discard(taskid)
+            self.output_written.notify_all()
+    def flush_output(self,timeout : float = 10.) -> None :
+        """Wait for the agents to write the output of all tasks"""
+        with self.output_written:
+            self.output_written.wait_for( lambda : not self.output_pending,timeout=timeout )
+            self.output_incomplete += sorted(self.output_pending)
+    def terminate(self) -> None :
+        for agent in self.agents.values():
+            agent.stop()
+        SSHExecutor.terminate(self)
+
 class SubmitExecutor(Executor):
     """Execute a commandline by wrapping it in a slurm script
     Not elegant: we have to specify BareCompletion both here
@@ -1849,7 +3959,7 @@ f"""#!/bin/bash
 {command_and_stamp}
 """)
         fullcommandline = f"sbatch {self.submitparams} {scriptname}"
-        DebugTraceMsg("subprocess execution of:\n<<%s>>" % fullcommandline,
+        DebugTraceMsg(lambda : "subprocess execution of:\n<<%s>>" % fullcommandline,
                       self.debug,prefix="Exec")
         p = subprocess.Popen(fullcommandline,shell=True,env=os.environ,
                              stderr=subprocess.STDOUT)
@@ -1892,7 +4002,7 @@ class MPIExecutor(Executor):
             for machine in machinelist:
                 myhostfile.write(machine+'\n')
         full_commandline = "mpirun -np {0} {1} {2} {3} ".format(np,self.hfswitch,os.path.join(self.workdir,hostfilename+str(hostfilenumber)),self.wrap(usercommand))
-        DebugTraceMsg("executed commandline: <<%s>>" % full_commandline, self.debug,prefix="Exec")
+        DebugTraceMsg(lambda : "executed commandline: <<%s>>" % full_commandline, self.debug,prefix="Exec")
         p = subprocess.Popen(full_commandline,shell=True,stdout=stdout)
         self.popen_object = p
     def terminate(self):
@@ -1969,7 +4079,7 @@ class MpiexecExecutor(Executor):
         full_commandline \
             =  "mpiexec -n %d %s" % \
                (pool.extent,wrapped_command)
-        DebugTraceMsg("executed commandline: <<%s>>" % str(full_commandline),
+        DebugTraceMsg(lambda : "executed commandline: <<%s>>" % str(full_commandline),
                       self.debug,prefix="Exec")
         p = subprocess.Popen(full_commandline,
                              shell=True,
@@ -1983,6 +4093,40 @@ class MpiexecExecutor(Executor):
         Executor.terminate()
         DebugTraceMsg(" .. ibrun executor terminated",self.debug,prefix="Exec")
 
+class RetryPolicy():
+    """When and how often a task that fails, that is, that exits with a nonzero status,
+    is run again in the same run. Between attempts the task waits, without
+    holding up other tasks, for a time that increases with every attempt.
+    Tasks that are aborted because of the ``taskmaxruntime`` are not run again.
+
+    :param retries: (keyword, optional, default 0) number of times a failed task is run again; a commandline can set its own number with the ``retries`` option, see ``Commandline``
+    :param backoff: (keyword, optional, default 0) seconds to wait before the first retry
+    :param backofffactor: (keyword, optional, default 2) every next retry waits this many times longer
+    :param maxbackoff: (keyword, optional, default 3600) the longest wait
+    :param exitcodes: (keyword, optional) exit codes for which a task is retried; default is all nonzero codes
+    """
+    def __init__(self,**kwargs) -> None :
+        self.retries = int( kwargs.pop("retries",0) )
+        self.backoff = float( kwargs.pop("backoff",0) )
+        self.backofffactor = float( kwargs.pop("backofffactor",2) )
+        self.maxbackoff = float( kwargs.pop("maxbackoff",3600) )
+        exitcodes = kwargs.pop("exitcodes",None)
+        self.exitcodes : Optional[set[int]] = None if exitcodes is None else set(exitcodes)
+        if len(kwargs)>0:
+            raise LauncherException( f"Unknown retry policy options: {list(kwargs.keys())}" )
+    def delay(self,task : Task,status : int) -> Optional[float] :
+        """The number of seconds after which a task that failed with some status
+        is to be run again, or None if it is not to be run again"""
+        retries = self.retries if task.retries is None else task.retries
+        if task.attempt>retries:
+            return None
+        if self.exitcodes is not None and status not in self.exitcodes:
+            return None
+        return min( self.backoff*self.backofffactor**(task.attempt-1),self.maxbackoff )
+    def __str__(self) -> str :
+        codes = "all nonzero" if self.exitcodes is None else CompactIntList(sorted(self.exitcodes))
+        return f"{self.retries} retries, backoff {self.backoff}*{self.backofffactor}^n sec, exit codes: {codes}"
+
 class LauncherJob():
     """LauncherJob class. Keyword arguments:
 
@@ -1992,7 +4136,19 @@ class LauncherJob():
     :param debug: list of keywords (optional)
     :param gather_output: (keyword, optional, default None) filename to gather all command output
     :param maxruntime: (keyword, optional, default zero) if nonzero, maximum running time in seconds
+    :param eventdriven: (keyword, optional, default False) use ``event_step`` instead of ``tick``: all completions and new commandlines are processed as they come in, and the job only sleeps when there is nothing to do
+    :param mindelay: (keyword, optional, default .01) in event driven mode, the first sleep after an idle step; this doubles on every idle step, up to ``delay``
+    :param packing: (keyword, optional, default ``ffd``) placement of queued tasks: ``ffd``, ``bestfit``, or ``legacy``, see ``TaskQueue.startQueued``
+    :param runtimehistory: (keyword, optional) name of a file with running times of earlier runs; tasks predicted to run longest are started first, and the file is updated at the end of the run. See ``RuntimeHistory``.
+    :param queueweights: (keyword, optional) weights of the sub-queues for fair share scheduling, as in ``{"alice":2,"bob":1}``, see ``TaskQueue``
+    :param lookahead: (keyword, optional) in event driven mode, the number of tasks to keep in the queue; default is the size of the host pool, or, with a runtime history, ``history_lookahead`` times that. Only the queued tasks are ordered longest first, so a longer lookahead gives a better schedule, but reads that many commandlines ahead and keeps them in memory; ``math.inf`` reads all of them before starting any
+    :param retry: (keyword, optional) a ``RetryPolicy``, or a dict of its options such as ``{"retries":2,"backoff":10}``, for running failed tasks again; by default tasks are only run again if their commandline has a ``retries`` option
+    :param queuestate: (keyword, optional, default ``./queuestate``) file with the restart information
+    :param journal: (keyword, optional, default False) record the restart information in a ``QueueJournal`` next to the ``queuestate``, rather than rewriting the whole file after every step; note that the ``queuestate`` file is emptied when the job starts
+    :param compactinterval: (keyword, optional, default 60) with a journal, seconds between snapshots
     """
+    # with a runtime history, keep this many tasks per host in the queue
+    history_lookahead = 10
     def __init__(self,**kwargs) -> None :
         print( f"Start launcherjob, launcher version: {pylauncher_version}" )
         self.debugs = kwargs.get("debug","")
@@ -2008,19 +4164,45 @@ class LauncherJob():
         print( f"Using uniform core count {self.uniformcorecount}" )
         self.workdir = kwargs.pop("workdir",".")
         self.queuestate = kwargs.pop("queuestate","./queuestate")
+        if kwargs.pop("journal",False):
+            self.journal : Optional[QueueJournal] = QueueJournal\
+                ( self.queuestate,compactinterval=kwargs.pop("compactinterval",60),
+                  debug=self.debugs )
+        else: self.journal = None
         try:
             self.taskgenerator = kwargs.pop("taskgenerator")
         except:
             raise LauncherException("Need a task generator")
+        self.taskgenerator.journal = self.journal
         self.delay = kwargs.pop("delay",.5)
+        self.eventdriven = kwargs.pop("eventdriven",False)
+        self.mindelay = min( kwargs.pop("mindelay",.01),self.delay )
+        self.idledelay = self.mindelay
         self.schedule = kwargs.get("schedule","default")
-        self.queue = TaskQueue(debug=self.debugs)
+        if historyfile := kwargs.pop("runtimehistory",None):
+            self.history : Optional[RuntimeHistory] = \
+                RuntimeHistory(historyfile,debug=self.debugs)
+        else: self.history = None
+        self.lookahead = kwargs.pop("lookahead",None)
+        self.queue = TaskQueue(debug=self.debugs,journal=self.journal,
+                               packing=kwargs.pop("packing","ffd"),history=self.history,
+                               queueweights=kwargs.pop("queueweights",{}),
+                               waiting=self.taskgenerator.waiting)
         self.maxruntime = kwargs.pop("maxruntime",0)
         self.taskmaxruntime = kwargs.pop("taskmaxruntime",0)
         # count tasks started/ended (note: completed includes aborted)
         self.enqueued = 0; self.completed = 0; self.aborted = 0; self.tock = 0
+        # statistics of how many tasks are retired per completion scan
+        self.scans = 0; self.retiring_scans = 0; self.max_retired = 0
         self.started = False
         self.gather_output = kwargs.pop("gather_output",None)
+        retry = kwargs.pop("retry",None)
+        if isinstance(retry,dict):
+            retry = RetryPolicy(**retry)
+        self.retry : RetryPolicy = retry if retry is not None else RetryPolicy()
+        # exit codes of the failed attempts, per task id
+        self.failures : dict[int,list[int]] = {}
+        self.retried = 0
     def compulsory_hostpool(self,**kwargs):
         try:
             hostpool = kwargs.pop("hostpool")
@@ -2047,14 +4229,14 @@ class LauncherJob():
         # auxiliary routine, purely to make ``tick`` look shorter
         if not isinstance(task,(Task)):
             raise LauncherException( f"Not a task: <<{str(task)}>> is <<{type(task)}>>" )
-        DebugTraceMsg( f"enqueueing new task <<{str(task)}>>",self.debug,prefix="Job ")
+        DebugTraceMsg( lambda : f"enqueueing new task <<{str(task)}>>",self.debug,prefix="Job ")
         self.queue.enqueue(task)
     def tick(self,**kwargs) -> None:
         """This routine does a single time step in a launcher's life, and reports back
         to the user. Specifically:
 
         * It tries to start any currently queued jobs. Also:
-        * If any jobs are finished, it detects exactly one, and reports its ID to the user in a message ``expired 123``
+        * If any jobs are finished, it detects all of them, and reports their IDs to the user in a message ``expired 123 125-127``
         * If there are no finished jobs, it invokes the task generator; this can result in a new task and the return message is ``continuing``
         * if the generator stalls, that is, more tasks will come in the future but none are available now, the message is ``stalling``
         * if the generator is finished and all jobs have finished, the message is ``finished``
@@ -2065,11 +4247,12 @@ class LauncherJob():
 
         """
         monitor = kwargs.get("monitor",NullMonitor)
-        DebugTraceMsg("\ntick %d\nQueue:\n%s" % (self.tock,str(self.queue)),self.debug)
+        DebugTraceMsg( lambda : "\ntick %d\nQueue:\n%s" % (self.tock,str(self.queue)),self.debug)
         self.tock += 1
         self.runningtime = time.time()-self.starttime # needs to come before `handle' stuff
 
         # job handling
+        self.queue.requeue_due(time.time())
         if not self.queue.finished():
             self.queue.startQueued(self.hostpool,starttick=self.tock)
         self.handle_completed()
@@ -2080,37 +4263,140 @@ class LauncherJob():
 
         # graphic display....
         monitor() # this can be NullMonitor
-        display : str = self.hostpool.display()
-        DebugTraceMsg( f"Pool: {display}", self.debug,prefix="Job " )
+        DebugTraceMsg( lambda : f"Pool: {self.hostpool.display()}", self.debug,prefix="Job " )
         if re.search("host",self.debugs):
             DebugTraceMsg(str(self.hostpool))
 
         # and then sleep for a bit
         time.sleep(self.delay)
+    def event_step(self,**kwargs) -> int :
+        """One step of the event driven mode. Unlike ``tick``, this does
+        not do one of everything, but everything that can be done:
+
+        * all completed and aborted tasks are retired, so that their nodes are free
+        * new commandlines are turned into tasks until the queue is as long as the host pool, or the generator stalls
+        * queued tasks are started on the nodes that are now available
+
+        There is no sleep in this routine; the return value is the number of
+        events processed, so that the caller can decide to sleep if this is zero.
+
+        :param monitor : monitor routine to be invoked.
+        :param launch : (optional) launch function for ``TaskQueue.startQueued``
+        """
+        monitor = kwargs.get("monitor",NullMonitor)
+        self.tock += 1
+        self.runningtime = time.time()-self.starttime
+
+        retired = self.completed+self.aborted
+        self.handle_completed()
+        self.handle_aborted()
+        events = self.completed+self.aborted-retired
+        events += self.queue.requeue_due(time.time())
+        events += self.handle_enqueueing_batch( self.queue_lookahead() )
+        if not self.queue.finished():
+            nrunning = len(self.queue.running)
+            self.queue.startQueued(self.hostpool,starttick=self.tock,launch=kwargs.get("launch"))
+            events += len(self.queue.running)-nrunning
+        self.hostpool.record_occupancy()
+        self.started = True
+
+        monitor() # this can be NullMonitor
+        if events>0:
+            DebugTraceMsg( lambda : f"step {self.tock}: {events} events, {len(self.queue.running)} running",
+                           self.debug,prefix="Job " )
+        return events
+    def idle(self,events) -> None :
+        """Sleep after an event driven step, but only if nothing happened.
+        Consecutive idle steps double the sleep time, up to the ``delay`` parameter."""
+        if events>0:
+            self.idledelay = self.mindelay
+        else:
+            time.sleep(self.idledelay)
+            self.idledelay = min( 2*self.idledelay,self.delay )
     def handle_completed(self):
+        """Retire all tasks that have completed since the last scan,
+        and release their nodes in one pass."""
         message = None
-        completed_task = self.queue.find_recently_completed()
-        if not completed_task is None:
-            self.queue.running.remove(completed_task)
-            self.queue.completed.append(completed_task)
-            completeID = completed_task.taskid
-            DebugTraceMsg("completed: %d" % completeID,self.debug,prefix="Job ")
-            self.completed += 1
-            self.hostpool.releaseNodesByTask(completeID)
-            message = "expired %s" % str(completeID)
+        self.hostpool.commandexecutor.poll()
+        completed_tasks = self.queue.find_all_recently_completed()
+        self.record_retired( len(completed_tasks) )
+        if len(completed_tasks)>0:
+            completed_tasks = self.handle_failed(completed_tasks)
+        if len(completed_tasks)>0:
+            self.queue.retire(completed_tasks,self.queue.completed)
+            if self.history is not None:
+                for t in completed_tasks:
+                    self.history.record(t)
+            # a task that failed for good cancels the tasks that come after it
+            self.taskgenerator.retire( [ t for t in completed_tasks if not t.exitstatus ] )
+            self.taskgenerator.retire( [ t for t in completed_tasks if t.exitstatus ],aborted=True )
+            self.cleanup_completed(completed_tasks)
+            completeIDs = [ t.taskid for t in completed_tasks ]
+            self.completed += len(completeIDs)
+            self.hostpool.releaseNodesByTasks(completeIDs)
+            message = "expired %s" % CompactIntList( sorted(completeIDs) )
+            DebugTraceMsg( lambda : f"completed {len(completeIDs)}: {message}",self.debug,prefix="Job ")
         return message
+    def handle_failed(self,tasks : list[Task]) -> list[Task] :
+        """Record the exit status of completed tasks. Failed tasks that are
+        to be run again, according to the ``RetryPolicy``, release their nodes
+        and are postponed, see ``TaskQueue.postpone``; the other tasks are returned."""
+        now = time.time()
+        done : list[Task] = []; retry : list[tuple[Task,float]] = []
+        for t in tasks:
+            t.exitstatus = t.completion.exit_status()
+            if not t.exitstatus:
+                done.append(t); continue
+            self.failures.setdefault(t.taskid,[]).append(t.exitstatus)
+            delay = self.retry.delay(t,t.exitstatus)
+            if delay is None:
+                done.append(t)
+            else:
+                DebugTraceMsg( lambda : f"task {t.taskid} failed with status {t.exitstatus},"
+                               f" attempt {t.attempt+1} in {delay:.1f} sec",self.debug,prefix="Job ")
+                retry.append( (t,now+delay) )
+        if len(retry)>0:
+            self.queue.postpone(retry)
+            self.hostpool.releaseNodesByTasks( [ t.taskid for t,until in retry ] )
+            for t,until in retry:
+                t.completion.clear()
+                t.attempt += 1; t.has_started = False
+            self.retried += len(retry)
+        return done
+    def cleanup_completed(self,tasks : list[Task]) -> None :
+        """Remove the stamp files of completed tasks, in the background, see ``StampCleaner``,
+        or for executors that report completion, the exit status that they recorded."""
+        for t in tasks:
+            t.completion.cleanup()
+    def record_retired(self,nretired : int) -> None :
+        """Keep statistics of the number of tasks retired per scan"""
+        self.scans += 1
+        if nretired>0:
+            self.retiring_scans += 1
+            self.max_retired = max(self.max_retired,nretired)
+    def abort_test(self,task) -> bool :
+        """Test whether a task has exceeded the ``taskmaxruntime``.
+        In the classic mode this counts ticks; in event driven mode,
+        where steps have no fixed duration, this is measured in seconds."""
+        if self.taskmaxruntime<=0:
+            return False
+        if self.eventdriven:
+            return time.time()-task.starttime>self.taskmaxruntime
+        else:
+            return self.tock-task.starttick>self.taskmaxruntime
     def handle_aborted(self):
+        """Retire all tasks that satisfy the abort test,
+        and release their nodes in one pass."""
         message = None
-        aborted_task = self.queue.find_recently_aborted(
-            lambda t:self.taskmaxruntime>0 and self.tock-t.starttick>self.taskmaxruntime )
-        if not aborted_task is None:
-            self.queue.running.remove(aborted_task)
-            self.queue.aborted.append(aborted_task)
-            completeID = aborted_task.taskid
-            DebugTraceMsg("aborted: %d" % completeID,self.debug,prefix="Job ")
-            self.aborted += 1
-            self.hostpool.releaseNodesByTask(completeID)
-            message = "truncated %s" % str(completeID)
+        aborted_tasks = self.queue.find_all_recently_aborted( self.abort_test )
+        if len(aborted_tasks)>0:
+            self.queue.retire(aborted_tasks,self.queue.aborted)
+            self.taskgenerator.retire(aborted_tasks,aborted=True)
+            abortIDs = [ t.taskid for t in aborted_tasks ]
+            self.aborted += len(abortIDs)
+            self.hostpool.releaseNodesByTasks(abortIDs)
+            message = "truncated %s" % CompactIntList( sorted(abortIDs) )
+            DebugTraceMsg( lambda : f"aborted {len(abortIDs)}: {message}",self.debug,prefix="Job ")
         return message
     def handle_enqueueing(self) -> None :
         if self.taskgenerator.stalling():
@@ -2121,11 +4407,31 @@ class LauncherJob():
             task = self.taskgenerator.next()
             self.enqueue_task(task)
             self.enqueued += 1
-            DebugTraceMsg( f"enqueue task <<{task}>>",self.debug,prefix="Job " )
+            DebugTraceMsg( lambda : f"enqueue task <<{task}>>",self.debug,prefix="Job " )
+    def queue_lookahead(self) -> int :
+        """The number of tasks to keep in the queue in event driven mode, see the ``lookahead`` option"""
+        if self.lookahead is not None:
+            return self.lookahead
+        lookahead = max(1,len(self.hostpool))
+        if self.history is not None:
+            lookahead *= self.history_lookahead
+        return lookahead
+    def handle_enqueueing_batch(self,lookahead : int) -> int :
+        """Enqueue new tasks until the generator has no more for now,
+        or until there are ``lookahead`` tasks waiting in the queue.
+        Returns the number of tasks enqueued."""
+        count = 0
+        while self.queue.nqueued<lookahead \
+              and not ( self.taskgenerator.stalling() or self.taskgenerator.stopping() ):
+            task = self.taskgenerator.next()
+            self.enqueue_task(task)
+            self.enqueued += 1; count += 1
+        return count
     def post_process(self,taskid):
-        DebugTraceMsg( f"Task {taskid} expired",self.debug,prefix="Job " )
+        DebugTraceMsg( lambda : f"Task {taskid} expired",self.debug,prefix="Job " )
     def run(self,**kwargs) -> None :
-        """Invoke the launcher job, and call ``tick`` until all jobs are finished."""
+        """Invoke the launcher job, and call ``tick`` until all jobs are finished.
+        In event driven mode, call ``event_step`` instead, and sleep only when idle."""
         monitor = kwargs.pop("monitor",NullMonitor)
         if re.search("host",self.debugs):
             self.hostpool.printhosts()
@@ -2139,14 +4445,37 @@ class LauncherJob():
             if self.maxruntime>0:
                 if elapsed>self.maxruntime:
                     break
+            if self.eventdriven:
+                events = self.event_step(monitor=monitor)
+                # update restart file, but only rewrite it if something changed
+                self.update_queuestate(changed=events>0)
+                if self.finished():
+                    DebugTraceMsg("all enqueued tasks are now completed",self.debug,prefix="Job ")
+                    break
+                self.idle(events)
+                continue
             self.tick(monitor=monitor)
             # update restart file
-            queuestate_update(self.queuestate,self.queue.savestate())
+            self.update_queuestate()
             if self.finished():
                 DebugTraceMsg("all enqueued tasks are now completed",self.debug,prefix="Job ")
                 break
+        if self.journal is not None:
+            self.journal.close(self.queue)
+        if self.history is not None:
+            self.history.save()
+        flush_stamp_cleaner()
+        self.hostpool.commandexecutor.flush_output()
         self.hostpool.release()
         DebugTraceMsg("Run finished",self.debug,prefix="Job ")
+    def update_queuestate(self,changed : bool = True) -> None :
+        """Update the restart information: either append to the journal,
+        or, without journal, rewrite the whole queuestate file.
+        The journal is updated even if nothing changed, since a compaction can be due."""
+        if self.journal is not None:
+            self.journal.update(self.queue)
+        elif changed:
+            queuestate_update(self.queuestate,self.queue.savestate())
     def finish(self) -> None :
         self.taskgenerator.finish()
     def finished(self) -> bool :
@@ -2163,23 +4492,291 @@ Launcher run completed, launcher type: %s
 
 total running time: %6.2f
 
-%s
+%s%s%s%s%s%s
 %s
 ==========================
 """ % ( jobtype,self.runningtime,
         self.queue.final_report\
             (self.runningtime,len(self.hostpool)/self.uniformcorecount),# ends with newline
+        self.failure_report(), # empty or ends with newline
+        self.taskgenerator.dependency_report(), # empty or ends with newline
+        self.retire_report(), # ends with newline
+        self.prediction_report(), # empty or ends with newline
+        self.hostpool.commandexecutor.final_report(), # empty or ends with newline
         self.hostpool.final_report(), # ends with newline
        )
         return message
+    def failure_report(self) -> str :
+        """Report the tasks that failed, their exit codes, and the retries"""
+        if len(self.failures)==0:
+            return ""
+        failed = sorted( [ t.taskid for t in self.queue.completed if t.exitstatus ] )
+        codes = collections.Counter( [ c for codes in self.failures.values() for c in codes ] )
+        recovered = len( [ t for t in self.queue.completed
+                           if t.taskid in self.failures and not t.exitstatus ] )
+        report = f"""tasks failed: {len(failed)} {CompactIntList(failed)}
+ .. exit codes: {", ".join( [ f"{c} ({n}x)" for c,n in sorted(codes.items()) ] )}
+"""
+        if self.retried>0:
+            report += f" .. retries: {self.retried}, tasks that succeeded on retry: {recovered}\n"
+        return report
+    def retire_report(self) -> str :
+        """Report how many tasks were retired per completion scan"""
+        if self.retiring_scans>0:
+            average = self.completed/self.retiring_scans
+        else: average = 0
+        report = f"""completion scans: {self.scans}
+ .. with retired tasks: {self.retiring_scans}
+ .. max retired / scan: {self.max_retired}
+ .. avg retired / scan: {average:.2f}
+"""
+        if the_stamp_cleaner is not None and the_stamp_cleaner.batches>0:
+            report += f"stamp files removed: {the_stamp_cleaner.removed} in {the_stamp_cleaner.batches} batches\n"
+        return report
+    def prediction_report(self) -> str :
+        """With a runtime history, compare the running times and the makespan
+        predicted from the history to the actual ones"""
+        if self.history is None or len(self.queue.completed)==0:
+            return ""
+        tasks = self.queue.completed
+        predicted = [ t for t in tasks if t.predicted is not None ]
+        makespan = ListScheduleMakespan\
+            ( [ (self.history.expected(t),t.size) for t in sorted\
+                ( tasks,key=lambda t:(-t.size,-self.history.expected(t),t.taskid) ) ],
+              len(self.hostpool) )
+        if len(predicted)>0:
+            error = sum( [ abs(t.predicted-t.runningtime) for t in predicted ] )/len(predicted)
+        else: error = 0
+        actual = max( [ t.starttime+t.runningtime for t in tasks ] )-min( [ t.starttime for t in tasks ] )
+        return f"""predicted running times: {len(predicted)} out of {len(tasks)} tasks
+ .. avg prediction error: {error:.2f}
+predicted makespan: {makespan:.2f}, actual: {actual:.2f}
+"""
+
+class AsyncLauncherJob(LauncherJob):
+    """A LauncherJob that runs in an asyncio event loop, so that task launches,
+    which for ssh executors take a network round trip, are done concurrently.
+    While launches are in flight, completed tasks are retired, and
+    new tasks are queued and placed. This job always uses the event driven mode.
+
+    Launches go through the executor's ``aexecute`` coroutine; for executors
+    that only have a blocking ``execute`` this runs in a worker thread.
+    Executors that report exits, see ``Executor.report_exit``, wake up the job immediately;
+    for other executors completion is tested as in the event driven mode.
+
+    :param maxlaunches: (keyword, optional, default 32) maximum number of launches in flight; this is also the number of worker threads for blocking executors
+
+    For other parameters, see the LauncherJob class.
+    """
+    def __init__(self,**kwargs) -> None :
+        self.maxlaunches = int( kwargs.pop("maxlaunches",32) )
+        LauncherJob.__init__(self,**kwargs)
+        self.eventdriven = True
+        self.launches : set[asyncio.Task] = set()
+        self.inflight = 0; self.maxinflight = 0
+        self.launcherror : Optional[BaseException] = None
+    def launch(self,task : Task,locator : HostLocator,starttick : int) -> None :
+        """Start the launch of a task, without waiting for it;
+        this is the ``launch`` function for ``TaskQueue.startQueued``."""
+        line,prefix = task.prepare_start(locator=locator,starttick=starttick)
+        launch = asyncio.create_task( self.alaunch(task,line,prefix) )
+        self.launches.add(launch)
+        launch.add_done_callback(self.launched)
+    async def alaunch(self,task : Task,line : str,prefix : str) -> None :
+        async with self.launchslots:
+            self.inflight += 1
+            self.maxinflight = max(self.maxinflight,self.inflight)
+            try:
+                await task.aexecute_on_pool(line,prefix=prefix)
+            finally:
+                self.inflight -= 1
+    def launched(self,launch : asyncio.Task) -> None :
+        self.launches.discard(launch)
+        if not launch.cancelled() and launch.exception() is not None \
+           and self.launcherror is None:
+            self.launcherror = launch.exception()
+        self.woken.set()
+    async def aidle(self,events) -> None :
+        """Unlike ``idle``, an idle step ends as soon as
+        a launch finishes or the executor reports an exit."""
+        if events>0:
+            self.idledelay = self.mindelay
+            await asyncio.sleep(0) # let the launches proceed
+            return
+        try:
+            await asyncio.wait_for( self.woken.wait(),self.idledelay )
+            self.idledelay = self.mindelay
+        except asyncio.TimeoutError:
+            self.idledelay = min( 2*self.idledelay,self.delay )
+    async def arun(self,**kwargs) -> None :
+        """Coroutine version of ``run``: do event driven steps, with launches
+        running concurrently, until all tasks are finished."""
+        monitor = kwargs.pop("monitor",NullMonitor)
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor\
+            ( concurrent.futures.ThreadPoolExecutor(max_workers=self.maxlaunches) )
+        self.launchslots = asyncio.Semaphore(self.maxlaunches)
+        self.woken = asyncio.Event()
+        executor = self.hostpool.commandexecutor
+        executor.wakeup = lambda : loop.call_soon_threadsafe(self.woken.set)
+        if re.search("host",self.debugs):
+            self.hostpool.printhosts()
+        self.starttime = time.time()
+        try:
+            while True:
+                elapsed = time.time()-self.starttime
+                if self.maxruntime>0 and elapsed>self.maxruntime:
+                    break
+                self.woken.clear()
+                events = self.event_step(monitor=monitor,launch=self.launch)
+                self.update_queuestate(changed=events>0)
+                if self.launcherror is not None:
+                    raise self.launcherror
+                if self.finished():
+                    DebugTraceMsg("all enqueued tasks are now completed",self.debug,prefix="Job ")
+                    break
+                await self.aidle(events)
+            if len(self.launches)>0:
+                await asyncio.gather( *self.launches,return_exceptions=True )
+        finally:
+            executor.wakeup = None
+        if self.journal is not None:
+            self.journal.close(self.queue)
+        if self.history is not None:
+            self.history.save()
+        flush_stamp_cleaner()
+        self.hostpool.commandexecutor.flush_output()
+        await self.hostpool.arelease()
+        DebugTraceMsg("Run finished",self.debug,prefix="Job ")
+    def run(self,**kwargs) -> None :
+        """Run the job in a new event loop, see ``arun``"""
+        asyncio.run( self.arun(**kwargs) )
+    def retire_report(self) -> str :
+        return LauncherJob.retire_report(self) \
+            + f"max launches in flight: {self.maxinflight} (limit {self.maxlaunches})\n"
+
 def queuestate_update( queuestate,savestate ):
     ## update the restart file
     ## first create recursive directories if needed
     qdir = re.sub( r'[^/]+$','',queuestate)
-    os.makedirs(qdir,exist_ok=True)
-    state_f = open(queuestate,"w")        
+    if qdir!="":
+        os.makedirs(qdir,exist_ok=True)
+    ## write a temporary file and move it, so that there is always a complete file
+    tmpstate = queuestate+".tmp"
+    state_f = open(tmpstate,"w")        
     state_f.write( savestate )
     state_f.close()
+    os.replace(tmpstate,queuestate)
+
+class QueueJournal():
+    """An append-only record of task state changes, so that the queuestate
+    does not have to be rewritten completely after every tick.
+
+    The journal file ``<queuestate>.journal`` has lines
+    ``queued <id>: <command>``, ``started <id>``, ``completed <id>``, ``aborted <id>``.
+    Every ``compactinterval`` seconds the journal is compacted: the ``queuestate``
+    file is written as a snapshot in the traditional format, and the journal is emptied.
+    A restart reads the snapshot, and then applies the journal; see ``read_queuestate``.
+    When the journal is opened an empty snapshot is written, so that a snapshot
+    of an earlier run is never combined with the journal of this one.
+
+    :param queuestate: name of the queuestate file
+    :param compactinterval: (keyword, optional, default 60) seconds between compactions
+    :param debug: (keyword, optional) debug string; this class responds to "queue"
+    """
+    def __init__(self,queuestate,**kwargs) -> None :
+        self.queuestate = queuestate
+        self.journalfile = queuestate+".journal"
+        self.compactinterval = kwargs.pop("compactinterval",60)
+        self.debugs = kwargs.get("debug","")
+        self.debug = re.search("queue",self.debugs)
+        qdir = re.sub( r'[^/]+$','',queuestate)
+        if qdir!="":
+            os.makedirs(qdir,exist_ok=True)
+        self.journal = open(self.journalfile,"w")
+        queuestate_update(self.queuestate,"queued\nrunning\ncompleted\n")
+        self.lastcompact = time.time(); self.records = 0
+    def record(self,event,task) -> None :
+        """Append a state change of a task"""
+        if event=="queued":
+            self.journal.write( f"queued {task.taskid}: {task.options_prefix()}{task.command}\n" )
+        else:
+            self.journal.write( f"{event} {task.taskid}\n" )
+        self.records += 1
+    def update(self,queue) -> None :
+        """Make the journal visible on disc, and compact it if that is due;
+        without new records the snapshot is current, and there is nothing to do"""
+        if self.records==0:
+            return
+        if time.time()-self.lastcompact>=self.compactinterval:
+            self.compact(queue)
+        else:
+            self.journal.flush()
+    def compact(self,queue) -> None :
+        """Write a snapshot of the queue, after which the journal can be emptied.
+        If we crash between the two, replaying the journal on the snapshot is harmless."""
+        DebugTraceMsg( f"compacting journal of {self.records} records",
+                       self.debug,prefix="Queue" )
+        self.journal.flush()
+        queuestate_update(self.queuestate,queue.savestate())
+        self.journal.seek(0); self.journal.truncate()
+        self.lastcompact = time.time(); self.records = 0
+    def close(self,queue) -> None :
+        """Write a final snapshot and remove the journal"""
+        self.compact(queue)
+        self.journal.close()
+        os.remove(self.journalfile)
+
+def read_queuestate( filename ) -> list[tuple[int,str,str]] :
+    """Read restart information, and return a list of (taskid,state,command) tuples,
+    where the state is queued, running, or completed.
+
+    The file can be a queuestate snapshot, possibly with a journal next to it,
+    or a journal by itself. If the snapshot is missing, for instance after a crash
+    before it was first written, the journal is read by itself. Journal records only move a task forward
+    from queued to running to completed, so records that are already
+    reflected in the snapshot are harmless."""
+    progress = { "queued":0, "running":1, "completed":2 }
+    tasks : dict[int,list[str]] = {}
+    def advance(taskid,state):
+        if taskid in tasks and progress[state]>progress[tasks[taskid][0]]:
+            tasks[taskid][0] = state
+    if filename.endswith(".journal"):
+        journalfile = filename
+    else:
+        journalfile = filename+".journal"
+        state = "queued"
+        if os.path.exists(filename):
+            with open(filename) as snapshot:
+                for line in snapshot:
+                    line = line.strip()
+                    if not line or line[0]=="#":
+                        continue
+                    if line in progress:
+                        state = line; continue
+                    taskid,command = line.split(":",1)
+                    tasks[int(taskid)] = [ state,command.strip() ]
+        elif not os.path.exists(journalfile):
+            raise LauncherException( f"Neither queuestate nor journal found: <<{filename}>>" )
+    if os.path.exists(journalfile):
+        with open(journalfile) as journal:
+            for line in journal:
+                line = line.strip()
+                if not line:
+                    continue
+                event,rest = line.split(" ",1)
+                if event=="queued":
+                    taskid,command = rest.split(":",1)
+                    if int(taskid) not in tasks:
+                        tasks[int(taskid)] = [ "queued",command.strip() ]
+                elif event=="started":
+                    advance(int(rest),"running")
+                elif event=="completed":
+                    advance(int(rest),"completed")
+                elif event=="aborted":
+                    # aborted tasks are not in the snapshot, and are not redone
+                    tasks.pop(int(rest),None)
+    return [ (taskid,state,command) for taskid,(state,command) in tasks.items() ]
 def NullMonitor():
     pass
 def SlurmSqueueMonitor():
@@ -2208,6 +4805,15 @@ def ClassicLauncher(commandfile,*args,**kwargs) -> None:
     :param cores: number of cores per commandline (keyword, optional, default=1)
     :param corespernode: mostly for weird KNL core numbering
     :param workdir: (keyword, optional, default=pylauncher_tmp_jobid) directory for output and temporary files; the launcher refuses to reuse an already existing directory
+    :param stampwatch: (keyword, optional) ``inotify`` or ``scandir`` to detect completion stamps by watching the workdir, see ``StampWatcher``; default is one file test per task
+    :param streaming: (keyword, optional, default False) read the commandfile lazily, see ``StreamingFileCommandlineGenerator``
+    :param agent: (keyword, optional, default False) run tasks through one worker agent per host, see ``SSHAgentExecutor``
+    :param asynchronous: (keyword, optional, default False) launch tasks concurrently, see ``AsyncLauncherJob``
+    :param placement: (keyword, optional, default ``flat``) with ``node``, keep multi-core tasks on one node, see ``HostPoolBase.find_on_hosts``
+    :param numasize: (keyword, optional) cores per NUMA domain or socket, for the ``node`` placement
+    :param execfiles: (keyword, optional, default False) write every command to an exec file in the workdir, for debugging; see ``Executor``
+    :param layout: (keyword, optional, default ``sharded``) put the out, exec, and stamp files in subdirectories of the workdir; use ``flat`` to put them in the workdir itself, see ``WorkdirLayout``
+    :param aggregate_output: (keyword, optional, default False) collect the output of the tasks in one log per host, rather than an out file per task; see ``TaskOutputReader`` for getting the output of a task. This needs ``agent=True``.
     :param debug: debug types string (optional, keyword)
     """
     jobtype = "ClassicLauncher"
@@ -2218,23 +4824,32 @@ def ClassicLauncher(commandfile,*args,**kwargs) -> None:
 
     numactl = kwargs.get("numactl",None)
     resume = kwargs.pop("resume",None)
+    streaming = kwargs.pop("streaming",False)
     if resume is not None and not (resume=="0" or resume=="no"):
         generator : CommandlineGenerator = StateFileCommandlineGenerator\
             (commandfile,corespernode=SLURMCoresPerNode(**kwargs),**kwargs)
+    elif streaming:
+        generator = StreamingFileCommandlineGenerator\
+            (commandfile,corespernode=SLURMCoresPerNode(**kwargs),**kwargs)
     else:
         generator = FileCommandlineGenerator\
             (commandfile,corespernode=SLURMCoresPerNode(**kwargs),**kwargs)
-    commandexecutor = SSHExecutor(workdir=workdir,**kwargs)
+    completionclass = WrapCompletionClass( kwargs.pop("stampwatch",None) )
+    if kwargs.pop("agent",False):
+        commandexecutor : Executor = SSHAgentExecutor(workdir=workdir,**kwargs)
+    else:
+        commandexecutor = SSHExecutor(workdir=workdir,**kwargs)
     corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
         hostpool=HostPool(
             hostlist=HostListByName(**kwargs),
             commandexecutor=commandexecutor,workdir=workdir,
             **kwargs,
         ),
         taskgenerator=WrappedTaskGenerator(
-            generator,
+            generator, completionclass=completionclass,
             taskmaxruntime=taskmaxruntime, workdir=workdir, **kwargs ),
         corespernode=corespernode,
         **kwargs)
@@ -2257,6 +4872,13 @@ def LocalLauncher(commandfile,nhosts,*args,**kwargs) -> None:
     :param resume: if 1,yes interpret the commandfile as a queuestate file
     :param cores: number of cores (keyword, optional, default=1)
     :param workdir: (keyword, optional, default=pylauncher_tmp_jobid) directory for output and temporary files; the launcher refuses to reuse an already existing directory
+    :param stampwatch: (keyword, optional) ``inotify`` or ``scandir`` to detect completion stamps by watching the workdir, see ``StampWatcher``; default is one file test per task
+    :param streaming: (keyword, optional, default False) read the commandfile lazily, see ``StreamingFileCommandlineGenerator``
+    :param spawn: (keyword, optional, default False) start tasks as direct child processes, see ``ChildProcessExecutor``
+    :param asynchronous: (keyword, optional, default False) launch tasks concurrently, see ``AsyncLauncherJob``
+    :param execfiles: (keyword, optional, default False) write every command to an exec file in the workdir, for debugging; see ``Executor``
+    :param layout: (keyword, optional, default ``sharded``) put the out, exec, and stamp files in subdirectories of the workdir; use ``flat`` to put them in the workdir itself, see ``WorkdirLayout``
+    :param aggregate_output: (keyword, optional, default False) collect the output of the tasks in one log per host, rather than an out file per task; see ``TaskOutputReader`` for getting the output of a task. This needs ``spawn=True``.
     :param debug: debug types string (optional, keyword)
     """
     jobtype = "LocalLauncher"
@@ -2265,18 +4887,28 @@ def LocalLauncher(commandfile,nhosts,*args,**kwargs) -> None:
     debug = kwargs.get("debug","")
     workdir = kwargs.pop("workdir","pylauncher_tmp"+str(jobid) )
     resume = kwargs.pop("resume",None)
+    streaming = kwargs.pop("streaming",False)
     if resume is not None and not (resume=="0" or resume=="no"):
         generator : CommandlineGenerator = \
             StateFileCommandlineGenerator( commandfile,**kwargs )
+    elif streaming:
+        generator = \
+            StreamingFileCommandlineGenerator( commandfile,**kwargs )
     else:
         generator = \
             FileCommandlineGenerator( commandfile,**kwargs )
     corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
-        hostpool=LocalHostPool( nhosts=nhosts ),
+    completionclass = WrapCompletionClass( kwargs.pop("stampwatch",None) )
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
+        hostpool=LocalHostPool( nhosts=nhosts,spawn=kwargs.pop("spawn",False),
+                                execfiles=kwargs.pop("execfiles",False),
+                                layout=kwargs.get("layout",None),
+                                aggregate_output=kwargs.pop("aggregate_output",False) ),
         taskgenerator=WrappedTaskGenerator( 
-            FileCommandlineGenerator( commandfile,**kwargs ),
+            generator,
+            completionclass=completionclass,
             taskmaxruntime=taskmaxruntime, workdir=workdir, **kwargs ),
         corespernode=corespernode,
         **kwargs)
@@ -2310,7 +4942,8 @@ def MPILauncher(commandfile,**kwargs) -> None:
     hfswitch = kwargs.pop("hfswitch","-machinefile")
     corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
         hostpool=HostPool( hostlist=HostListByName(**kwargs),
             commandexecutor=MPIExecutor(workdir=workdir,debug=debug,hfswitch=hfswitch),
             debug=debug ),
@@ -2348,7 +4981,8 @@ def IbrunLauncher(commandfile,**kwargs) -> None:
     commandexecutor = IbrunExecutor(workdir=workdir,**kwargs)
     corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
         hostpool=HostPool( 
             hostlist=HostListByName(**kwargs),
             commandexecutor=commandexecutor,workdir=workdir,**kwargs),
@@ -2386,7 +5020,8 @@ def GPULauncher(commandfile,**kwargs) -> None :
     gpuspernode = kwargs.pop("gpuspernode",1)
     corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
         hostpool=HostPool( hostlist=HostListByName(gpuspernode=gpuspernode,debug=debug),
             commandexecutor=SSHExecutor\
                 (numactl="gpu", workdir=workdir ,**kwargs),
@@ -2423,7 +5058,8 @@ def RemoteLauncher(commandfile,hostlist,**kwargs) -> None :
     ppn = kwargs.pop("ppn",4)
     corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
         hostpool=HostPool( 
             hostlist=ListHostList(hostlist,ppn=ppn,debug=debug),
             commandexecutor=SSHExecutor(workdir=workdir,**kwargs),
@@ -2464,7 +5100,8 @@ def SubmitLauncher(commandfile,submitparams,**kwargs) -> None :
     else: monitor = NullMonitor
     corespernode : int = int( kwargs.get("corespernode",1) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
         hostpool=HostPool( 
             hostlist=ListHostList(
                 [ {'host':queue,'hostnum':isub,'task_loc':isub,'phys_core':""}
@@ -2536,7 +5173,8 @@ def RemoteIbrunLauncher(commandfile,hostlist,**kwargs) -> None :
     ppn = kwargs.pop("ppn",4)
     corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
         hostpool=HostPool( 
             hostlist=ListHostList(hostlist,ppn=ppn,debug=debug),
             commandexecutor=SSHExecutor(workdir=workdir,**kwargs), debug=debug ),
@@ -2565,16 +5203,23 @@ class DynamicLauncherJob(LauncherJob):
         debug = kwargs.get("debug","")
         corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
         taskmaxruntime = kwargs.pop("taskmaxruntime",0)
+        workdir = kwargs.pop("workdir",None)
         LauncherJob.__init__(
             self,
             taskgenerator=WrappedTaskGenerator(
                 DynamicCommandlineGenerator( **kwargs ),
                 taskmaxruntime=taskmaxruntime, workdir=workdir, **kwargs ),
-            corespernode=corespernode,
+            corespernode=corespernode,workdir=workdir,
             **kwargs)
-    def append(self,commandline) -> None :
-        """Append a Unix commandline to the generator"""
-        self.taskgenerator.append( commandline )
+    def append(self,commandline,**kwargs) -> None :
+        """Append a Unix commandline to the generator
+
+        :param priority: (keyword, optional, default 0) tasks with higher priority are started first
+        :param queue: (keyword, optional) name of a sub-queue; sub-queues share the cores by their weight, see the ``queueweights`` parameter of ``LauncherJob``
+        :param name: (keyword, optional) name of this commandline, for later commandlines to depend on
+        :param after: (keyword, optional) list of names of earlier commandlines that have to complete before this one starts, see ``TaskGenerator``
+        """
+        self.taskgenerator.append( commandline,**kwargs )
     def finish(self) -> None :
         self.taskgenerator.finish()
 
@@ -2593,7 +5238,8 @@ def MICLauncher(commandfile,**kwargs) -> None :
     cores = kwargs.pop("cores",1)
     corespernode : int = int( kwargs.get("corespernode",SLURMCoresPerNode(**kwargs)) )
     taskmaxruntime = kwargs.pop("taskmaxruntime",0)
-    job = LauncherJob(
+    jobclass = AsyncLauncherJob if kwargs.pop("asynchronous",False) else LauncherJob
+    job = jobclass(
         hostpool=HostPool( hostlist=HostListByName(**kwargs),
             commandexecutor=LocalExecutor(
                 prefix="/bin/sh ",workdir=workdir,debug=debug), 
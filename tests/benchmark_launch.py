@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+################################################################
+####
+#### This file is part of the `pylauncher' package
+#### for parametric job launching
+####
+#### Copyright Victor Eijkhout 2010-2025
+#### eijkhout@tacc.utexas.edu
+####
+#### https://github.com/TACC/pylauncher
+####
+#### benchmark_launch.py : tasks launched per second, with and without exec files
+####
+################################################################
+
+import shutil
+import sys
+import time
+
+import pylauncher
+from pylauncher.pylauncher_core import \
+    ChildProcessExecutor,HostList,HostLocator,HostPool,LocalExecutor,SSHExecutor
+
+##
+## Usage: python benchmark_launch.py [ntasks [sshhost]]
+## -- starts ntasks trivial commands on each executor, with and without exec files,
+##    and reports the launch rate, and the time spent in ``shell_arguments``,
+##    which is where the exec files are written;
+## -- the ssh executor is only tested if a host is given that we can connect to.
+##
+
+ntasks = int(sys.argv[1]) if len(sys.argv)>1 else 200
+sshhost = sys.argv[2] if len(sys.argv)>2 else None
+workdir = "pylauncher_tmp_benchmark_launch"
+
+def launch(executor,locator):
+    shell_arguments = executor.shell_arguments
+    wraptime = 0.
+    def timed_shell_arguments(command):
+        nonlocal wraptime
+        start = time.time()
+        arguments = shell_arguments(command)
+        wraptime += time.time()-start
+        return arguments
+    executor.shell_arguments = timed_shell_arguments
+    start = time.time()
+    for i in range(ntasks):
+        executor.execute("true",locator,id=i)
+    return ntasks/(time.time()-start),wraptime
+
+def local_executor(execfiles):
+    return LocalExecutor(workdir=workdir,execfiles=execfiles),None
+def spawn_executor(execfiles):
+    return ChildProcessExecutor(workdir=workdir,execfiles=execfiles),None
+def ssh_executor(execfiles):
+    host = { "host":sshhost,"hostnum":0,"task_loc":0,"phys_core":"0-0" }
+    pool = HostPool( hostlist=HostList([host]),workdir=workdir,
+                     commandexecutor=SSHExecutor(workdir=workdir,execfiles=execfiles) )
+    return pool.commandexecutor,HostLocator(pool=pool,offset=0,extent=1)
+
+executors = [ ("local",local_executor),("spawn",spawn_executor) ]
+if sshhost is not None:
+    executors.append( ("ssh",ssh_executor) )
+print( f"{ntasks} tasks per run" )
+print( "executor  execfiles  tasks/sec  command (usec/task)" )
+for name,make in executors:
+    for execfiles in [ True,False ]:
+        try:
+            executor,locator = make(execfiles)
+        except Exception as e:
+            print( f"{name:9} could not be set up: {e}" )
+            break
+        rate,wraptime = launch(executor,locator)
+        print( f"{name:9} {str(execfiles):9} {rate:10.1f} {1e6*wraptime/ntasks:20.1f}" )
+        time.sleep(1); executor.poll()
+        shutil.rmtree(workdir)
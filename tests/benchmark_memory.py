@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+################################################################
+####
+#### This file is part of the `pylauncher' package
+#### for parametric job launching
+####
+#### Copyright Victor Eijkhout 2010-2025
+#### eijkhout@tacc.utexas.edu
+####
+#### https://github.com/TACC/pylauncher
+####
+#### benchmark_memory.py : memory footprint of queued commandlines and tasks
+####
+################################################################
+
+import re
+import sys
+import tracemalloc
+
+import pylauncher
+from pylauncher.pylauncher_core import Commandline,WrappedTask
+
+##
+## Usage: python benchmark_memory.py [ntasks [debugstring]]
+## -- creates ntasks commandlines and tasks, as the launcher would queue them,
+##    and reports the memory per million queued tasks;
+## -- with a debug string containing "task" the old layout also
+##    stores a regular expression match object per task;
+## -- the "dict" layout reproduces the objects as they were before
+##    Commandline and Task got __slots__;
+## -- the script fails if the slots layout is not at least 10 percent
+##    smaller than the dict layout, for commandlines and for tasks.
+##
+
+class DictCommandline():
+    def __init__(self,command,**kwargs):
+        self.data = {'command':command,'cores':1}
+        self.data["cores"] = kwargs.pop("cores",1)
+    def __getitem__(self,ind):
+        return self.data[ind]
+
+class DictTask():
+    def __init__(self,command,**kwargs):
+        self.debugs = kwargs.get("debug","")
+        self.debug = re.search("task",self.debugs)
+        self.workdir = kwargs.pop("workdir",None)
+        self.taskid = kwargs.pop("taskid")
+        self.taskmaxruntime = int( kwargs.pop("taskmaxruntime",0) )
+        self.completionclass = kwargs.pop("completionclass",None)
+        self.command = command["command"]
+        self.size = command["cores"]
+        self.has_started = False
+        self.nodes = None
+
+def traced(make):
+    # bytes allocated by the objects that ``make`` returns
+    tracemalloc.start()
+    objects = make()
+    size,peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size,objects
+
+def footprint(commandclass,taskclass,commands,debug):
+    csize,commandlines = traced( lambda : [ commandclass(c,cores=1) for c in commands ] )
+    tsize,tasks = traced( lambda : [ taskclass( c,taskid=i,workdir="wd",debug=debug )
+                                     for i,c in enumerate(commandlines) ] )
+    return csize,tsize
+
+ntasks = int(sys.argv[1]) if len(sys.argv)>1 else 100000
+debug = sys.argv[2] if len(sys.argv)>2 else ""
+commands = [ f"./my_program {i} > out{i}" for i in range(ntasks) ]
+scale = 1000000/ntasks/2**20
+print( f"Python {sys.version.split()[0]}, {ntasks} tasks, debug=<<{debug}>>" )
+print( "layout  commandlines   tasks   (MiB per million)" )
+sizes = {}
+for name,commandclass,taskclass in [ ( "dict",DictCommandline,DictTask ),
+                                     ( "slots",Commandline,WrappedTask ), ]:
+    csize,tsize = footprint(commandclass,taskclass,commands,debug)
+    sizes[name] = (csize,tsize)
+    print( f"{name:6}  {csize*scale:12.1f} {tsize*scale:7.1f}" )
+for what,dictsize,slotsize in zip( [ "commandlines","tasks" ],sizes["dict"],sizes["slots"] ):
+    assert slotsize<.9*dictsize, \
+        f"{what} with slots take {slotsize*scale:.1f} MiB per million, dict layout {dictsize*scale:.1f}"
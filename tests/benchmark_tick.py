@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+################################################################
+####
+#### This file is part of the `pylauncher' package
+#### for parametric job launching
+####
+#### Copyright Victor Eijkhout 2010-2025
+#### eijkhout@tacc.utexas.edu
+####
+#### https://github.com/TACC/pylauncher
+####
+#### benchmark_tick.py : overhead of a launcher tick as the completed list grows
+####
+################################################################
+
+import shutil
+import sys
+import time
+
+import pylauncher
+from pylauncher.pylauncher_core import \
+    Commandline,DynamicCommandlineGenerator,LauncherJob,LocalHostPool,\
+    WrappedTask,WrappedTaskGenerator
+
+##
+## Usage: python benchmark_tick.py [ntick]
+## -- runs ntick ticks, without sleeping, of a job whose task generator is stalling,
+##    with increasingly many tasks in the completed list;
+## -- "eager" is the cost of the queue description that the tick used to
+##    construct for its debug message, whether debugging was on or not.
+##
+
+ntick = int(sys.argv[1]) if len(sys.argv)>1 else 100
+workdir = "pylauncher_tmp_benchmark_tick"
+job = LauncherJob(
+    hostpool=LocalHostPool(nhosts=4,workdir=workdir),
+    taskgenerator=WrappedTaskGenerator(
+        DynamicCommandlineGenerator(),workdir=workdir ),
+    delay=0,journal=False )
+job.starttime = time.time()
+
+print( "completed    tick (usec)   eager (usec)" )
+for ncompleted in [ 0,1000,10000,100000 ]:
+    # every other task id, so that the compact list is long
+    job.queue.completed = [ WrappedTask( Commandline("true"),taskid=2*i,workdir=workdir )
+                            for i in range(ncompleted) ]
+    start = time.time()
+    for t in range(ntick):
+        job.tick()
+    ticktime = (time.time()-start)/ntick
+    start = time.time()
+    for t in range(ntick):
+        message = "\ntick %d\nQueue:\n%s" % (job.tock,str(job.queue))
+    eagertime = (time.time()-start)/ntick
+    print( f"{ncompleted:9} {1e6*ticktime:12.1f} {1e6*eagertime:14.1f}" )
+shutil.rmtree(workdir)